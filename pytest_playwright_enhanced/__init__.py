@@ -1,4 +1,6 @@
 from .__version__ import __version__  # noqa
 from .pages import PlaywrightEnhancedPage
+from .resolution import LaunchConfig
+from .resolution import dynamic_hook
 
-__all__ = ["PlaywrightEnhancedPage"]
+__all__ = ["LaunchConfig", "PlaywrightEnhancedPage", "dynamic_hook"]
@@ -0,0 +1,371 @@
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import datetime as dt
+import functools
+import hashlib
+import json
+import pathlib
+import re
+import shutil
+import threading
+import time
+import typing
+import uuid
+
+from .timeline import ARTIFACT_THREAD
+
+if typing.TYPE_CHECKING:
+    from .budget import ArtifactBudget
+    from .timeline import Timeline
+
+# Pending writes beyond this block the submitting test, bounding the memory
+# held by screenshot bytes waiting to be written.
+MAX_PENDING = 32
+MANIFEST = "manifest.jsonl"
+MANIFEST_PREFIX = "manifest-"
+STAGING_DIR = ".staging"
+# Retired artifacts directories are renamed to `.<name>.trash-<uuid>` and deleted
+# in the background, retained runs to `<name>.<timestamp>`.
+TRASH = "trash-"
+_RUN_STAMP = re.compile(r"^\d{8}T\d{12}$")
+_SIZE = re.compile(r"^(\d+)\s*([kmgt]?)i?b?$", re.IGNORECASE)
+
+
+class ArtifactWriter:
+    """Writes test artifacts on background threads, so test teardown only pays
+    for capturing them (screenshot bytes, finished video files) and not for the
+    file system work.
+
+    At most `max_pending` writes are queued, submitting beyond that blocks until
+    a write completes.  With `max_workers=0` writes happen inline.  Errors are
+    collected and reported by `flush`.
+    """
+
+    def __init__(
+        self: ArtifactWriter, max_workers: int = 2, max_pending: int = MAX_PENDING
+    ) -> None:
+        self._executor = (
+            concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="pwe-artifacts"
+            )
+            if max_workers
+            else None
+        )
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._futures: set[concurrent.futures.Future[None]] = set()
+        self._lock = threading.Lock()
+        self.errors: list[str] = []
+        # Writes are recorded as spans of the `--pw-timeline` when set.
+        self.timeline: Timeline | None = None
+
+    def submit(self: ArtifactWriter, func: typing.Callable[[], object]) -> None:
+        """Run `func` in the background.
+
+        :param func: The file system operation.
+        """
+        if self._executor is None:
+            self._run(func)
+            return
+        self._slots.acquire()
+        future = self._executor.submit(self._run, func)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._done)
+
+    def write_bytes(self: ArtifactWriter, path: pathlib.Path, data: bytes) -> None:
+        """Write captured bytes (e.g. a screenshot) to `path`."""
+        self.submit(functools.partial(path.write_bytes, data))
+
+    def move(
+        self: ArtifactWriter, source: pathlib.Path, destination: pathlib.Path
+    ) -> None:
+        """Move a finished artifact file (e.g. a video) to `destination`."""
+        self.submit(functools.partial(shutil.move, source, destination))
+
+    def delete(self: ArtifactWriter, path: pathlib.Path) -> None:
+        """Remove an artifact file which is not wanted."""
+        self.submit(functools.partial(path.unlink, missing_ok=True))
+
+    def _run(self: ArtifactWriter, func: typing.Callable[[], object]) -> None:
+        started = time.perf_counter()
+        try:
+            func()
+        except OSError as err:
+            with self._lock:
+                self.errors.append(str(err))
+        if self.timeline is not None:
+            operation = getattr(func, "func", func)
+            self.timeline.span(
+                getattr(operation, "__name__", "write").lstrip("_"),
+                "artifact",
+                started,
+                time.perf_counter(),
+                tid=ARTIFACT_THREAD,
+            )
+
+    def _done(self: ArtifactWriter, future: concurrent.futures.Future[None]) -> None:
+        with self._lock:
+            self._futures.discard(future)
+        self._slots.release()
+
+    def flush(self: ArtifactWriter) -> list[str]:
+        """Block until every queued write has finished, returning (and clearing)
+        the errors encountered so far."""
+        with self._lock:
+            pending = list(self._futures)
+        concurrent.futures.wait(pending)
+        with self._lock:
+            errors, self.errors = self.errors, []
+        return errors
+
+    def close(self: ArtifactWriter) -> list[str]:
+        """Flush outstanding writes and stop the worker threads."""
+        errors = self.flush()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        return errors
+
+
+class ArtifactStore:
+    """Stores the artifacts of tests in the artifacts directory and indexes them
+    in a JSONL manifest per (xdist) worker, mapping node ids to their artifacts.
+    The controller merges the manifests into `manifest.jsonl` at the end of the
+    session.
+
+    By default artifacts keep their descriptive names.  When `content_addressed`
+    files are named by the sha256 of their content and only written once, so
+    identical artifacts (e.g. the same error page captured by many failing tests)
+    take the space and write I/O of one.  The manifest keeps the descriptive
+    names.  All file system work happens on the `ArtifactWriter` threads.
+
+    Artifacts which do not fit the `budget` are not stored, the manifest records
+    them with the reason they were `skipped`.
+    """
+
+    def __init__(
+        self: ArtifactStore,
+        root: pathlib.Path,
+        writer: ArtifactWriter,
+        worker: str = "main",
+        content_addressed: bool = False,  # noqa: FBT001, FBT002
+        budget: ArtifactBudget | None = None,
+    ) -> None:
+        self.root = root
+        self.writer = writer
+        self.content_addressed = content_addressed
+        self.budget = budget
+        self.manifest = root / f"{MANIFEST_PREFIX}{worker}.jsonl"
+        self._lock = threading.Lock()
+
+    def staging_path(self: ArtifactStore, name: str) -> pathlib.Path:
+        """A path to write an artifact to before handing it to `add_file`.
+
+        :param name: The descriptive name of the artifact.
+        """
+        if not self.content_addressed:
+            return self.root / name
+        staging = self.root / STAGING_DIR
+        staging.mkdir(exist_ok=True)
+        return staging / f"{uuid.uuid4().hex}{pathlib.Path(name).suffix}"
+
+    def add_bytes(self: ArtifactStore, nodeid: str, name: str, data: bytes) -> None:
+        """Store captured bytes (e.g. a screenshot) in the background.
+
+        :param nodeid: The node id of the test the artifact belongs to.
+        :param name: The descriptive name of the artifact.
+        :param data: The artifact content.
+        """
+        self.writer.submit(functools.partial(self._store_bytes, nodeid, name, data))
+
+    def add_file(
+        self: ArtifactStore, nodeid: str, name: str, source: pathlib.Path
+    ) -> None:
+        """Move a finished artifact file (e.g. a video) into the store in the
+        background.
+
+        :param nodeid: The node id of the test the artifact belongs to.
+        :param name: The descriptive name of the artifact.
+        :param source: The file, it is moved (or removed if already stored).
+        """
+        self.writer.submit(functools.partial(self._store_file, nodeid, name, source))
+
+    def discard(self: ArtifactStore, path: pathlib.Path) -> None:
+        """Remove an artifact file which is not wanted, in the background."""
+        self.writer.delete(path)
+
+    def _store_bytes(self: ArtifactStore, nodeid: str, name: str, data: bytes) -> None:
+        if not self.content_addressed:
+            if self._admit(nodeid, name, len(data)):
+                destination = self.root / name
+                destination.write_bytes(data)
+                self._record(nodeid, name, destination, len(data))
+            return
+        digest = hashlib.sha256(data).hexdigest()
+        destination = self.root / f"{digest}{pathlib.Path(name).suffix}"
+        # Duplicates take no space, they are not counted against the budget.
+        if not destination.exists():
+            if not self._admit(nodeid, name, len(data)):
+                return
+            partial = destination.with_name(f".{uuid.uuid4().hex}.partial")
+            partial.write_bytes(data)
+            # Atomic, a concurrent writer of the same content writes the same bytes.
+            partial.replace(destination)
+        self._record(nodeid, name, destination, len(data), digest)
+
+    def _store_file(
+        self: ArtifactStore, nodeid: str, name: str, source: pathlib.Path
+    ) -> None:
+        size = source.stat().st_size
+        if not self.content_addressed:
+            if not self._admit(nodeid, name, size):
+                source.unlink()
+                return
+            destination = self.root / name
+            if source != destination:
+                shutil.move(source, destination)
+            self._record(nodeid, name, destination, size)
+            return
+        digest = hashlib.sha256()
+        with source.open("rb") as f:
+            for chunk in iter(functools.partial(f.read, 1 << 20), b""):
+                digest.update(chunk)
+        destination = self.root / f"{digest.hexdigest()}{source.suffix}"
+        if destination.exists():
+            source.unlink()
+        elif self._admit(nodeid, name, size):
+            shutil.move(source, destination)
+        else:
+            source.unlink()
+            return
+        self._record(nodeid, name, destination, size, digest.hexdigest())
+
+    def _admit(self: ArtifactStore, nodeid: str, name: str, size: int) -> bool:
+        if self.budget is None:
+            return True
+        reason = self.budget.admit(nodeid, name, size)
+        if reason is None:
+            return True
+        entry = {"nodeid": nodeid, "name": name, "bytes": size, "skipped": reason}
+        with self._lock, self.manifest.open("a") as f:
+            f.write(json.dumps(entry) + "\n")
+        return False
+
+    def _record(
+        self: ArtifactStore,
+        nodeid: str,
+        name: str,
+        path: pathlib.Path,
+        size: int,
+        digest: str | None = None,
+    ) -> None:
+        entry = {"nodeid": nodeid, "name": name, "path": path.name, "bytes": size}
+        if digest is not None:
+            entry["sha256"] = digest
+        with self._lock, self.manifest.open("a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+def merge_manifests(root: pathlib.Path) -> pathlib.Path | None:
+    """Merge the per worker manifests into `manifest.jsonl`, returning its path
+    or `None` if no artifacts were stored.  Called by the controller once every
+    worker has finished.
+
+    :param root: The artifacts directory.
+    """
+    parts = sorted(root.glob(f"{MANIFEST_PREFIX}*.jsonl"))
+    if not parts:
+        return None
+    merged = root / MANIFEST
+    with merged.open("a") as out:
+        for part in parts:
+            with part.open() as f:
+                shutil.copyfileobj(f, out)
+            part.unlink()
+    shutil.rmtree(root / STAGING_DIR, ignore_errors=True)
+    return merged
+
+
+def parse_size(value: str) -> int:
+    """Parse a size in bytes, optionally suffixed with K, M, G or T (powers of 1024),
+    e.g. `500MB` or `2G`.
+
+    :param value: The raw command line value.
+    """
+    match = _SIZE.match(value.strip())
+    if match is None:
+        msg = f"expected a size such as 500MB or 2G, got {value!r}"
+        raise argparse.ArgumentTypeError(msg)
+    number, unit = match.groups()
+    return int(number) * 1024 ** " kmgt".index(unit.lower() or " ")
+
+
+def retire_artifacts_dir(
+    artifacts_dir: pathlib.Path, keep_runs: int = 0, max_bytes: int | None = None
+) -> threading.Thread:
+    """Move the artifacts of the previous run out of the way without waiting for
+    them to be deleted.  The directory is renamed (cheap and atomic) and a
+    background thread deletes it, along with retained runs beyond `keep_runs`
+    or `max_bytes` (oldest first) and leftovers of interrupted cleanups.
+
+    Returns the started thread, join it before exiting so no partially deleted
+    directories are left behind.
+
+    :param artifacts_dir: The artifacts directory of the new run.
+    :param keep_runs: The number of previous runs to keep, as `<name>.<timestamp>`.
+    :param max_bytes: The total size retained runs may take.
+    """
+    parent, name = artifacts_dir.parent, artifacts_dir.name
+    if artifacts_dir.is_dir():
+        if keep_runs:
+            stamp = dt.datetime.now().strftime("%Y%m%dT%H%M%S%f")  # noqa: DTZ005
+            retired = parent / f"{name}.{stamp}"
+        else:
+            retired = parent / f".{name}.{TRASH}{uuid.uuid4().hex}"
+        try:
+            artifacts_dir.rename(retired)
+        except OSError:
+            # e.g. a file in it is held open on Windows, delete what we can.
+            shutil.rmtree(artifacts_dir, ignore_errors=True)
+    thread = threading.Thread(
+        target=_evict_runs,
+        args=(artifacts_dir, keep_runs, max_bytes),
+        name="pwe-artifacts-cleanup",
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+def _evict_runs(
+    artifacts_dir: pathlib.Path, keep_runs: int, max_bytes: int | None
+) -> None:
+    parent, name = artifacts_dir.parent, artifacts_dir.name
+    runs = sorted(
+        (
+            run
+            for run in parent.glob(f"{name}.*")
+            if _RUN_STAMP.match(run.suffix[1:]) and run.is_dir()
+        ),
+        reverse=True,
+    )
+    retained = total = 0
+    for run in runs:
+        if max_bytes is not None:
+            total += _tree_size(run)
+        if retained < keep_runs and (max_bytes is None or total <= max_bytes):
+            retained += 1
+            continue
+        # Once a run does not fit, it and every older run are evicted.
+        retained = keep_runs
+        try:
+            run.rename(parent / f".{name}.{TRASH}{uuid.uuid4().hex}")
+        except OSError:
+            continue
+    for trash in parent.glob(f".{name}.{TRASH}*"):
+        shutil.rmtree(trash, ignore_errors=True)
+
+
+def _tree_size(path: pathlib.Path) -> int:
+    return sum(file.lstat().st_size for file in path.rglob("*") if file.is_file())
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import collections
+import hashlib
+import json
+import os
+import pathlib
+import re
+import time
+import uuid
+
+from playwright import sync_api as pwsync
+
+from .utils import file_lock
+
+# Static assets worth caching, documents and api calls always hit the network.
+CACHEABLE_TYPES = frozenset(("script", "stylesheet", "font", "image"))
+# The body is served decoded, the original framing headers no longer apply.
+_DROPPED_HEADERS = frozenset(
+    ("content-encoding", "content-length", "transfer-encoding")
+)
+_MAX_AGE = re.compile(r"(?:^|,)\s*max-age\s*=\s*(\d+)", re.IGNORECASE)
+_UNCACHEABLE = re.compile(r"no-store|no-cache|private", re.IGNORECASE)
+# Entries are keyed on the url alone, so responses varying on request headers
+# are not cached.  Bodies are stored decoded, so the encoding does not matter.
+_VARY_IGNORED = frozenset(("", "accept-encoding"))
+
+
+def max_age(headers: dict[str, str]) -> int:
+    """Returns for how many seconds a response may be reused, 0 if it may not.
+
+    :param headers: The (lower cased) response headers.
+    """
+    cache_control = headers.get("cache-control", "")
+    if _UNCACHEABLE.search(cache_control) or "set-cookie" in headers:
+        return 0
+    vary = {field.strip().lower() for field in headers.get("vary", "").split(",")}
+    if not vary <= _VARY_IGNORED:
+        return 0
+    match = _MAX_AGE.search(cache_control)
+    return int(match.group(1)) if match else 0
+
+
+class AssetCache:
+    """An on disk cache of static responses (scripts, stylesheets, fonts and
+    images) shared by every test and xdist worker, so new contexts stop
+    downloading the same bundles for every test.
+
+    Bodies are stored once by the sha256 of their content, and every url has an
+    entry pointing at its body.  Entries are replaced atomically, so hits need no
+    locking; writes and eviction happen under a file lock.  The cache honours
+    `Cache-Control: max-age` and once over `max_bytes` evicts the least recently
+    used entries.
+
+    :param directory: The cache directory, kept between runs.
+    :param max_bytes: The total size of the cached bodies.
+    """
+
+    def __init__(self: AssetCache, directory: pathlib.Path, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries = directory / "entries"
+        self.blobs = directory / "blobs"
+        self.entries.mkdir(parents=True, exist_ok=True)
+        self.blobs.mkdir(exist_ok=True)
+        self._lock = directory / "lock"
+        self._size = directory / "size"
+
+    def _entry(self: AssetCache, url: str) -> pathlib.Path:
+        return self.entries / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+
+    def get(self: AssetCache, url: str) -> tuple[dict[str, object], bytes] | None:
+        """Returns the cached entry (`status`, `headers`) and body of a url, or
+        `None` on a miss.
+
+        :param url: The request url.
+        """
+        path = self._entry(url)
+        try:
+            entry = json.loads(path.read_text())
+            if entry["url"] != url or entry["expires"] < time.time():
+                return None
+            body = (self.blobs / entry["sha256"]).read_bytes()
+            # The mtime of an entry records its last use for LRU eviction.
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry, body
+
+    def put(
+        self: AssetCache,
+        url: str,
+        status: int,
+        headers: dict[str, str],
+        body: bytes,
+        ttl: int,
+    ) -> None:
+        """Cache a response.
+
+        :param url: The request url.
+        :param status: The response status.
+        :param headers: The (lower cased) response headers.
+        :param body: The decoded response body.
+        :param ttl: For how many seconds the response may be reused.
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        entry = {
+            "url": url,
+            "status": status,
+            "headers": {
+                name: value
+                for name, value in headers.items()
+                if name not in _DROPPED_HEADERS
+            },
+            "sha256": digest,
+            "expires": time.time() + ttl,
+        }
+        with file_lock(self._lock):
+            blob = self.blobs / digest
+            if not blob.exists():
+                self._replace(blob, body)
+                self._grow(len(body))
+            path = self._entry(url)
+            self._replace(path, json.dumps(entry).encode())
+
+    def _replace(self: AssetCache, path: pathlib.Path, data: bytes) -> None:
+        partial = path.with_name(f".{uuid.uuid4().hex}.partial")
+        partial.write_bytes(data)
+        partial.replace(path)
+
+    def _grow(self: AssetCache, size: int) -> None:
+        try:
+            total = int(self._size.read_text()) + size
+        except (OSError, ValueError):
+            total = sum(blob.stat().st_size for blob in self.blobs.iterdir())
+        if total > self.max_bytes:
+            total = self._evict()
+        self._size.write_text(str(total))
+
+    def _evict(self: AssetCache) -> int:
+        """Remove least recently used entries until the bodies fit in half of
+        the budget, so eviction does not run for every new response.  Returns
+        the size of the remaining bodies.  Called under the lock."""
+        entries = sorted(self.entries.glob("*.json"), key=lambda e: e.stat().st_mtime)
+        blob_of = {path.name: self._blob_of(path) for path in entries}
+        # How many entries point at each body, a body is removed with its last.
+        references = collections.Counter(blob_of.values())
+        sizes = {blob.name: blob.stat().st_size for blob in self.blobs.iterdir()}
+        total = sum(sizes.values())
+        for path in entries:
+            if total <= self.max_bytes // 2:
+                break
+            path.unlink(missing_ok=True)
+            blob = blob_of[path.name]
+            if blob is None:
+                continue
+            references[blob] -= 1
+            if not references[blob] and blob.name in sizes:
+                blob.unlink(missing_ok=True)
+                total -= sizes.pop(blob.name)
+        return total
+
+    def _blob_of(self: AssetCache, entry: pathlib.Path) -> pathlib.Path | None:
+        try:
+            return self.blobs / json.loads(entry.read_text())["sha256"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def handle(self: AssetCache, route: pwsync.Route) -> None:
+        """The route handler installed on contexts, serving cached static assets
+        and caching the cacheable ones fetched from the network."""
+        request = route.request
+        if request.method != "GET" or request.resource_type not in CACHEABLE_TYPES:
+            route.fallback()
+            return
+        cached = self.get(request.url)
+        if cached is not None:
+            entry, body = cached
+            route.fulfill(
+                status=entry["status"],  # type: ignore[arg-type]
+                headers=entry["headers"],  # type: ignore[arg-type]
+                body=body,
+            )
+            return
+        try:
+            response = route.fetch()
+        except pwsync.Error:
+            route.fallback()
+            return
+        body = response.body()
+        route.fulfill(response=response, body=body)
+        ttl = max_age(response.headers) if response.status == 200 else 0  # noqa: PLR2004
+        if ttl:
+            self.put(request.url, response.status, response.headers, body, ttl)
+
+    def install(self: AssetCache, context: pwsync.BrowserContext) -> None:
+        """Route the requests of a context through the cache.
+
+        :param context: The test context.
+        """
+        context.route("**/*", self.handle)
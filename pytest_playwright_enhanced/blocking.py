@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import functools
+import re
+import typing
+
+import pytest
+from playwright import sync_api as pwsync
+
+from .utils import marker_kwargs
+
+MARKER = "pw_block"
+# Profiles of `--block-resources`, blocking either playwright resource types
+# or the urls of well known third party analytics.
+RESOURCE_TYPES = {
+    "images": ("image",),
+    "fonts": ("font",),
+    "media": ("media",),
+    "stylesheets": ("stylesheet",),
+}
+ANALYTICS = (
+    "*google-analytics.com/*",
+    "*googletagmanager.com/*",
+    "*doubleclick.net/*",
+    "*segment.io/*",
+    "*segment.com/*",
+    "*hotjar.com/*",
+    "*mixpanel.com/*",
+    "*amplitude.com/*",
+    "*facebook.net/*",
+)
+PROFILES = (*RESOURCE_TYPES, "analytics")
+
+Pattern = typing.Union[str, "re.Pattern[str]"]
+
+
+def parse_block_resources(value: str) -> tuple[str, ...]:
+    """Parse a comma separated `--block-resources` value, e.g. `images,fonts`.
+
+    :param value: The raw command line value.
+    """
+    profiles = tuple(profile.strip() for profile in value.split(",") if profile)
+    unknown = [profile for profile in profiles if profile not in PROFILES]
+    if unknown:
+        msg = f"unknown resource profile(s) {', '.join(unknown)}, choose from {', '.join(PROFILES)}"
+        raise argparse.ArgumentTypeError(msg)
+    return profiles
+
+
+@functools.lru_cache(maxsize=None)
+def compile_patterns(patterns: tuple[Pattern, ...]) -> re.Pattern[str] | None:
+    """Compile url globs (and regular expressions) into a single expression, so
+    matching a request costs one search however many patterns there are.
+
+    :param patterns: Globs such as `*.png` matching the whole url, or compiled
+        regular expressions searched for in it.
+    """
+    if not patterns:
+        return None
+    return re.compile(
+        "|".join(
+            f"(?:{pattern.pattern})"
+            if isinstance(pattern, re.Pattern)
+            else f"(?:\\A{fnmatch.translate(pattern)})"
+            for pattern in patterns
+        )
+    )
+
+
+class ResourceBlocker:
+    """Aborts the requests of a context which tests never need, such as images,
+    fonts or third party analytics, by resource type or url.  Requests which are
+    not blocked fall back to any other routes of the context (e.g. HAR replay).
+
+    :param resource_types: Playwright resource types to block, e.g. `image`.
+    :param patterns: Url globs or compiled regular expressions to block.
+    """
+
+    def __init__(
+        self: ResourceBlocker,
+        resource_types: typing.Iterable[str] = (),
+        patterns: typing.Iterable[Pattern] = (),
+    ) -> None:
+        self.resource_types = frozenset(resource_types)
+        self.patterns = tuple(patterns)
+        self._matcher = compile_patterns(self.patterns)
+
+    @classmethod
+    def from_profiles(
+        cls: type[ResourceBlocker], profiles: typing.Iterable[str]
+    ) -> ResourceBlocker:
+        """Create a blocker for `--block-resources` profiles.
+
+        :param profiles: Profile names, e.g. `images` or `analytics`.
+        """
+        profiles = tuple(profiles)
+        return cls(
+            (kind for profile in profiles for kind in RESOURCE_TYPES.get(profile, ())),
+            ANALYTICS if "analytics" in profiles else (),
+        )
+
+    def extend(self: ResourceBlocker, item: pytest.Item) -> ResourceBlocker:
+        """Returns the blocker of a test, adding the `patterns` and `resources`
+        of its `pw_block` marker.
+
+        :param item: The test item.
+        """
+        if item.get_closest_marker(MARKER) is None:
+            return self
+        options = marker_kwargs(item, MARKER)
+        resources = tuple(options.get("resources", ()))
+        return ResourceBlocker(
+            self.resource_types.union(
+                kind
+                for profile in resources
+                for kind in RESOURCE_TYPES.get(profile, (profile,))
+            ),
+            (*self.patterns, *options.get("patterns", ())),
+        )
+
+    def __bool__(self: ResourceBlocker) -> bool:
+        return bool(self.resource_types or self.patterns)
+
+    def blocks(self: ResourceBlocker, request: pwsync.Request) -> bool:
+        """Returns if a request is blocked.
+
+        :param request: The intercepted request.
+        """
+        if request.resource_type in self.resource_types:
+            return True
+        return (
+            self._matcher is not None and self._matcher.search(request.url) is not None
+        )
+
+    def handle(self: ResourceBlocker, route: pwsync.Route) -> None:
+        """The route handler installed on contexts."""
+        if self.blocks(route.request):
+            route.abort("blockedbyclient")
+        else:
+            route.fallback()
+
+    def install(self: ResourceBlocker, context: pwsync.BrowserContext) -> None:
+        """Route every request of a context through the blocker.
+
+        :param context: The test context.
+        """
+        context.route("**/*", self.handle)
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import argparse
+import json
+import pathlib
+import threading
+
+from .artifacts import parse_size
+from .const import ArtifactKind
+from .utils import file_lock
+
+# Under the run budget, videos may only fill part of it and traces a little
+# more, so as the budget runs out video is dropped first, then traces, and the
+# remainder is kept for (small) screenshots.
+HEADROOM = {
+    ArtifactKind.VIDEO: 0.6,
+    ArtifactKind.TRACE: 0.9,
+    ArtifactKind.SCREENSHOT: 1.0,
+    ArtifactKind.OTHER: 1.0,
+}
+_KINDS = {
+    ".png": ArtifactKind.SCREENSHOT,
+    ".jpeg": ArtifactKind.SCREENSHOT,
+    ".zip": ArtifactKind.TRACE,
+    ".webm": ArtifactKind.VIDEO,
+}
+
+
+def artifact_kind(name: str) -> str:
+    """Returns the kind of an artifact from its name.
+
+    :param name: The artifact name, e.g. `test-a-0.webm`.
+    """
+    return _KINDS.get(pathlib.Path(name).suffix, ArtifactKind.OTHER)
+
+
+def parse_kind_size(value: str) -> tuple[str, int]:
+    """Parse a `--artifacts-max-type-bytes` value of the form `KIND=SIZE`.
+
+    :param value: The raw command line value, e.g. `video=1G`.
+    """
+    kind, _, size = value.partition("=")
+    kinds = (ArtifactKind.SCREENSHOT, ArtifactKind.TRACE, ArtifactKind.VIDEO)
+    if kind not in kinds:
+        msg = f"expected KIND=SIZE with KIND one of {', '.join(kinds)}, got {value!r}"
+        raise argparse.ArgumentTypeError(msg)
+    return kind, parse_size(size)
+
+
+class ArtifactBudget:
+    """Caps the bytes of artifacts stored for the run, per test and per kind of
+    artifact.  Run and kind totals are shared by every xdist worker through a
+    counter file in the artifacts directory, updated under a file lock; a test
+    only runs in a single worker, so its total is kept in memory.
+
+    `admit` returns why an artifact does not fit, `None` if it does (and
+    counts it).
+    """
+
+    def __init__(
+        self: ArtifactBudget,
+        directory: pathlib.Path,
+        max_bytes: int | None = None,
+        max_test_bytes: int | None = None,
+        max_kind_bytes: dict[str, int] | None = None,
+    ) -> None:
+        self.counter = directory / "budget.json"
+        self.max_bytes = max_bytes
+        self.max_test_bytes = max_test_bytes
+        self.max_kind_bytes = max_kind_bytes or {}
+        self._tests: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def admit(self: ArtifactBudget, nodeid: str, name: str, size: int) -> str | None:
+        """Count an artifact against the budgets if it fits.
+
+        :param nodeid: The node id of the test the artifact belongs to.
+        :param name: The artifact name.
+        :param size: The size of the artifact in bytes.
+        """
+        kind = artifact_kind(name)
+        with self._lock:
+            used = self._tests.get(nodeid, 0)
+            if self.max_test_bytes is not None and used + size > self.max_test_bytes:
+                return "test budget"
+            if self.max_bytes is not None or kind in self.max_kind_bytes:
+                reason = self._admit_shared(kind, size)
+                if reason is not None:
+                    return reason
+            self._tests[nodeid] = used + size
+        return None
+
+    def _admit_shared(self: ArtifactBudget, kind: str, size: int) -> str | None:
+        self.counter.parent.mkdir(exist_ok=True)
+        with file_lock(self.counter.with_suffix(".lock")):
+            try:
+                totals = json.loads(self.counter.read_text())
+            except FileNotFoundError:
+                totals = {}
+            total = totals.get("total", 0) + size
+            if kind in self.max_kind_bytes and (
+                totals.get(kind, 0) + size > self.max_kind_bytes[kind]
+            ):
+                return f"{kind} budget"
+            if self.max_bytes is not None and total > self.max_bytes * HEADROOM[kind]:
+                return "run budget"
+            totals["total"] = total
+            totals[kind] = totals.get(kind, 0) + size
+            self.counter.write_text(json.dumps(totals))
+        return None
+
+
+def skipped_artifacts(manifest: pathlib.Path) -> dict[tuple[str, str], list[int]]:
+    """Tally the artifacts a manifest records as skipped, returning the count
+    and bytes of each kind of artifact per reason.
+
+    :param manifest: The merged manifest.
+    """
+    skipped: dict[tuple[str, str], list[int]] = {}
+    with manifest.open() as f:
+        for line in f:
+            entry = json.loads(line)
+            if "skipped" not in entry:
+                continue
+            tally = skipped.setdefault(
+                (artifact_kind(entry["name"]), entry["skipped"]), [0, 0]
+            )
+            tally[0] += 1
+            tally[1] += entry["bytes"]
+    return skipped
@@ -0,0 +1,408 @@
+"""Compare the results of two runs and fail on performance regressions.
+
+    python -m pytest_playwright_enhanced.compare baseline.json current.json
+    python -m pytest_playwright_enhanced.compare --baseline 'nightly/*.json' --current a.json b.json
+
+Accepts the `--pw-timings-json` report of a run or the `perf.jsonl` page metrics
+of the artifacts directory (any JSON lines file of records with a `nodeid`).
+Files are decoded incrementally, only the samples of each metric are kept.  The
+samples of the files of each side are pooled per test before they are compared.
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import math
+import pathlib
+import re
+import statistics
+import sys
+import typing
+from dataclasses import dataclass
+
+from .timings import percentile
+
+# A run is a regression when the median of a metric grew by more than the
+# threshold and, given enough baseline runs to tell, is an outlier of them.
+DEFAULT_THRESHOLD = 10.0
+OUTLIER_MIN_RUNS = 3
+# The modified z-score (Iglewicz and Hoaglin) beyond which a value is an outlier.
+OUTLIER_Z = 3.5
+_MAD_SCALE = 0.6745
+# Fields of records which identify, rather than measure, a page.
+_IDENTITY = frozenset(("nodeid", "engine", "page", "url"))
+_CHUNK = 1 << 20
+_SEPARATORS = re.compile(r"[\s,:]*")
+
+# A test, or a page of a test, on an engine: (node id, engine, page).
+Key = typing.Tuple[str, typing.Optional[str], typing.Optional[int]]
+Samples = typing.Dict[Key, typing.Dict[str, typing.List[float]]]
+
+
+class _Stream:
+    """Decodes consecutive JSON values of a file, holding a chunk of the file and
+    the value being decoded in memory.
+
+    :param f: The open file.
+    """
+
+    def __init__(self: _Stream, f: typing.TextIO) -> None:
+        self.f = f
+        self.buffer = ""
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self: _Stream) -> bool:
+        chunk = self.f.read(_CHUNK)
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self: _Stream) -> str:
+        """The next character after any separators, or `""` at the end."""
+        while True:
+            self.pos = _SEPARATORS.match(self.buffer, self.pos).end()  # type: ignore[union-attr]
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def take(self: _Stream, expected: str) -> None:
+        """Consume the next character, which must be `expected`."""
+        if self.peek() != expected:
+            msg = f"expected {expected!r} at offset {self.pos}"
+            raise ValueError(msg)
+        self.pos += 1
+
+    def value(self: _Stream) -> typing.Any:  # noqa: ANN401
+        """Decode the next value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk.
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def _timings(f: typing.TextIO) -> typing.Iterator[dict[str, typing.Any]]:
+    """The records of a `--pw-timings-json` report, one test at a time."""
+    stream = _Stream(f)
+    stream.take("{")
+    while stream.peek() != "}":
+        if stream.peek() == "":
+            msg = "truncated timings report"
+            raise ValueError(msg)
+        if stream.value() != "tests":
+            stream.value()
+            continue
+        stream.take("{")
+        while stream.peek() != "}":
+            nodeid = stream.value()
+            yield {"nodeid": nodeid, **stream.value()}
+        stream.take("}")
+
+
+def iter_records(path: pathlib.Path) -> typing.Iterator[dict[str, typing.Any]]:
+    """The records of a results file, a `.jsonl` file is read line by line and
+    any other file is expected to be a `--pw-timings-json` report.
+
+    :param path: The results file.
+    """
+    with path.open() as f:
+        if path.suffix == ".jsonl":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from _timings(f)
+
+
+def load_samples(
+    path: pathlib.Path,
+    metrics: frozenset[str] | None,
+    samples: Samples | None = None,
+) -> Samples:
+    """Collect the numeric metrics of each test (or page) of a results file,
+    records repeating a key (e.g. runs appended to the same file) add samples.
+
+    :param path: The results file.
+    :param metrics: Only collect these metrics, all when `None`.
+    :param samples: Add to the samples of other files, rather than new samples.
+    """
+    if samples is None:
+        samples = {}
+    for record in iter_records(path):
+        key = (record["nodeid"], record.get("engine"), record.get("page"))
+        values = samples.setdefault(key, {})
+        for metric, value in record.items():
+            if (
+                metric in _IDENTITY
+                or isinstance(value, bool)
+                or not isinstance(value, (int, float))
+                or (metrics is not None and metric not in metrics)
+            ):
+                continue
+            values.setdefault(metric, []).append(float(value))
+    return samples
+
+
+def pool_samples(
+    paths: typing.Iterable[pathlib.Path], metrics: frozenset[str] | None
+) -> Samples:
+    """The samples of several results files (e.g. the runs of a nightly job)
+    pooled per test (or page).
+
+    :param paths: The results files.
+    :param metrics: Only collect these metrics, all when `None`.
+    """
+    samples: Samples = {}
+    for path in paths:
+        load_samples(path, metrics, samples)
+    return samples
+
+
+def expand_paths(patterns: typing.Iterable[str]) -> list[pathlib.Path]:
+    """Expand glob patterns to the files they match, sorted and deduplicated.
+    Anything which is not a pattern is kept as is, so a missing file is reported
+    when it is read.
+
+    :param patterns: Paths or glob patterns, e.g. `nightly/*.json`.
+    """
+    paths: dict[pathlib.Path, None] = {}
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))  # noqa: PTH207
+            if not matches:
+                msg = f"no results match {pattern!r}"
+                raise FileNotFoundError(msg)
+            paths.update(dict.fromkeys(map(pathlib.Path, matches)))
+        else:
+            paths[pathlib.Path(pattern)] = None
+    return list(paths)
+
+
+@dataclass(frozen=True)
+class Stats:
+    """Robust statistics of the samples of a metric."""
+
+    runs: int
+    median: float
+    p95: float
+    mad: float
+
+    @classmethod
+    def of(cls: type[Stats], values: list[float]) -> Stats:
+        """Summarise samples.
+
+        :param values: At least one sample.
+        """
+        values = sorted(values)
+        median = statistics.median(values)
+        return cls(
+            runs=len(values),
+            median=median,
+            p95=percentile(values, 0.95),
+            mad=statistics.median(abs(value - median) for value in values),
+        )
+
+
+@dataclass(frozen=True)
+class Comparison:
+    """A metric of a test (or page) in both runs."""
+
+    key: Key
+    metric: str
+    baseline: Stats
+    current: Stats
+    threshold: float
+
+    @property
+    def delta(self: Comparison) -> float:
+        """The change of the median in percent of the baseline."""
+        if self.baseline.median == 0:
+            return 0.0 if self.current.median == 0 else math.inf
+        return (self.current.median / self.baseline.median - 1) * 100
+
+    @property
+    def outlier(self: Comparison) -> bool | None:
+        """If the current median is an outlier of the baseline runs, `None` when
+        there are too few (or identical) baseline runs to tell."""
+        if self.baseline.runs < OUTLIER_MIN_RUNS or self.baseline.mad == 0:
+            return None
+        score = (
+            _MAD_SCALE
+            * abs(self.current.median - self.baseline.median)
+            / self.baseline.mad
+        )
+        return score > OUTLIER_Z
+
+    @property
+    def regressed(self: Comparison) -> bool:
+        return self.delta > self.threshold and self.outlier is not False
+
+    def describe(self: Comparison) -> str:
+        nodeid, engine, page = self.key
+        where = "".join(
+            (
+                nodeid,
+                f" [{engine}]" if engine else "",
+                f" page {page}" if page is not None else "",
+                " (outlier)" if self.outlier else "",
+            )
+        )
+        return (
+            f"{self.metric:<24}{self.baseline.median:>11.4g}{self.current.median:>11.4g}"
+            f"{self.delta:>+9.1f}%{self.current.p95:>11.4g}  {where}"
+        )
+
+
+def compare(
+    baseline: Samples,
+    current: Samples,
+    threshold: float,
+    metric_thresholds: dict[str, float],
+) -> list[Comparison]:
+    """Compare every metric of the tests (or pages) present in both runs.
+
+    :param baseline: The samples of the baseline run(s).
+    :param current: The samples of the current run(s).
+    :param threshold: The allowed growth of a median, in percent.
+    :param metric_thresholds: Per metric overrides of `threshold`.
+    """
+    return [
+        Comparison(
+            key,
+            metric,
+            Stats.of(baseline_values),
+            Stats.of(current[key][metric]),
+            metric_thresholds.get(metric, threshold),
+        )
+        for key in sorted(baseline.keys() & current.keys(), key=str)
+        for metric, baseline_values in sorted(baseline[key].items())
+        if current[key].get(metric)
+    ]
+
+
+def parse_metric_threshold(value: str) -> tuple[str, float]:
+    """Parse a `--metric-threshold` value of the form `METRIC=PERCENT`.
+
+    :param value: The raw command line value.
+    """
+    metric, _, percent = value.partition("=")
+    try:
+        return metric.strip(), float(percent)
+    except ValueError:
+        msg = f"expected METRIC=PERCENT, e.g. lcp_ms=5, got {value!r}"
+        raise argparse.ArgumentTypeError(msg) from None
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Compare the result files of two sides, returning 1 if any metric
+    regressed.
+
+    :param argv: The command line arguments, `sys.argv` by default.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m pytest_playwright_enhanced.compare",
+        description=__doc__.splitlines()[0],
+    )
+    parser.add_argument("baseline_path", nargs="?", metavar="baseline")
+    parser.add_argument("current_path", nargs="?", metavar="current")
+    parser.add_argument(
+        "--baseline",
+        nargs="+",
+        action="extend",
+        default=[],
+        metavar="PATH",
+        help="Result files (or quoted glob patterns) of the baseline, pooled per test.",
+    )
+    parser.add_argument(
+        "--current",
+        nargs="+",
+        action="extend",
+        default=[],
+        metavar="PATH",
+        help="Result files (or quoted glob patterns) of the current run(s), pooled per test.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="The growth of the median of a metric, in percent, which is a regression.",
+    )
+    parser.add_argument(
+        "--metric-threshold",
+        type=parse_metric_threshold,
+        action="append",
+        default=[],
+        metavar="METRIC=PERCENT",
+        help="Override --threshold for a metric, e.g. cls=25.  Repeatable.",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=lambda value: frozenset(value.split(",")),
+        default=None,
+        help="Only compare these comma separated metrics, e.g. lcp_ms,call.",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=20,
+        help="The number of regressions and improvements to list.",
+    )
+    args = parser.parse_args(argv)
+    sides = [args.baseline, args.current]
+    positional = [path for path in (args.baseline_path, args.current_path) if path]
+    # Positional paths fill the sides not given as options, in order.
+    for side in sides:
+        if not side and positional:
+            side.append(positional.pop(0))
+    if positional or not all(sides):
+        parser.error(
+            "expected a baseline and a current run, e.g. baseline.json current.json"
+        )
+    try:
+        baseline = pool_samples(expand_paths(args.baseline), args.metrics)
+        current = pool_samples(expand_paths(args.current), args.metrics)
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(f"unable to read results: {e!r}")
+
+    comparisons = compare(
+        baseline, current, args.threshold, dict(args.metric_threshold)
+    )
+    regressions = sorted(
+        (c for c in comparisons if c.regressed), key=lambda c: c.delta, reverse=True
+    )
+    improvements = sorted(
+        (c for c in comparisons if c.delta < -c.threshold), key=lambda c: c.delta
+    )
+    print(
+        f"compared {len(comparisons)} metrics of {len(baseline.keys() & current.keys())} tests, "
+        f"{len(baseline.keys() - current.keys())} only in the baseline, "
+        f"{len(current.keys() - baseline.keys())} only in the current run"
+    )
+    header = (
+        f"{'metric':<24}{'baseline':>11}{'current':>11}{'delta':>10}{'p95':>11}  test"
+    )
+    for title, rows in (("regressions", regressions), ("improvements", improvements)):
+        if rows:
+            print(f"\n{title} ({len(rows)}):")
+            print(header)
+            for row in rows[: args.limit]:
+                print(row.describe())
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -20,6 +20,60 @@ class EnvironmentVars:
     PLAYWRIGHT_DOWNLOAD_HOST = "PLAYWRIGHT_DOWNLOAD_HOST"
     PLAYWRIGHT_BROWSERS_PATH = "PLAYWRIGHT_BROWSERS_PATH"
     PYTEST_CURRENT_TEST = "PYTEST_CURRENT_TEST"
+    SELENIUM_REMOTE_URL = "SELENIUM_REMOTE_URL"
+
+
+@dataclass(frozen=True)
+class DriverScope:
+    FUNCTION: str = "function"
+    SESSION: str = "session"
+
+
+@dataclass(frozen=True)
+class BrowserReuse:
+    NO: str = "no"
+    WORKER: str = "worker"
+    CONTROLLER: str = "controller"
+
+
+@dataclass(frozen=True)
+class TraceMode:
+    FULL: str = "full"
+    CHUNKED: str = "chunked"
+
+
+@dataclass(frozen=True)
+class ArtifactStoreMode:
+    FLAT: str = "flat"
+    CONTENT: str = "content"
+
+
+@dataclass(frozen=True)
+class ArtifactKind:
+    SCREENSHOT: str = "screenshot"
+    TRACE: str = "trace"
+    VIDEO: str = "video"
+    OTHER: str = "other"
+
+
+@dataclass(frozen=True)
+class HarMode:
+    OFF: str = "off"
+    RECORD: str = "record"
+    REPLAY: str = "replay"
+    AUTO: str = "auto"
+
+
+@dataclass(frozen=True)
+class TracePreset:
+    FULL: str = "full"
+    LIGHT: str = "light"
+
+
+@dataclass(frozen=True)
+class DistMode:
+    NO: str = "no"
+    BROWSER: str = "browser"
 
 
 # This is a tuple, not set as order is important.
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+
+from playwright import sync_api as pwsync
+
+
+class PlaywrightDriver:
+    """A long lived playwright driver, shared by all tests in a (xdist) worker.
+
+    Entering `sync_playwright()` spawns a node driver subprocess, doing that for
+    every test is costly.  The driver is started lazily and health checked each
+    time it is handed out, if the driver process has died it is restarted.
+    """
+
+    def __init__(self: PlaywrightDriver) -> None:
+        self._playwright: pwsync.Playwright | None = None
+        self.restarts = 0
+
+    @property
+    def playwright(self: PlaywrightDriver) -> pwsync.Playwright:
+        """The running playwright instance, (re)started if necessary."""
+        if self._playwright is not None and not self.is_healthy():
+            self.stop()
+            self.restarts += 1
+        if self._playwright is None:
+            self._playwright = pwsync.sync_playwright().start()
+        return self._playwright
+
+    def is_healthy(self: PlaywrightDriver) -> bool:
+        """Returns if the driver is still alive, without a round trip to it.  The
+        event loop of the sync api is given a tick to notice the driver process
+        exiting, then its return code and the connection are checked.
+
+        These are playwright internals, should they change the driver is assumed
+        to be healthy and a dead driver fails the test using it instead."""
+        if self._playwright is None:
+            return False
+        try:
+            self._playwright._sync(asyncio.sleep(0))
+            transport = self._playwright._impl_obj._connection._transport
+            if transport.on_error_future.done():
+                # Retrieved, or asyncio warns the error was never retrieved.
+                transport.on_error_future.exception()
+                return False
+            return transport._proc.returncode is None
+        except AttributeError:
+            return True
+
+    def stop(self: PlaywrightDriver) -> None:
+        """Stop the driver, errors are swallowed if it has already died."""
+        if self._playwright is None:
+            return
+        with contextlib.suppress(pwsync.Error):
+            self._playwright.stop()
+        self._playwright = None
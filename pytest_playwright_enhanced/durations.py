@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import json
+import pathlib
+import re
+import statistics
+
+import pytest
+
+from .const import SupportedBrowsers
+
+CACHE_KEY = "pytest-playwright-enhanced/durations"
+# Weight given to the latest duration, older runs decay exponentially.
+SMOOTHING = 0.5
+# The estimate for a test when nothing at all has been recorded.
+DEFAULT_DURATION = 1.0
+_PARAMS = re.compile(r"\[(.*)\]$")
+
+
+def engine_of(nodeid: str) -> str | None:
+    """Returns the browser engine a test node id was parametrised with, if any.
+
+    :param nodeid: The test node id, e.g. `test_a.py::test_b[firefox]`.
+    """
+    match = _PARAMS.search(nodeid)
+    if match is None:
+        return None
+    return next(
+        (part for part in match.group(1).split("-") if part in SupportedBrowsers),
+        None,
+    )
+
+
+class DurationHistory:
+    """Per test durations (setup, call and teardown) recorded by previous runs,
+    persisted in the pytest cache.  Tests are keyed by node id, which includes
+    the browser engine for tests parametrised over multiple browsers.
+
+    Tests without history are estimated from the average of their engine, so
+    newly added firefox tests are weighted like other firefox tests.
+    """
+
+    def __init__(
+        self: DurationHistory, durations: dict[str, float] | None = None
+    ) -> None:
+        self.durations = durations or {}
+        self._running: dict[str, float] = {}
+        self._engine_averages: dict[str | None, float] | None = None
+        self._default: float | None = None
+
+    @classmethod
+    def load(cls: type[DurationHistory], config: pytest.Config) -> DurationHistory:
+        """Load the recorded durations, this is empty when the cache provider
+        is disabled (`-p no:cacheprovider`).
+
+        :param config: The pytest config object.
+        """
+        cache = getattr(config, "cache", None)
+        return cls(cache.get(CACHE_KEY, {}) if cache is not None else {})
+
+    @classmethod
+    def from_file(cls: type[DurationHistory], path: pathlib.Path) -> DurationHistory:
+        """Load durations shared between machines, a JSON object of node ids to
+        seconds such as the `durations` entry of the pytest cache of a full run.
+
+        :param path: The durations file.
+        """
+        try:
+            durations = json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            err = f"Unable to read the durations file {path}: {e}"
+            raise pytest.UsageError(err) from None
+        if not isinstance(durations, dict):
+            err = f"The durations file {path} must be a JSON object of node ids to seconds."
+            raise pytest.UsageError(err)
+        return cls(durations)
+
+    def save(self: DurationHistory, config: pytest.Config) -> None:
+        """Persist the recorded durations.
+
+        :param config: The pytest config object.
+        """
+        cache = getattr(config, "cache", None)
+        if cache is not None:
+            cache.set(CACHE_KEY, self.durations)
+
+    def record(self: DurationHistory, report: pytest.TestReport) -> None:
+        """Accumulate the phase durations of a test, the total is committed once
+        teardown finishes.  Skipped tests are not recorded.
+
+        :param report: The report of a single test phase.
+        """
+        if report.skipped:
+            self._running.pop(report.nodeid, None)
+            return
+        if report.when == "setup":
+            self._running[report.nodeid] = report.duration
+            return
+        if report.nodeid not in self._running:
+            return
+        self._running[report.nodeid] += report.duration
+        if report.when != "teardown":
+            return
+        duration = self._running.pop(report.nodeid)
+        previous = self.durations.get(report.nodeid)
+        if previous is not None:
+            duration = SMOOTHING * duration + (1 - SMOOTHING) * previous
+        self.durations[report.nodeid] = round(duration, 4)
+        self._engine_averages = None
+
+    def estimate(self: DurationHistory, nodeid: str) -> float:
+        """Returns the expected duration of a test in seconds.
+
+        :param nodeid: The test node id.
+        """
+        if nodeid in self.durations:
+            return self.durations[nodeid]
+        if self._engine_averages is None:
+            by_engine: dict[str | None, list[float]] = {}
+            for known, duration in self.durations.items():
+                by_engine.setdefault(engine_of(known), []).append(duration)
+            self._engine_averages = {
+                engine: statistics.fmean(durations)
+                for engine, durations in by_engine.items()
+            }
+            self._default = (
+                statistics.fmean(self.durations.values())
+                if self.durations
+                else DEFAULT_DURATION
+            )
+        return self._engine_averages.get(engine_of(nodeid), self._default)  # type: ignore[arg-type]
+
+
+class DurationRecorder:
+    """Records test durations into a `DurationHistory` and persists them at the
+    end of the session, registered as a plugin in the controller only."""
+
+    def __init__(
+        self: DurationRecorder, config: pytest.Config, history: DurationHistory
+    ) -> None:
+        self.config = config
+        self.history = history
+
+    @pytest.hookimpl
+    def pytest_runtest_logreport(
+        self: DurationRecorder, report: pytest.TestReport
+    ) -> None:
+        self.history.record(report)
+
+    @pytest.hookimpl
+    def pytest_sessionfinish(self: DurationRecorder) -> None:
+        self.history.save(self.config)
@@ -16,3 +16,19 @@ class PWEMarkerError(PlaywrightEnhancedError):
         super().__init__(
             f"`@pytest.mark.{marker}` only supports keyword args. Test({test}) used {args=}"
         )
+
+
+class BrowserServerError(PlaywrightEnhancedError):
+    """Raised when a browser server could not be launched."""
+
+    def __init__(self: BrowserServerError, engine: str, reason: str) -> None:
+        super().__init__(f"Unable to launch a {engine} browser server because {reason}")
+
+
+class RemoteBrowserError(PlaywrightEnhancedError):
+    """Raised when no remote browser endpoint could be connected to."""
+
+    def __init__(self: RemoteBrowserError, engine: str, errors: list[str]) -> None:
+        super().__init__(
+            f"Unable to connect to a remote {engine} browser, tried: {'; '.join(errors)}"
+        )
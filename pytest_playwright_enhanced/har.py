@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import hashlib
+import pathlib
+import uuid
+from dataclasses import dataclass
+
+import pytest
+from playwright import sync_api as pwsync
+from slugify import slugify
+
+from .const import HarMode
+from .utils import marker_kwargs
+
+MARKER = "pw_har"
+
+
+@dataclass(frozen=True)
+class HarPlan:
+    """How a test uses the HAR cache: replay `path` or record into it.  Recordings
+    are written to `recording` first and only replace `path` if the test passes."""
+
+    path: pathlib.Path
+    recording: pathlib.Path | None
+    url: str | None
+    not_found: str
+
+
+class HarCache:
+    """Records backend responses of tests into HAR files and replays them, so
+    tests stop waiting on slow (and changing) backends.
+
+    A HAR file belongs to a test, or is shared by every test using the same
+    `name=` in their `pw_har` marker, and is keyed on the `base_url` of the
+    context; pointing the tests at another backend records afresh.  In `auto`
+    mode a missing HAR is recorded and an existing one replayed.
+
+    :param directory: Where HAR files are kept between runs.
+    :param mode: The `--har-mode` of tests without a `pw_har(mode=...)` marker.
+    """
+
+    def __init__(self: HarCache, directory: pathlib.Path, mode: str) -> None:
+        self.directory = directory
+        self.mode = mode
+
+    def path(
+        self: HarCache, item: pytest.Item, name: str | None, base_url: str | None
+    ) -> pathlib.Path:
+        """The HAR file of a test.
+
+        :param item: The test item.
+        :param name: The shared HAR name, if any.
+        :param base_url: The base url of the context.
+        """
+        key = name or item.nodeid
+        digest = hashlib.sha256(f"{key}\0{base_url or ''}".encode()).hexdigest()
+        return self.directory / f"{slugify(name or item.name)}-{digest[:16]}.har"
+
+    def plan(self: HarCache, item: pytest.Item, base_url: str | None) -> HarPlan | None:
+        """Decide whether a test records, replays or does not use HAR at all.
+
+        :param item: The test item.
+        :param base_url: The base url of the context.
+        """
+        options = (
+            marker_kwargs(item, MARKER)
+            if item.get_closest_marker(MARKER) is not None
+            else None
+        )
+        mode = self.mode if options is None else options.get("mode", HarMode.AUTO)
+        if mode not in (HarMode.OFF, HarMode.RECORD, HarMode.REPLAY, HarMode.AUTO):
+            err = f"Unsupported pw_har mode {mode!r} on {item.nodeid}, choose record, replay or auto."
+            raise pytest.UsageError(err)
+        if mode == HarMode.OFF:
+            return None
+        options = options or {}
+        path = self.path(item, options.get("name"), base_url)
+        if mode == HarMode.REPLAY and not path.is_file():
+            pytest.fail(
+                f"No HAR recorded for {item.nodeid} at {path}, record it with --har-mode=record.",
+                pytrace=False,
+            )
+        record = mode == HarMode.RECORD or (mode == HarMode.AUTO and not path.is_file())
+        return HarPlan(
+            path=path,
+            recording=path.with_name(f".{path.stem}.{uuid.uuid4().hex}.har")
+            if record
+            else None,
+            url=options.get("url"),
+            not_found=options.get("not_found", "abort"),
+        )
+
+    def attach(self: HarCache, context: pwsync.BrowserContext, plan: HarPlan) -> None:
+        """Route the requests of a context through the HAR.
+
+        :param context: The test context.
+        :param plan: The plan of the test.
+        """
+        if plan.recording is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            context.route_from_har(
+                plan.recording, url=plan.url, update=True, update_content="embed"
+            )
+        else:
+            context.route_from_har(plan.path, url=plan.url, not_found=plan.not_found)
+
+    def finish(self: HarCache, plan: HarPlan, passed: bool) -> None:  # noqa: FBT001
+        """Keep the recording of a passing test, called once the context closed
+        and playwright wrote the HAR.
+
+        :param plan: The plan of the test.
+        :param passed: If the test passed.
+        """
+        if plan.recording is None:
+            return
+        if passed and plan.recording.is_file():
+            # Atomic, tests sharing a HAR never replay a partially written one.
+            plan.recording.replace(plan.path)
+        else:
+            plan.recording.unlink(missing_ok=True)
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import json
+import pathlib
+import shutil
+import threading
+import typing
+
+import pytest
+from playwright import sync_api as pwsync
+
+from .utils import marker_kwargs
+
+MARKER = "pw_perf_budget"
+PERF_LOG = "perf.jsonl"
+PERF_LOG_PREFIX = "perf-"
+# The metrics a `pw_perf_budget` marker can limit, a page fails its budget when
+# a metric exceeds the limit.  Metrics a browser does not report are skipped.
+BUDGET_METRICS = ("lcp_ms", "cls", "ttfb_ms", "transfer_kb")
+
+# Observes the paint, layout shift and long task entries of the top level
+# document from before it loads.  `flush` delivers entries the observers have
+# not called back with yet, so metrics are complete when collected.
+INIT_SCRIPT = """
+(() => {
+    if (window !== window.top || window.__pwePerf) return;
+    const perf = {lcp: null, cls: null, longTasks: null, longTaskMs: null, observers: []};
+    const observed = {
+        "largest-contentful-paint": [() => {}, (entry) => {
+            perf.lcp = entry.renderTime || entry.loadTime || entry.startTime;
+        }],
+        "layout-shift": [() => { perf.cls = 0; }, (entry) => {
+            if (!entry.hadRecentInput) perf.cls += entry.value;
+        }],
+        "longtask": [() => { perf.longTasks = 0; perf.longTaskMs = 0; }, (entry) => {
+            perf.longTasks += 1;
+            perf.longTaskMs += entry.duration;
+        }],
+    };
+    const supported = PerformanceObserver.supportedEntryTypes || [];
+    for (const [type, [init, handler]] of Object.entries(observed)) {
+        if (!supported.includes(type)) continue;
+        init();
+        const observer = new PerformanceObserver((list) => list.getEntries().forEach(handler));
+        observer.observe({type, buffered: true});
+        perf.observers.push([observer, handler]);
+    }
+    perf.flush = () => {
+        for (const [observer, handler] of perf.observers) observer.takeRecords().forEach(handler);
+    };
+    Object.defineProperty(window, "__pwePerf", {value: perf});
+})();
+"""
+COLLECT_SCRIPT = """
+() => {
+    const perf = window.__pwePerf;
+    if (perf) perf.flush();
+    const [nav] = performance.getEntriesByType("navigation");
+    const resources = performance.getEntriesByType("resource");
+    const transfer = resources.reduce((total, entry) => total + (entry.transferSize || 0), nav ? nav.transferSize || 0 : 0);
+    return {
+        url: location.href,
+        ttfb_ms: nav ? nav.responseStart - nav.startTime : null,
+        dom_content_loaded_ms: nav ? nav.domContentLoadedEventEnd - nav.startTime : null,
+        load_ms: nav ? nav.loadEventEnd - nav.startTime : null,
+        lcp_ms: perf ? perf.lcp : null,
+        cls: perf ? perf.cls : null,
+        long_tasks: perf ? perf.longTasks : null,
+        long_task_ms: perf ? perf.longTaskMs : null,
+        resources: resources.length,
+        transfer_kb: transfer / 1024,
+    };
+}
+"""
+
+
+def perf_budget(item: pytest.Item) -> dict[str, float]:
+    """The limits of the `pw_perf_budget` marker of a test.
+
+    :param item: The test item.
+    """
+    budget = marker_kwargs(item, MARKER)
+    unknown = sorted(set(budget) - set(BUDGET_METRICS))
+    if unknown:
+        err = f"Unsupported pw_perf_budget metric(s) {', '.join(unknown)} on {item.nodeid}, choose from {', '.join(BUDGET_METRICS)}."
+        raise pytest.UsageError(err)
+    return {metric: float(limit) for metric, limit in budget.items()}
+
+
+def over_budget(metrics: dict[str, typing.Any], budget: dict[str, float]) -> list[str]:
+    """Describe each metric of a page exceeding its budget.
+
+    :param metrics: The metrics of a page.
+    :param budget: The limit of each metric.
+    """
+    return [
+        f"{metric} {metrics[metric]:.4g} > {limit:g} on {metrics['url']}"
+        for metric, limit in budget.items()
+        if metrics.get(metric) is not None and metrics[metric] > limit
+    ]
+
+
+class PerfMonitor:
+    """The `pw_perf` fixture, collecting the Navigation Timing, largest
+    contentful paint, cumulative layout shift, long tasks and transferred bytes
+    of the pages of a test context.  Every page still open when the test body
+    finishes is measured, logged and checked against the budget of the test.
+
+    :param context: The test context, observed by `INIT_SCRIPT`.
+    :param budget: The limit of each metric.
+    """
+
+    def __init__(
+        self: PerfMonitor, context: pwsync.BrowserContext, budget: dict[str, float]
+    ) -> None:
+        self.context = context
+        self.budget = budget
+
+    @classmethod
+    def install(
+        cls: type[PerfMonitor], context: pwsync.BrowserContext, item: pytest.Item
+    ) -> PerfMonitor:
+        """Observe the pages of a new test context and stash the monitor on the
+        test, the context must not be reused as init scripts cannot be removed.
+
+        :param context: The test context.
+        :param item: The test item, its `pw_perf_budget` marker is the budget.
+        """
+        context.add_init_script(INIT_SCRIPT)
+        monitor = item.stash[PerfMonitorKey] = cls(context, perf_budget(item))
+        return monitor
+
+    def collect(self: PerfMonitor, page: pwsync.Page) -> dict[str, typing.Any]:
+        """The current metrics of a page, timings are in milliseconds since
+        the navigation started.
+
+        :param page: A page of the test context.
+        """
+        return page.evaluate(COLLECT_SCRIPT)
+
+    def collect_all(self: PerfMonitor) -> list[dict[str, typing.Any]]:
+        """The metrics of every open page which navigated somewhere, with the
+        engine of the browser so runs can be compared per engine."""
+        browser = self.context.browser
+        engine = browser.browser_type.name if browser is not None else None
+        collected = []
+        for page in self.context.pages:
+            if page.is_closed() or page.url == "about:blank":
+                continue
+            try:
+                collected.append({"engine": engine, **self.collect(page)})
+            except pwsync.Error:
+                continue
+        return collected
+
+
+class PerfLog:
+    """Appends the metrics of each page to `perf-<worker>.jsonl` in the artifacts
+    directory, merged into `perf.jsonl` by the controller.
+
+    :param root: The artifacts directory.
+    :param worker: The xdist worker id, or `main`.
+    """
+
+    def __init__(self: PerfLog, root: pathlib.Path, worker: str) -> None:
+        self.path = root / f"{PERF_LOG_PREFIX}{worker}.jsonl"
+        self._lock = threading.Lock()
+
+    def write(self: PerfLog, nodeid: str, pages: list[dict[str, typing.Any]]) -> None:
+        """Log the metrics of the pages of a test.
+
+        :param nodeid: The node id of the test.
+        :param pages: The metrics of each page.
+        """
+        with self._lock, self.path.open("a") as f:
+            for page, metrics in enumerate(pages):
+                f.write(json.dumps({"nodeid": nodeid, "page": page, **metrics}) + "\n")
+
+
+def merge_perf_logs(root: pathlib.Path) -> pathlib.Path | None:
+    """Merge the per worker logs into `perf.jsonl`, returning its path or `None`
+    if nothing was measured.  Called by the controller once every worker has
+    finished.
+
+    :param root: The artifacts directory.
+    """
+    parts = sorted(root.glob(f"{PERF_LOG_PREFIX}*.jsonl"))
+    if not parts:
+        return None
+    merged = root / PERF_LOG
+    with merged.open("a") as out:
+        for part in parts:
+            with part.open() as f:
+                shutil.copyfileobj(f, out)
+            part.unlink()
+    return merged
+
+
+PerfMonitorKey = pytest.StashKey[PerfMonitor]()
+PerfLogKey = pytest.StashKey[PerfLog]()
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import concurrent.futures
 import os
 import pathlib
 import shutil
 import subprocess
 import sys
+import tempfile
+import time
 import typing
+import warnings
 
 import pytest
 from playwright import sync_api as pwsync
@@ -13,27 +17,98 @@ from playwright._impl._driver import get_driver_env
 from slugify import slugify
 from xdist.workermanage import WorkerController
 
+# pytest has no public API to run the protocol of an item, `--record-on-retry`
+# is refused when it is gone.
+try:
+    from _pytest.runner import runtestprotocol
+except ImportError:  # pragma: no cover
+    runtestprotocol = None  # type: ignore[assignment]
+
+if typing.TYPE_CHECKING:
+    from execnet.gateway_base import Producer
+
 from .actions import VideoAction
+from .artifacts import STAGING_DIR
+from .artifacts import ArtifactStore
+from .artifacts import ArtifactWriter
+from .artifacts import merge_manifests
+from .artifacts import parse_size
+from .artifacts import retire_artifacts_dir
+from .asset_cache import AssetCache
+from .blocking import ResourceBlocker
+from .blocking import parse_block_resources
 from .browser_strategy import BROWSER_FACTORY
+from .budget import ArtifactBudget
+from .budget import parse_kind_size
+from .budget import skipped_artifacts
+from .const import ArtifactStoreMode
 from .const import BrowserEngine
+from .const import BrowserReuse
+from .const import DistMode
+from .const import DriverScope
 from .const import EnvironmentVars
 from .const import FixtureScope
+from .const import HarMode
 from .const import SupportedBrowsers
+from .const import TraceMode
+from .const import TracePreset
+from .driver import PlaywrightDriver
+from .durations import DurationHistory
+from .durations import DurationRecorder
+from .exceptions import BrowserServerError
+from .exceptions import RemoteBrowserError
+from .har import HarCache
+from .har import HarPlan
+from .perf import MARKER as PERF_MARKER
+from .perf import PerfLog
+from .perf import PerfLogKey
+from .perf import PerfMonitor
+from .perf import PerfMonitorKey
+from .perf import merge_perf_logs
+from .perf import over_budget
+from .pool import BrowserPool
+from .pool import ContextPool
+from .profiler import REPORT_ATTRIBUTE as ACTIONS_REPORT_ATTRIBUTE
+from .profiler import ActionProfile
+from .profiler import ActionProfileKey
+from .profiler import ActionProfileReport
+from .profiler import ActionProxy
+from .profiler import unwrap
+from .remote import RemoteBrowserBackend
+from .resolution import LaunchConfig
+from .resolution import get_resolver
+from .scheduler import BrowserAffinityScheduling
+from .scheduler import affinity_file
+from .scheduler import write_browser_groups
+from .screenshots import store_screenshots
+from .server import DEFAULT_LAUNCH_TIMEOUT
+from .server import BrowserServer
+from .sharding import parse_shard
+from .sharding import shard_items
+from .timeline import Timeline
+from .timeline import TimelineKey
+from .timeline import merge_timelines
+from .timings import REPORT_ATTRIBUTE
+from .timings import TimingsKey
+from .timings import TimingsReport
+from .timings import record_timing
+from .tracing import TraceRecorder
 from .types import ContextKwargs
 from .utils import check_engine
+from .utils import conflicting_rerun_options
 from .utils import get_artifacts_dir_from_node
+from .utils import get_browser_servers_from_node
 from .utils import is_master_worker
-from .utils import parse_browser_kwargs_from_node
-from .utils import parse_context_kwargs_from_node
+from .utils import pooled_engines
 from .utils import register_env_defer
-from .utils import resolve_browser_cli_flag_defaults
-from .utils import resolve_context_cli_flag_defaults
+from .utils import reset_fixture_request
 from .utils import safe_to_run_plugin
 from .utils import test_was_not_skipped_and_passed
+from .warmup import BrowserWarmup
 
 
 @pytest.hookimpl
-def pytest_addoption(parser: pytest.Parser) -> None:
+def pytest_addoption(parser: pytest.Parser) -> None:  # noqa: PLR0915
     """Register argparse-style options and ini-style configuration values
     for the plugin.
     """
@@ -96,6 +171,118 @@ def pytest_addoption(parser: pytest.Parser) -> None:
         dest="artifacts",
         help="The folder name where various artifacts are stored",
     )
+    pwe.addoption(
+        "--block-resources",
+        action="store",
+        type=parse_block_resources,
+        default=(),
+        dest="block_resources",
+        metavar="PROFILES",
+        help=(
+            "Abort requests tests do not need, a comma separated list of images, fonts, media, \n\n"
+            "stylesheets and analytics (well known third party analytics).  Off by default."
+        ),
+    )
+    pwe.addoption(
+        "--asset-cache",
+        action="store_true",
+        default=False,
+        dest="asset_cache",
+        help=(
+            "Serve static assets (scripts, stylesheets, fonts and images) cacheable per their \n\n"
+            "Cache-Control max-age from an on disk cache shared by every test and xdist worker."
+        ),
+    )
+    pwe.addoption(
+        "--asset-cache-dir",
+        action="store",
+        default=".pw-asset-cache",
+        dest="asset_cache_dir",
+        help="The directory of the asset cache, relative to the rootdir.",
+    )
+    pwe.addoption(
+        "--asset-cache-size",
+        action="store",
+        type=parse_size,
+        default="256M",
+        dest="asset_cache_size",
+        metavar="SIZE",
+        help="The size of the asset cache, least recently used assets are evicted beyond it.",
+    )
+    pwe.addoption(
+        "--har-mode",
+        action="store",
+        choices=(HarMode.OFF, HarMode.RECORD, HarMode.REPLAY, HarMode.AUTO),
+        default=HarMode.OFF,
+        dest="har_mode",
+        help=(
+            "Record backend responses of tests into HAR files or replay them, `auto` records \n\n"
+            "missing HAR files and replays existing ones.  `@pytest.mark.pw_har` overrides it."
+        ),
+    )
+    pwe.addoption(
+        "--har-dir",
+        action="store",
+        default=".pw-har",
+        dest="har_dir",
+        help="The directory HAR files are kept in between runs, relative to the rootdir.",
+    )
+    pwe.addoption(
+        "--artifacts-keep-runs",
+        action="store",
+        type=int,
+        default=0,
+        dest="artifacts_keep_runs",
+        help=(
+            "Keep the artifacts of this many previous runs, renamed to `<artifacts>.<timestamp>`. \n\n"
+            "The oldest runs are deleted first.  Off by default."
+        ),
+    )
+    pwe.addoption(
+        "--artifacts-keep-size",
+        action="store",
+        type=parse_size,
+        default=None,
+        dest="artifacts_keep_size",
+        metavar="SIZE",
+        help=(
+            "The total size the artifacts of kept previous runs may take, e.g. `2G`.  The oldest \n\n"
+            "runs beyond it are deleted."
+        ),
+    )
+    pwe.addoption(
+        "--artifacts-max-bytes",
+        action="store",
+        type=parse_size,
+        default=None,
+        dest="artifacts_max_bytes",
+        metavar="SIZE",
+        help=(
+            "The total size of the artifacts of the run, across xdist workers.  As it fills up \n\n"
+            "videos are dropped first, then traces, keeping the remainder for screenshots."
+        ),
+    )
+    pwe.addoption(
+        "--artifacts-max-test-bytes",
+        action="store",
+        type=parse_size,
+        default=None,
+        dest="artifacts_max_test_bytes",
+        metavar="SIZE",
+        help="The total size of the artifacts of a single test.",
+    )
+    pwe.addoption(
+        "--artifacts-max-type-bytes",
+        action="append",
+        type=parse_kind_size,
+        default=[],
+        dest="artifacts_max_type_bytes",
+        metavar="KIND=SIZE",
+        help=(
+            "The total size of one kind of artifact (screenshot, trace or video) for the run, \n\n"
+            "e.g. `video=1G`.  Can be given once per kind."
+        ),
+    )
     pwe.addoption(
         "--screenshots-on-fail",
         action="store",
@@ -109,7 +296,37 @@ def pytest_addoption(parser: pytest.Parser) -> None:
         action="store",
         default=30_000,
         dest="screenshot_timeout",
-        help="The timeout in milliseconds for page screenshots to be captured when failing.",
+        help=(
+            "The timeout in milliseconds for page screenshots to be captured when failing.  The \n\n"
+            "pages of a test are captured concurrently, sharing the timeout."
+        ),
+    )
+    pwe.addoption(
+        "--screenshot-format",
+        action="store",
+        choices=("png", "jpeg"),
+        default="png",
+        dest="screenshot_format",
+        help="The image format of failure screenshots, `jpeg` is smaller and faster to encode.",
+    )
+    pwe.addoption(
+        "--screenshot-quality",
+        action="store",
+        type=int,
+        default=None,
+        dest="screenshot_quality",
+        help="The quality (0-100) of jpeg failure screenshots.",
+    )
+    pwe.addoption(
+        "--screenshot-scale",
+        action="store",
+        choices=("css", "device"),
+        default="device",
+        dest="screenshot_scale",
+        help=(
+            "`css` captures a single pixel per css pixel, keeping screenshots of high dpi \n\n"
+            "devices small.  Defaults to `device`."
+        ),
     )
     pwe.addoption(
         "--video-on-fail",
@@ -125,12 +342,80 @@ def pytest_addoption(parser: pytest.Parser) -> None:
         dest="trace_on_fail",
         help="Retain captured trace in the artifacts directory if a test fails.",
     )
+    pwe.addoption(
+        "--record-on-retry",
+        action="store_true",
+        default=False,
+        dest="record_on_retry",
+        help=(
+            "Run tests without video, tracing or screenshots and re-run failed tests once in a fresh \n\n"
+            "context with all of them on, only the artifacts of the re-run are kept.  Runs the protocol of \n\n"
+            "browser tests itself, so cannot be combined with `--reruns` or `--flake-finder`."
+        ),
+    )
+    pwe.addoption(
+        "--trace-mode",
+        action="store",
+        default=TraceMode.FULL,
+        dest="trace_mode",
+        choices=(TraceMode.FULL, TraceMode.CHUNKED),
+        help=(
+            "How `--trace-on-fail` records traces.  `full` starts and stops tracing for every test, \n\n"
+            "`chunked` starts tracing once per context and records a chunk per test, this allows \n\n"
+            "traced contexts to be recycled with `--context-reuse`."
+        ),
+    )
+    pwe.addoption(
+        "--trace-preset",
+        action="store",
+        default=TracePreset.FULL,
+        dest="trace_preset",
+        choices=(TracePreset.FULL, TracePreset.LIGHT),
+        help="What traces capture.  `light` skips sources and screenshots, keeping DOM snapshots.",
+    )
+    pwe.addoption(
+        "--trace-sample-rate",
+        action="store",
+        type=float,
+        default=1.0,
+        dest="trace_sample_rate",
+        help="The fraction (0.0 - 1.0) of tests to trace, sampled deterministically by test id.",
+    )
+    pwe.addoption(
+        "--trace-ring-size",
+        action="store",
+        type=int,
+        default=0,
+        dest="trace_ring_size",
+        help=(
+            "Keep the traces of this many of the most recent passing tests, these are written \n\n"
+            "alongside the trace of the next failing test.  Off by default."
+        ),
+    )
     pwe.addoption(
         "--selenium-grid",
         action="store",
         default=None,
         dest="selenium_grid",
-        help="The selenium grid endpoint to distribute tests remotely (experimental)",
+        help="The selenium grid endpoint chromium browsers are launched on (experimental)",
+    )
+    pwe.addoption(
+        "--remote-browser",
+        action="append",
+        default=[],
+        dest="remote_browser",
+        help=(
+            "A remote browser endpoint, can be given multiple times to spread load.  `ws://` endpoints \n\n"
+            "are playwright servers, `http://` endpoints are chromium CDP.  Implies `--browser-reuse=worker`."
+        ),
+    )
+    pwe.addoption(
+        "--remote-browser-retries",
+        action="store",
+        type=int,
+        default=3,
+        dest="remote_browser_retries",
+        help="How many times to retry connecting across all remote browser endpoints after the first attempt, 0 disables retries.",
     )
     pwe.addoption(
         "--download-host",
@@ -199,6 +484,170 @@ def pytest_addoption(parser: pytest.Parser) -> None:
         dest="chromium_sandbox",
         help="Enable chromium sandboxing for chromium engine only.  defaults Off.",
     )
+    pwe.addoption(
+        "--browser-reuse",
+        action="store",
+        dest="browser_reuse",
+        default=BrowserReuse.NO,
+        choices=(BrowserReuse.NO, BrowserReuse.WORKER, BrowserReuse.CONTROLLER),
+        help=(
+            "Share launched browsers between tests.  `worker` pools browsers per (xdist) worker \n\n"
+            "keyed by their launch kwargs.  `controller` launches one browser server per engine in the \n\n"
+            "controller process which all workers connect to.  Tests using `browser_kwargs` markers \n\n"
+            "always get a dedicated browser."
+        ),
+    )
+    pwe.addoption(
+        "--context-reuse",
+        action="store_true",
+        default=False,
+        dest="context_reuse",
+        help=(
+            "Recycle browser contexts between tests, resetting their state in between.  Implies \n\n"
+            "`--browser-reuse=worker`.  Contexts recording video or full traces are never \n\n"
+            "recycled, traced contexts are with `--trace-mode=chunked`."
+        ),
+    )
+    pwe.addoption(
+        "--prelaunch-browsers",
+        action="store_true",
+        default=False,
+        dest="prelaunch_browsers",
+        help=(
+            "Launch the browsers the collected tests need on background threads while collection \n\n"
+            "finishes.  Implies `--browser-reuse=worker`."
+        ),
+    )
+    pwe.addoption(
+        "--pw-server-timeout",
+        action="store",
+        type=float,
+        default=DEFAULT_LAUNCH_TIMEOUT,
+        dest="pw_server_timeout",
+        help=(
+            "Seconds a browser server launched by `--browser-reuse=controller` or \n\n"
+            "`--prelaunch-browsers` has to start, before it is killed and browsers are launched by the workers."
+        ),
+    )
+    pwe.addoption(
+        "--pw-dist",
+        action="store",
+        dest="pw_dist",
+        default=DistMode.NO,
+        choices=(DistMode.NO, DistMode.BROWSER),
+        help=(
+            "Distribute tests across xdist workers by browser affinity.  `browser` groups tests by \n\n"
+            "engine and `browser_kwargs`/`context_kwargs` markers and keeps each group on as few \n\n"
+            "workers as possible, so pooled browsers are reused.  Overrides `--dist`."
+        ),
+    )
+    pwe.addoption(
+        "--duration-order",
+        action="store_true",
+        default=False,
+        dest="duration_order",
+        help=(
+            "Run the slowest tests first, using the durations recorded by previous runs in the \n\n"
+            "pytest cache.  Tests without history are estimated from tests of the same engine."
+        ),
+    )
+    pwe.addoption(
+        "--pw-timings",
+        action="store_true",
+        default=False,
+        dest="pw_timings",
+        help=(
+            "Time the playwright, browser, context and page setup and teardown of every test and \n\n"
+            "summarise them, across xdist workers, at the end of the run."
+        ),
+    )
+    pwe.addoption(
+        "--pw-timings-json",
+        action="store",
+        default=None,
+        dest="pw_timings_json",
+        metavar="PATH",
+        help="Write the per test lifecycle timings and their summary to a JSON file.",
+    )
+    pwe.addoption(
+        "--pw-profile-actions",
+        action="store_true",
+        default=False,
+        dest="pw_profile_actions",
+        help=(
+            "Time every call of tests on the pages, locators and contexts of the playwright \n\n"
+            "fixtures and summarise the slowest actions and selectors at the end of the run."
+        ),
+    )
+    pwe.addoption(
+        "--pw-timeline",
+        action="store",
+        default=None,
+        dest="pw_timeline",
+        metavar="PATH",
+        help=(
+            "Write a Chrome Trace Event Format timeline of fixture and test phases and artifact \n\n"
+            "writes, one track per xdist worker, to open in Perfetto or chrome://tracing."
+        ),
+    )
+    pwe.addoption(
+        "--pw-shard",
+        action="store",
+        dest="pw_shard",
+        default=None,
+        type=parse_shard,
+        metavar="INDEX/TOTAL",
+        help=(
+            "Only run shard INDEX (1 based) of TOTAL, e.g. `--pw-shard=2/8`.  Shards are deterministic and \n\n"
+            "balanced by test counts (or `--pw-shard-durations`), tests sharing a browser configuration \n\n"
+            "are kept together."
+        ),
+    )
+    pwe.addoption(
+        "--pw-shard-durations",
+        action="store",
+        dest="pw_shard_durations",
+        default=None,
+        metavar="PATH",
+        help=(
+            "A JSON file of node ids to durations in seconds balancing `--pw-shard`, every shard \n\n"
+            "must be given the same file.  Shards are balanced by test counts without it."
+        ),
+    )
+    pwe.addoption(
+        "--artifact-threads",
+        action="store",
+        type=int,
+        default=2,
+        dest="artifact_threads",
+        help=(
+            "The number of background threads writing screenshots and videos, so test teardown \n\n"
+            "does not wait on the file system.  `0` writes them inline."
+        ),
+    )
+    pwe.addoption(
+        "--artifact-store",
+        action="store",
+        choices=(ArtifactStoreMode.FLAT, ArtifactStoreMode.CONTENT),
+        default=ArtifactStoreMode.FLAT,
+        dest="artifact_store",
+        help=(
+            "How artifacts are named, `flat` names them after the test.  `content` names them \n\n"
+            "by the sha256 of their content so identical artifacts are only written once, \n\n"
+            "`manifest.jsonl` maps node ids to their artifacts either way."
+        ),
+    )
+    pwe.addoption(
+        "--driver-scope",
+        action="store",
+        dest="driver_scope",
+        default=DriverScope.FUNCTION,
+        choices=(DriverScope.FUNCTION, DriverScope.SESSION),
+        help=(
+            "How long the playwright driver process lives.  `session` keeps one driver per (xdist) worker \n\n"
+            "and restarts it if it dies.  Implied by `--browser-reuse=worker`."
+        ),
+    )
     # Todo: Proxy settings?
 
 
@@ -216,16 +665,69 @@ def pytest_configure(config: pytest.Config) -> None:
     if not safe_to_run_plugin(config):
         return
 
+    resolve_options(config)
+
+    config.stash[ArtifactWriterKey] = ArtifactWriter(config.option.artifact_threads)
+    config.stash[DurationHistoryKey] = DurationHistory.load(config)
+    # Under xdist the controller receives the reports of every worker.
+    if is_master_worker(config):
+        register_reports(config)
+    if config.option.pw_timeline:
+        timeline = Timeline(
+            config.rootpath / config.option.pw_timeline,
+            getattr(config, "workerinput", {}).get("workerid", "main"),
+        )
+        config.stash[TimelineKey] = timeline
+        config.stash[ArtifactWriterKey].timeline = timeline
+        config.pluginmanager.register(timeline, "pwe-timeline")
+
     # Handle propagating a single artifacts dir even when multiple xdist
     # workers are in the mix.
     if is_master_worker(config):
         artifacts_dir: pathlib.Path = config.rootpath / config.option.artifacts
-        if artifacts_dir.is_dir():
-            shutil.rmtree(artifacts_dir)
+        # The previous results are deleted in the background while tests run.
+        cleanup = retire_artifacts_dir(
+            artifacts_dir,
+            keep_runs=config.option.artifacts_keep_runs,
+            max_bytes=config.option.artifacts_keep_size,
+        )
+        config.add_cleanup(cleanup.join)
         artifacts_dir.mkdir()
         # We have to convert the path to a string otherwise it is not serializable
         # across xdist worker processes.
         config.artifacts_dir = str(artifacts_dir)
+        if config.option.pw_dist == DistMode.BROWSER:
+            # Workers report the browser group of each test here, the
+            # controller only sees node ids.
+            affinity_dir = tempfile.mkdtemp(prefix="pwe-affinity-")
+            config.add_cleanup(lambda: shutil.rmtree(affinity_dir, ignore_errors=True))
+            config.affinity_dir = affinity_dir
+
+    config.stash[ArtifactStoreKey] = create_artifact_store(config)
+    config.stash[PerfLogKey] = PerfLog(
+        config.stash[ArtifactStoreKey].root,
+        getattr(config, "workerinput", {}).get("workerid", "main"),
+    )
+    config.stash[ResourceBlockerKey] = ResourceBlocker.from_profiles(
+        config.option.block_resources
+    )
+    if config.option.asset_cache:
+        config.stash[AssetCacheKey] = AssetCache(
+            config.rootpath / config.option.asset_cache_dir,
+            config.option.asset_cache_size,
+        )
+    config.stash[HarCacheKey] = HarCache(
+        config.rootpath / config.option.har_dir, config.option.har_mode
+    )
+    if config.option.trace_on_fail or config.option.record_on_retry:
+        config.stash[TraceRecorderKey] = TraceRecorder(
+            config.stash[ArtifactStoreKey],
+            mode=config.option.trace_mode,
+            preset=config.option.trace_preset,
+            sample_rate=config.option.trace_sample_rate,
+            ring_size=config.option.trace_ring_size,
+            screenshots=config.option.screenshots_on_fail != "no",
+        )
 
     # Avoid spurious warnings by registering plugin specific markers.
     config.addinivalue_line(
@@ -239,16 +741,270 @@ def pytest_configure(config: pytest.Config) -> None:
         "markers",
         "browser_kwargs: provide additional arguments for new playwright browsers.",
     )
+    config.addinivalue_line(
+        "markers",
+        "pw_har(mode, name, url, not_found): record or replay backend responses in a HAR file.",
+    )
+    config.addinivalue_line(
+        "markers",
+        "pw_block(patterns, resources): abort requests matching url globs or resource types.",
+    )
+    config.addinivalue_line(
+        "markers",
+        "pw_perf_budget(lcp_ms, cls, ttfb_ms, transfer_kb): fail a test whose pages exceed performance budgets.",
+    )
     # conditionally invoke the acquire binaries hook.
     if config.option.acquire_drivers != "no":
         _ = config.hook.pytest_playwright_acquire_binaries(config=config)
     prepare_environment(config)
 
+    if (
+        is_master_worker(config)
+        and config.option.browser_reuse == BrowserReuse.CONTROLLER
+    ):
+        start_browser_servers(config)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_finish(session: pytest.Session) -> None:
+    """Report the browser group of each collected test for the browser affinity
+    scheduler, this runs before xdist tells the controller collection finished.
+
+    Begin launching the browsers required by the collected tests in the
+    background when `--prelaunch-browsers` is enabled.  Only the launch
+    configurations which will be pooled are prelaunched."""
+    config = session.config
+    if not safe_to_run_plugin(config):
+        return
+    if (path := affinity_file(config)) is not None:
+        write_browser_groups(session.items, path)
+    if not config.option.prelaunch_browsers:
+        return
+    warmup = BrowserWarmup(config.option.pw_server_timeout)
+    config.stash[WarmupKey] = warmup
+    config.add_cleanup(warmup.close)
+    for engine in pooled_engines(session.items):
+        warmup.start(get_resolver(config).browser_defaults(engine))
+
 
 @pytest.hookimpl
 def pytest_configure_node(node: WorkerController) -> None:
-    """Prepare the xdist workers with the artifacts dir availability."""
+    """Prepare the xdist workers with the artifacts dir availability and
+    the endpoints of any browser servers shared by the controller."""
     node.workerinput["artifacts_dir"] = node.config.artifacts_dir
+    node.workerinput["browser_servers"] = getattr(node.config, "browser_servers", [])
+    node.workerinput["affinity_dir"] = getattr(node.config, "affinity_dir", None)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_xdist_make_scheduler(
+    config: pytest.Config, log: Producer
+) -> BrowserAffinityScheduling | None:
+    """Swap in the browser affinity scheduler when `--pw-dist=browser`."""
+    if config.option.pw_dist != DistMode.BROWSER:
+        return None
+    return BrowserAffinityScheduling(
+        config, log, config.stash.get(DurationHistoryKey, None)
+    )
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(
+    config: pytest.Config, items: list[pytest.Item]
+) -> None:
+    """Select this machine's shard of the tests when `--pw-shard` is given.
+
+    Order the tests longest first when `--duration-order` is enabled, so a
+    slow test is not scheduled last and stretch the run."""
+    history = config.stash.get(DurationHistoryKey, None)
+    if config.option.pw_shard is not None:
+        # Every machine has to compute the same partition, the local history
+        # of each machine differs so only an explicitly shared one is used.
+        shared = (
+            DurationHistory.from_file(
+                config.rootpath / config.option.pw_shard_durations
+            )
+            if config.option.pw_shard_durations
+            else None
+        )
+        selected, deselected = shard_items(items, *config.option.pw_shard, shared)
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+    if history is None or not config.option.duration_order:
+        return
+    # sort is stable, tests with equal estimates keep their collection order.
+    items.sort(key=lambda item: history.estimate(item.nodeid), reverse=True)
+
+
+@pytest.hookimpl
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    """Wait for artifacts still being written in the background, failed writes
+    are warned about.  The controller then merges the artifact manifests of
+    every worker, which have all finished by now."""
+    writer = session.config.stash.get(ArtifactWriterKey, None)
+    if writer is None:
+        return
+    for error in writer.close():
+        warnings.warn(
+            pytest.PytestWarning(f"Failed to write artifact: {error}"), stacklevel=1
+        )
+    if (recorder := session.config.stash.get(TraceRecorderKey, None)) is not None:
+        recorder.close()
+    timeline = session.config.stash.get(TimelineKey, None)
+    if timeline is not None:
+        timeline.close()
+    if not is_master_worker(session.config):
+        return
+    if timeline is not None:
+        merge_timelines(timeline.path)
+    store = session.config.stash[ArtifactStoreKey]
+    merge_perf_logs(store.root)
+    manifest = merge_manifests(store.root)
+    if manifest is not None and store.budget is not None:
+        session.config.stash[SkippedArtifactsKey] = skipped_artifacts(manifest)
+
+
+@pytest.hookimpl
+def pytest_terminal_summary(
+    terminalreporter: pytest.TerminalReporter, config: pytest.Config
+) -> None:
+    """Report the artifacts which were not stored as they exceeded a budget."""
+    skipped = config.stash.get(SkippedArtifactsKey, None)
+    if not skipped:
+        return
+    terminalreporter.write_sep("-", "playwright artifacts over budget")
+    for (kind, reason), (count, size) in sorted(skipped.items()):
+        terminalreporter.write_line(
+            f"skipped {count} {kind} artifact(s), {size / 1024**2:.1f} MiB, exceeding the {reason}"
+        )
+
+
+def register_reports(config: pytest.Config) -> None:
+    """Register the plugins of the controller aggregating the reports of every
+    test: the duration history, `--pw-timings` and `--pw-profile-actions`.
+
+    :param config: The pytest.Config object.
+    """
+    option = config.option
+    config.pluginmanager.register(
+        DurationRecorder(config, config.stash[DurationHistoryKey]), "pwe-durations"
+    )
+    if option.pw_timings or option.pw_timings_json:
+        config.pluginmanager.register(
+            TimingsReport(
+                terminal=option.pw_timings,
+                path=config.rootpath / option.pw_timings_json
+                if option.pw_timings_json
+                else None,
+            ),
+            "pwe-timings",
+        )
+    if option.pw_profile_actions:
+        config.pluginmanager.register(ActionProfileReport(), "pwe-actions")
+
+
+def create_artifact_store(config: pytest.Config) -> ArtifactStore:
+    """Create the artifact store of this process, writing into the artifacts
+    directory shared by every xdist worker.
+
+    :param config: The pytest.Config object.
+    """
+    option = config.option
+    root = pathlib.Path(get_artifacts_dir_from_node(config))
+    budget = None
+    if (
+        option.artifacts_max_bytes is not None
+        or option.artifacts_max_test_bytes is not None
+        or option.artifacts_max_type_bytes
+    ):
+        budget = ArtifactBudget(
+            root / STAGING_DIR,
+            max_bytes=option.artifacts_max_bytes,
+            max_test_bytes=option.artifacts_max_test_bytes,
+            max_kind_bytes=dict(option.artifacts_max_type_bytes),
+        )
+    return ArtifactStore(
+        root,
+        config.stash[ArtifactWriterKey],
+        worker=getattr(config, "workerinput", {}).get("workerid", "main"),
+        content_addressed=option.artifact_store == ArtifactStoreMode.CONTENT,
+        budget=budget,
+    )
+
+
+def start_browser_servers(config: pytest.Config) -> None:
+    """Launch one browser server per engine in the controller process, workers
+    connect to these rather than launching browsers of their own.  Engines are
+    launched in parallel, an engine which fails to launch is warned about and
+    workers fall back to launching it themselves.
+
+    :param config: The pytest.Config object.
+    """
+    engines = tuple(config.option.browser) or (BrowserEngine.CHROMIUM,)
+    resolver = get_resolver(config)
+    launch_configs = {engine: resolver.browser_defaults(engine) for engine in engines}
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        futures = {
+            engine: executor.submit(
+                BrowserServer.launch,
+                engine,
+                launch.as_kwargs(),
+                config.option.pw_server_timeout,
+            )
+            for engine, launch in launch_configs.items()
+        }
+    # Lists rather than tuples, so they serialize across xdist worker processes.
+    config.browser_servers = []
+    for engine, future in futures.items():
+        try:
+            server = future.result()
+        except BrowserServerError as err:
+            config.issue_config_time_warning(pytest.PytestWarning(str(err)), 2)
+            continue
+        config.add_cleanup(server.close)
+        config.browser_servers.append([*launch_configs[engine].key, server.ws_endpoint])
+
+
+def resolve_options(config: pytest.Config) -> None:
+    """Validate the command line options, and enable the options implied by
+    others.
+
+    :param config: The pytest.Config object.
+    """
+    quality = config.option.screenshot_quality
+    if quality is not None and (
+        config.option.screenshot_format != "jpeg" or not 0 <= quality <= 100  # noqa: PLR2004
+    ):
+        err = "--screenshot-quality must be between 0 and 100 and requires --screenshot-format=jpeg."
+        raise pytest.UsageError(err)
+    if config.option.remote_browser_retries < 0:
+        err = "--remote-browser-retries must not be negative."
+        raise pytest.UsageError(err)
+
+    # `--record-on-retry` takes over the runtest protocol of browser tests, other
+    # plugins re-running tests would silently never run.
+    if config.option.record_on_retry:
+        if conflicting := conflicting_rerun_options(config):
+            err = f"--record-on-retry runs the protocol of browser tests itself and cannot be combined with {', '.join(conflicting)}."
+            raise pytest.UsageError(err)
+        if runtestprotocol is None:
+            err = "--record-on-retry is not supported by this version of pytest."
+            raise pytest.UsageError(err)
+
+    if config.option.context_reuse and not ContextPool.supported():
+        warning = "--context-reuse requires a playwright version with BrowserContext.set_storage_state, contexts are not recycled."
+        config.issue_config_time_warning(pytest.PytestWarning(warning), 2)
+        config.option.context_reuse = False
+
+    # Recycled contexts belong to a browser, that browser has to outlive the test.
+    # Prelaunched browsers are only useful if tests share them.
+    # Remote connections are pooled to avoid connecting for every test.
+    if config.option.browser_reuse == BrowserReuse.NO and (
+        config.option.context_reuse
+        or config.option.prelaunch_browsers
+        or config.option.remote_browser
+    ):
+        config.option.browser_reuse = BrowserReuse.WORKER
 
 
 def prepare_environment(config: pytest.Config) -> None:
@@ -266,6 +1022,9 @@ def prepare_environment(config: pytest.Config) -> None:
             EnvironmentVars.PLAYWRIGHT_DOWNLOAD_HOST, driver_download_host, config
         )
 
+    if (selenium_grid := config.option.selenium_grid) is not None:
+        register_env_defer(EnvironmentVars.SELENIUM_REMOTE_URL, selenium_grid, config)
+
     if (driver_path := config.option.driver_path) is not None:
         register_env_defer(
             EnvironmentVars.PLAYWRIGHT_BROWSERS_PATH, driver_path, config
@@ -404,19 +1163,93 @@ def pw_slow_mo(request: pytest.FixtureRequest, pytestconfig: pytest.Config) -> i
     """Returns the global slow_mofor all actions, defaults to `0`."""
     # We need to inspect the context_kwargs for all overridable things
     # to yield a correct per-test value.
-    return parse_browser_kwargs_from_node(request.node, {}).get(
-        "slow_mo", pytestconfig.option.slow_mo
+    return (
+        get_resolver(pytestconfig)
+        .browser_overrides(request.node)
+        .get("slow_mo", pytestconfig.option.slow_mo)
     )
 
 
 @pytest.fixture(scope=FixtureScope.Function)
-def pw_playwright() -> typing.Generator[pwsync.Playwright, None, None]:
+def pw_playwright(
+    request: pytest.FixtureRequest,
+    pw_driver: PlaywrightDriver | None,
+) -> typing.Generator[pwsync.Playwright, None, None]:
     """Launch the core playwright context manager, at present only a
     synchronous path is supported however the plan is to add asynchronous
     support in future.
+
+    When running with a session scoped driver, the (health checked) long lived
+    driver for the worker is returned instead of launching a new one.
     """
+    if pw_driver is not None:
+        yield pw_driver.playwright
+        return
+    started = time.perf_counter()
     with pwsync.sync_playwright() as pw:
+        record_timing(request.node, "playwright", started)
         yield pw
+        started = time.perf_counter()
+    record_timing(request.node, "playwright_teardown", started)
+
+
+@pytest.fixture(scope=FixtureScope.Session)
+def pw_driver(
+    pytestconfig: pytest.Config,
+) -> typing.Generator[PlaywrightDriver | None, None, None]:
+    """Returns the per worker `PlaywrightDriver` when running with a session
+    scoped driver, otherwise `None`.  Browser reuse requires a session driver
+    as pooled browsers cannot outlive the driver that launched them."""
+    option = pytestconfig.option
+    if (
+        option.driver_scope == DriverScope.FUNCTION
+        and option.browser_reuse == BrowserReuse.NO
+    ):
+        yield None
+        return
+    driver = PlaywrightDriver()
+    yield driver
+    driver.stop()
+
+
+@pytest.fixture(scope=FixtureScope.Session)
+def pw_browser_pool(
+    pytestconfig: pytest.Config,
+    pw_driver: PlaywrightDriver | None,
+) -> typing.Generator[BrowserPool | None, None, None]:
+    """Returns the per worker `BrowserPool` when `--browser-reuse` is enabled,
+    otherwise `None`.  Pooled browsers are closed at the end of the session."""
+    if pw_driver is None or pytestconfig.option.browser_reuse == BrowserReuse.NO:
+        yield None
+        return
+    remote = None
+    if urls := pytestconfig.option.remote_browser:
+        remote = RemoteBrowserBackend(
+            urls, retries=pytestconfig.option.remote_browser_retries
+        )
+    pool = BrowserPool(
+        pw_driver,
+        pytestconfig.stash.get(WarmupKey, None),
+        get_browser_servers_from_node(pytestconfig),
+        remote,
+    )
+    yield pool
+    pool.close()
+
+
+@pytest.fixture(scope=FixtureScope.Session)
+def pw_context_pool(
+    pytestconfig: pytest.Config,
+    pw_browser_pool: BrowserPool | None,
+) -> typing.Generator[ContextPool | None, None, None]:
+    """Returns the per worker `ContextPool` when `--context-reuse` is enabled,
+    otherwise `None`.  Idle contexts are closed at the end of the session."""
+    if not pytestconfig.option.context_reuse or pw_browser_pool is None:
+        yield None
+        return
+    pool = ContextPool(pw_browser_pool)
+    yield pool
+    pool.close()
 
 
 @pytest.fixture(scope=FixtureScope.Session)
@@ -481,26 +1314,63 @@ def pw_base_url(pytestconfig: pytest.Config) -> str:
 
 
 @pytest.fixture(scope=FixtureScope.Function)
-def pw_browser(
+def pw_browser(  # noqa: PLR0913, PLR0917
+    request: pytest.FixtureRequest,
     pw_browser_engine: str,
     pw_playwright: pwsync.Playwright,
+    pw_launch_config: LaunchConfig,
     pw_browser_kwargs: ContextKwargs,
+    pw_browser_pool: BrowserPool | None,
+    pw_context_pool: ContextPool | None,
 ) -> typing.Generator[pwsync.Browser, None, None]:
-    """Yields the core browser instance."""
+    """Yields the core browser instance.  When `--browser-reuse` is enabled the
+    browser is borrowed from the worker pool, unless the test has explicit
+    `browser_kwargs` overrides, in which case it receives a dedicated instance."""
     check_engine(pw_browser_engine)
+    started = time.perf_counter()
+    pooled = (
+        pw_browser_pool is not None
+        and request.node.get_closest_marker("browser_kwargs") is None
+    )
+    # An overridden `pw_browser_kwargs` fixture no longer matches the resolved
+    # launch configuration, which then has to be resolved from its kwargs.
+    launch = pw_launch_config
+    if pw_browser_kwargs != launch.kwargs:
+        launch = LaunchConfig.create(pw_browser_engine, pw_browser_kwargs)
     try:
-        browser = BROWSER_FACTORY[pw_browser_engine](pw_playwright, pw_browser_kwargs)
-    except pwsync.Error as err:
+        if pooled:
+            browser = pw_browser_pool.acquire(launch)
+        elif pw_browser_pool is not None:
+            browser = pw_browser_pool.launch(launch)
+        else:
+            browser = BROWSER_FACTORY[pw_browser_engine](
+                pw_playwright, pw_browser_kwargs
+            )
+    except (pwsync.Error, RemoteBrowserError) as err:
         pytest.fail(f"Unable to launch a browser instance because {err!s}")
     else:
+        record_timing(request.node, "browser", started)
         yield browser
-        browser.close()
+        started = time.perf_counter()
+        if pooled:
+            pw_browser_pool.release(browser, pw_context_pool)
+        else:
+            browser.close()
+        record_timing(request.node, "browser_teardown", started)
 
 
 @pytest.fixture(scope=FixtureScope.Function)
-def pw_browser_kwargs(
+def pw_launch_config(
     request: pytest.FixtureRequest, pw_browser_engine: str
-) -> ContextKwargs:
+) -> LaunchConfig:
+    """The frozen (hashable) launch configuration resolved for the test, the command line
+    defaults merged with any `pytest.mark.browser_kwargs` overrides.  Defaults are resolved
+    once per engine per session and marker overrides once per test."""
+    return get_resolver(request.config).browser(request.node, pw_browser_engine)
+
+
+@pytest.fixture(scope=FixtureScope.Function)
+def pw_browser_kwargs(pw_launch_config: LaunchConfig) -> ContextKwargs:
     """The configuration to launching browser arguments.  Override this fixture to pass arbitrary
     arguments to the launched Browser instance.
 
@@ -515,23 +1385,7 @@ def pw_browser_kwargs(
     Additionally user defined code can completely override this fixture for a bespoke implementation, however
     no merging will then occur and they will be responsible for calculating everything.
     """
-    defaults = resolve_browser_cli_flag_defaults(request.config, pw_browser_engine)
-    if (
-        proxy := request.config.hook.pytest_playwright_configure_proxy(
-            config=request.config
-        )
-    ) is not None:
-        # Allow user defined hooks to implement a proxy at runtime.
-        defaults["proxy"] = proxy
-
-    # Handle some debugging magic, if an IDE or debug mode is detected, automatically
-    # force the browsers to open headed.
-    is_debugging = request.config.hook.pytest_playwright_is_debugging(
-        config=request.config
-    )
-    if is_debugging:
-        defaults["headless"] = False
-    return {**defaults, **parse_browser_kwargs_from_node(request.node, {})}
+    return pw_launch_config.as_kwargs()
 
 
 @pytest.fixture(scope=FixtureScope.Function)
@@ -539,13 +1393,12 @@ def pw_context_kwargs(request: pytest.FixtureRequest) -> ContextKwargs:
     """The configuration to launching contexts.  Override this fixture to pass arbitrary
     arguments to the launched Context instance.
     """
-    global_kw = resolve_context_cli_flag_defaults(request.config)
-    parsed_kw = parse_context_kwargs_from_node(request.node, {})
-    return {**global_kw, **parsed_kw}
+    return get_resolver(request.config).context(request.node)
 
 
 @pytest.fixture(scope=FixtureScope.Function)
 def pw_page(
+    request: pytest.FixtureRequest,
     pw_context: pwsync.BrowserContext,
 ) -> typing.Generator[pwsync.Page, None, None]:
     """Launch a new page (tab) as a child of the browser context.  Context arguments
@@ -553,94 +1406,296 @@ def pw_page(
 
     *important*: page.close() is called by the pw_context fixture so we have access
     to various artifacts etc prior to closing."""
-    page = pw_context.new_page()
-    yield page
+    started = time.perf_counter()
+    page = unwrap(pw_context).new_page()
+    record_timing(request.node, "page", started)
+    profile = request.node.stash.get(ActionProfileKey, None)
+    yield page if profile is None else ActionProxy(page, profile)
+    started = time.perf_counter()
     page.close()
+    record_timing(request.node, "page_teardown", started)
+
+
+def recording_modes(item: pytest.Item) -> tuple[str, str, bool]:
+    """Returns the screenshot and video modes of a test and if it is traced.  With
+    `--record-on-retry` the first run records nothing, a failed test is re-run in
+    a fresh context with every recorder on.
+
+    :param item: The test item.
+    """
+    option = item.config.option
+    screenshots, video = option.screenshots_on_fail, option.video_on_fail
+    if not option.record_on_retry:
+        recorder = item.config.stash.get(TraceRecorderKey, None)
+        return (
+            screenshots,
+            video,
+            recorder is not None and recorder.sampled(item.nodeid),
+        )
+    if not item.stash.get(RecordingKey, False):
+        return "no", "no", False
+    return (
+        screenshots if screenshots != "no" else "full",
+        video if video != "no" else "yes",
+        True,
+    )
+
+
+def video_kwargs(video: str, artifacts_dir: pathlib.Path) -> ContextKwargs:
+    """Returns the context kwargs recording the videos of a test.
+
+    :param video: The `--video-on-fail` mode, optionally `<width>x<height>`.
+    :param artifacts_dir: The directory videos are recorded to.
+    """
+    if video == "no":
+        return {}
+    kwargs: ContextKwargs = {"record_video_dir": artifacts_dir}
+    if "x" in video:
+        width, _, height = video.partition("x")
+        kwargs["record_video_size"] = {"width": int(width), "height": int(height)}
+    return kwargs
+
+
+def install_routes(
+    context: pwsync.BrowserContext, item: pytest.Item, har: HarPlan | None
+) -> None:
+    """Install the asset cache, HAR and resource blocking routes of a test.  Routes
+    run last registered first: blocked requests never reach the HAR, and HAR replay
+    takes precedence over the asset cache.
+
+    :param context: The test context.
+    :param item: The test item.
+    :param har: The HAR plan of the test, if any.
+    """
+    stash = item.config.stash
+    if (asset_cache := stash.get(AssetCacheKey, None)) is not None:
+        asset_cache.install(context)
+    if har is not None:
+        stash[HarCacheKey].attach(context, har)
+    if blocker := stash[ResourceBlockerKey].extend(item):
+        blocker.install(context)
 
 
 @pytest.fixture(scope=FixtureScope.Function)
-def pw_context(  # noqa: PLR0912 (Todo: Simplify and tidy internal impl)
+def pw_context(
     request: pytest.FixtureRequest,
-    pytestconfig: pytest.Config,
     pw_browser: pwsync.Browser,
     pw_context_kwargs: ContextKwargs,
     pw_artifacts_dir: pathlib.Path,
+    pw_context_pool: ContextPool | None,
 ) -> typing.Generator[pwsync.BrowserContext, None, None]:
-    """A scope session scoped browser context."""
+    """A scope session scoped browser context.  With `--context-reuse` the context
+    is borrowed from the worker pool, provided the browser is pooled and neither
+    video nor tracing is recording."""
+    started = time.perf_counter()
+    item, stash = request.node, request.config.stash
     pages: list[pwsync.Page] = []
-    additional_ctx_kwargs = {}
-    screenshots = pytestconfig.option.screenshots_on_fail
-
-    if (video := pytestconfig.option.video_on_fail) != "no":
-        additional_ctx_kwargs["record_video_dir"] = pw_artifacts_dir
-        if "x" in video:
-            width, _, height = video.partition("x")
-            additional_ctx_kwargs["record_video_size"] = {
-                "width": int(width),
-                "height": int(height),
-            }
-
-    ctx_kwargs = {**pw_context_kwargs, **additional_ctx_kwargs}
-    context = pw_browser.new_context(**ctx_kwargs)
-
-    # Handle trace level specifics;
-    tracing = pytestconfig.option.trace_on_fail
+    screenshots, video, tracing = recording_modes(item)
+    rerun = item.stash.get(RecordingKey, False)
+    recorder = stash.get(TraceRecorderKey, None)
+    ctx_kwargs = {**pw_context_kwargs, **video_kwargs(video, pw_artifacts_dir)}
+    har = stash[HarCacheKey].plan(item, ctx_kwargs.get("base_url"))
+    perf = (
+        "pw_perf" in request.fixturenames
+        or item.get_closest_marker(PERF_MARKER) is not None
+    )
+    # HAR recordings are written when the context closes, and init scripts
+    # cannot be removed from recycled contexts.
+    recycle = (
+        pw_context_pool is not None
+        and pw_context_pool.recycles(pw_browser)
+        and video == "no"
+        and not rerun
+        and (not tracing or recorder.chunked)
+        and (har is None or har.recording is None)
+        and not perf
+    )
+    context = (
+        pw_context_pool.acquire(pw_browser, ctx_kwargs)
+        if recycle
+        else pw_browser.new_context(**ctx_kwargs)
+    )
+    install_routes(context, item, har)
+    if perf:
+        PerfMonitor.install(context, item)
     if tracing:
-        context.tracing.start(
-            title=request.node.name,
-            screenshots=pytestconfig.option.screenshots_on_fail != "no",
-            snapshots=True,
-            sources=True,
-        )
+        recorder.start(context, item.name)
 
     # Register an event handler to keep track of all the pages opened by this context.
-    context.on("page", lambda page: pages.append(page))
+    def track_page(page: pwsync.Page) -> None:
+        pages.append(page)
+
+    context.on("page", track_page)
+    if recycle:
+        pw_context_pool.watch(context)
+
+    record_timing(item, "context", started)
+    profile = item.stash.get(ActionProfileKey, None)
+    yield context if profile is None else ActionProxy(context, profile)
+    started = time.perf_counter()
+
+    passed = test_was_not_skipped_and_passed(item=item, key=PhaseReportKey)
+    # The re-run of `--record-on-retry` exists for its artifacts, they are kept
+    # even when it passes (a flaky test).
+    keep = rerun or not passed
+    if tracing:
+        recorder.stop(
+            context, item.nodeid, f"{slugify(item.name)}-trace.zip" if keep else None
+        )
+    store = stash[ArtifactStoreKey]
+    if keep and screenshots != "no":
+        store_screenshots(store, item, pages, full_page=screenshots == "full")
+    # cause spawned pages to also be closed for multi page scenarios.
+    if recycle:
+        context.remove_listener("page", track_page)
+        pw_context_pool.release(context)
+    else:
+        context.close()
+    if har is not None:
+        stash[HarCacheKey].finish(har, passed)
+    if video != "no":
+        store_videos(store, item, pages, keep=keep)
+    record_timing(item, "context_teardown", started)
 
-    yield context
 
-    passed = test_was_not_skipped_and_passed(item=request.node, key=PhaseReportKey)
+@pytest.fixture(scope=FixtureScope.Function)
+def pw_perf(
+    request: pytest.FixtureRequest,
+    pw_context: pwsync.BrowserContext,  # noqa: ARG001
+) -> PerfMonitor:
+    """Collects web performance metrics of the pages of the test context, logged to
+    `perf.jsonl` in the artifacts directory once the test body finishes and checked
+    against the `pw_perf_budget` marker of the test.  Tests with the marker are
+    measured without requesting the fixture."""
+    return request.node.stash[PerfMonitorKey]
 
-    # Handle tracing artifact(s)
-    if not passed and tracing:
-        context.tracing.stop(
-            path=pw_artifacts_dir.joinpath(f"{slugify(request.node.name)}-trace.zip")
-        )
 
-    # Capture screenshots if necessary and artifact them.
-    if not passed and screenshots != "no":
-        for idx, p in enumerate(pages):
-            p.screenshot(
-                timeout=pytestconfig.option.screenshot_timeout,
-                path=pw_artifacts_dir.joinpath(
-                    f"{slugify(request.node.name)}-{idx}.png"
-                ),
-                full_page=screenshots == "full",
+def store_videos(
+    store: ArtifactStore,
+    item: pytest.Item,
+    pages: list[pwsync.Page],
+    *,
+    keep: bool,
+) -> None:
+    """Store the videos of the (closed) pages of a test, named after the test
+    rather than the randomised `.webm` files, or delete them when not kept.
+
+    :param store: The artifact store.
+    :param item: The test item.
+    :param pages: The pages opened by the test context.
+    :param keep: If the videos are kept at all.
+    """
+    # Todo: Consider file name lengths here in future, could break with long node names
+    # such as parameterised (heavily) nodes.
+    name = slugify(item.name)
+    for idx, page in enumerate(pages):
+        if page.video is not None:
+            store_video(
+                store, page.video, item.nodeid, f"{name}-{idx}.webm" if keep else None
             )
-    # cause spawned pages to also be closed for multi page scenarios.
-    context.close()
-    if video != "no":
-        if passed:
-            # The test has passed, unlink all video files regardless.
-            for page in pages:
-                video = page.video
-                if video is not None:
-                    page.video.delete()
-        else:
-            # The test failed and the user has requested to keep video artifacts
-            # Lets try and rename them to be test appropriately named rather than
-            # randomised .webm files
-            # Todo: Consider file name lengths here in future, could break with long node names
-            # such as parameterised (heavily) nodes.
-            name = slugify(request.node.name)
-            for idx, page in enumerate(pages):
-                video = page.video
-                if video is not None:
-                    file_path = pw_artifacts_dir.joinpath(f"{name}-{idx}.webm")
-                    video.save_as(file_path)
-                    video.delete()
+
+
+def store_video(
+    store: ArtifactStore, video: pwsync.Video, nodeid: str, name: str | None
+) -> None:
+    """Store a finished video as `name` (or delete it when `None`) in the
+    background.  Videos of remote browsers only exist on the remote machine,
+    these are downloaded in the foreground.
+
+    :param store: The artifact store.
+    :param video: The video of a closed page.
+    :param nodeid: The node id of the test which recorded the video.
+    :param name: The artifact name of the video, if it is kept at all.
+    """
+    try:
+        path = pathlib.Path(video.path())
+    except pwsync.Error:
+        if name is not None:
+            path = store.staging_path(name)
+            video.save_as(path)
+            store.add_file(nodeid, name, path)
+        video.delete()
+        return
+    if name is None:
+        store.discard(path)
+    else:
+        store.add_file(nodeid, name, path)
 
 
 PhaseReportKey = pytest.StashKey[typing.Dict[str, pytest.CollectReport]]()
+WarmupKey = pytest.StashKey[BrowserWarmup]()
+ArtifactWriterKey = pytest.StashKey[ArtifactWriter]()
+ArtifactStoreKey = pytest.StashKey[ArtifactStore]()
+HarCacheKey = pytest.StashKey[HarCache]()
+AssetCacheKey = pytest.StashKey[AssetCache]()
+ResourceBlockerKey = pytest.StashKey[ResourceBlocker]()
+SkippedArtifactsKey = pytest.StashKey[
+    typing.Dict[typing.Tuple[str, str], typing.List[int]]
+]()
+TraceRecorderKey = pytest.StashKey[TraceRecorder]()
+RecordingKey = pytest.StashKey[bool]()
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item: pytest.Item) -> None:
+    """Begin collecting the lifecycle timings of a test with `--pw-timings`, and
+    its playwright calls with `--pw-profile-actions`."""
+    if item.config.option.pw_timings or item.config.option.pw_timings_json:
+        item.stash[TimingsKey] = {}
+    if item.config.option.pw_profile_actions:
+        item.stash[ActionProfileKey] = ActionProfile()
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_protocol(
+    item: pytest.Item, nextitem: pytest.Item | None
+) -> bool | None:
+    """With `--record-on-retry`, re-run a failed browser test once in a fresh
+    context with video, tracing and screenshots on.  The outcome of the first
+    run stands, the re-run only produces the artifacts."""
+    if not item.config.option.record_on_retry or "pw_context" not in getattr(
+        item, "fixturenames", ()
+    ):
+        return None
+    item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+    reports = runtestprotocol(item, nextitem=nextitem, log=False)
+    if any(report.failed for report in reports) and reset_fixture_request(item):
+        item.stash[RecordingKey] = True
+        rerun = runtestprotocol(item, nextitem=nextitem, log=False)
+        outcome = "failed" if any(report.failed for report in rerun) else "passed"
+        for report in reports:
+            if report.failed:
+                report.sections.append(
+                    ("record on retry", f"Re-ran with recording enabled, it {outcome}.")
+                )
+    for report in reports:
+        item.ihook.pytest_runtest_logreport(report=report)
+    item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+    return True
+
+
+DurationHistoryKey = pytest.StashKey[DurationHistory]()
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item: pytest.Item) -> typing.Generator[None, None, None]:
+    """Measure the pages of a test using `pw_perf` (or `pw_perf_budget`) once its
+    body passed, while they are still open, failing the test if a page exceeds
+    its budget."""
+    result = yield
+    monitor = item.stash.get(PerfMonitorKey, None)
+    if monitor is None:
+        return result
+    pages = monitor.collect_all()
+    item.config.stash[PerfLogKey].write(item.nodeid, pages)
+    exceeded = [
+        message for metrics in pages for message in over_budget(metrics, monitor.budget)
+    ]
+    if exceeded:
+        pytest.fail(
+            "Performance budget exceeded:\n" + "\n".join(exceeded), pytrace=False
+        )
+    return result
 
 
 @pytest.hookimpl(wrapper=True, tryfirst=True)
@@ -653,4 +1708,13 @@ def pytest_runtest_makereport(
     """
     report = yield
     item.stash.setdefault(PhaseReportKey, {})[report.when] = report
+    if (timings := item.stash.get(TimingsKey, None)) is not None:
+        if report.when == "call":
+            timings["call"] = report.duration
+        elif report.when == "teardown":
+            # Serialised with the report, so xdist hands it to the controller.
+            setattr(report, REPORT_ATTRIBUTE, dict(timings))
+    profile = item.stash.get(ActionProfileKey, None)
+    if report.when == "teardown" and profile is not None and profile.actions:
+        setattr(report, ACTIONS_REPORT_ATTRIBUTE, profile.as_dict())
     return report
@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import contextlib
+import typing
+from dataclasses import dataclass
+from dataclasses import field
+
+from playwright import sync_api as pwsync
+
+from .browser_strategy import BROWSER_FACTORY
+from .driver import PlaywrightDriver
+from .remote import RemoteBrowserBackend
+from .server import BrowserServer
+from .types import AnyDict
+from .utils import hash_kwargs
+from .warmup import BrowserWarmup
+
+if typing.TYPE_CHECKING:
+    from .resolution import LaunchConfig
+
+
+class BrowserPool:
+    """A per worker cache of launched `Browser` instances.  Browsers are keyed
+    by the `LaunchConfig` resolved for a test (its engine and fingerprint), tests
+    which resolve to the same launch configuration share a single browser.
+
+    Pooled browsers outlive any individual test, so they are launched from the
+    long lived worker driver.  Should the driver be restarted, the browsers it
+    launched are disconnected and are relaunched on their next acquisition.
+
+    Rather than launching, the pool connects to a browser server when one is
+    available for the configuration.  Either a server shared by the xdist
+    controller (`endpoints`) or one launched ahead of time by a `BrowserWarmup`.
+    With a `RemoteBrowserBackend`, browsers are connected to on remote hosts
+    rather than launched locally.
+    """
+
+    def __init__(
+        self: BrowserPool,
+        driver: PlaywrightDriver,
+        warmup: BrowserWarmup | None = None,
+        endpoints: dict[tuple[str, str], str] | None = None,
+        remote: RemoteBrowserBackend | None = None,
+    ) -> None:
+        self._browsers: dict[tuple[str, str], pwsync.Browser] = {}
+        self._servers: list[BrowserServer] = []
+        self._driver = driver
+        self._warmup = warmup
+        self._endpoints = endpoints or {}
+        self._remote = remote
+
+    def acquire(self: BrowserPool, launch: LaunchConfig) -> pwsync.Browser:
+        """Return the pooled browser for the launch configuration, launching
+        one if it does not exist yet (or the previous one has disconnected).
+
+        :param launch: The resolved launch configuration.
+        """
+        browser = self._browsers.get(launch.key)
+        if browser is None or not browser.is_connected():
+            browser = self._connect(launch)
+            if browser is None:
+                browser = self.launch(launch)
+            self._browsers[launch.key] = browser
+        return browser
+
+    def launch(self: BrowserPool, launch: LaunchConfig) -> pwsync.Browser:
+        """Launch a new browser which is not tracked by the pool, on a remote
+        endpoint if the pool has a remote backend.
+
+        :param launch: The resolved launch configuration.
+        """
+        if self._remote is not None:
+            return self._remote.connect(
+                self._driver.playwright, launch.engine, launch.as_kwargs()
+            )
+        return BROWSER_FACTORY[launch.engine](
+            self._driver.playwright, launch.as_kwargs()
+        )
+
+    def _connect(self: BrowserPool, launch: LaunchConfig) -> pwsync.Browser | None:
+        ws_endpoint = self._endpoints.get(launch.key)
+        if ws_endpoint is None and self._warmup is not None:
+            server = self._warmup.take(launch)
+            if server is not None:
+                self._servers.append(server)
+                ws_endpoint = server.ws_endpoint
+        if ws_endpoint is None:
+            return None
+        browser_type = getattr(self._driver.playwright, launch.engine)
+        return browser_type.connect(ws_endpoint, timeout=launch.kwargs.get("timeout"))
+
+    def owns(self: BrowserPool, browser: pwsync.Browser) -> bool:
+        """Returns if the browser instance is managed by the pool.
+
+        :param browser: The browser instance.
+        """
+        return any(pooled is browser for pooled in self._browsers.values())
+
+    def release(
+        self: BrowserPool,
+        browser: pwsync.Browser,
+        contexts: ContextPool | None = None,
+    ) -> None:
+        """Hand a browser back to the pool after a test.  Any contexts the
+        test left open are closed so they do not leak into the next test,
+        except the idle contexts kept by the context pool for reuse.
+
+        :param browser: The pooled browser instance.
+        :param contexts: The worker context pool, if any.
+        """
+        if not browser.is_connected():
+            return
+        for context in browser.contexts:
+            if contexts is None or not contexts.owns(context):
+                context.close()
+
+    def close(self: BrowserPool) -> None:
+        """Close all of the pooled browsers and any warmed up servers they are
+        connected to.  Servers shared by the xdist controller are left running."""
+        for browser in self._browsers.values():
+            if browser.is_connected():
+                browser.close()
+        self._browsers.clear()
+        for server in self._servers:
+            server.close()
+        self._servers.clear()
+
+    def __len__(self: BrowserPool) -> int:
+        return len(self._browsers)
+
+
+# Context APIs whose effects outlive a test and are not undone by a reset, a
+# context a test called any of these on is closed rather than reused.
+STATEFUL_METHODS = (
+    "add_init_script",
+    "expose_binding",
+    "expose_function",
+    "route",
+    "route_from_har",
+    "route_web_socket",
+    "set_default_navigation_timeout",
+    "set_default_timeout",
+    "set_extra_http_headers",
+    "set_geolocation",
+    "set_offline",
+)
+# Listeners a test registers are removed again when the context is released.
+LISTENER_METHODS = ("on", "once")
+EMPTY_STORAGE_STATE = {"cookies": [], "origins": []}
+
+
+@dataclass
+class PooledContext:
+    """Book keeping for a recycled `BrowserContext`."""
+
+    context: pwsync.BrowserContext
+    key: tuple[int, str]
+    kwargs: AnyDict
+    uses: int = 0
+    closed: bool = False
+    dirty: bool = False
+    listeners: list[tuple[str, typing.Callable[..., object]]] = field(
+        default_factory=list
+    )
+
+    def on_close(self: PooledContext, _: pwsync.BrowserContext) -> None:
+        self.closed = True
+
+    def watch(self: PooledContext) -> None:
+        """Track what a test does to the context, by shadowing methods on the
+        instance until it is released: calls of `STATEFUL_METHODS` mark it dirty
+        and listeners registered with `LISTENER_METHODS` are recorded."""
+        for name in (*STATEFUL_METHODS, *LISTENER_METHODS):
+            method = getattr(self.context, name)
+
+            def tracked(
+                *args: typing.Any,  # noqa: ANN401
+                _name: str = name,
+                _method: typing.Callable[..., object] = method,
+                **kwargs: typing.Any,  # noqa: ANN401
+            ) -> object:
+                if _name in LISTENER_METHODS:
+                    event = args[0] if args else kwargs["event"]
+                    handler = args[1] if len(args) > 1 else kwargs["f"]
+                    self.listeners.append((event, handler))
+                else:
+                    self.dirty = True
+                return _method(*args, **kwargs)
+
+            setattr(self.context, name, tracked)
+
+    def unwatch(self: PooledContext) -> None:
+        """Restore the shadowed methods and remove the listeners of the test."""
+        for name in (*STATEFUL_METHODS, *LISTENER_METHODS):
+            vars(self.context).pop(name, None)
+        for event, handler in self.listeners:
+            with contextlib.suppress(KeyError, ValueError, pwsync.Error):
+                self.context.remove_listener(event, handler)
+        self.listeners.clear()
+
+
+class ContextPool:
+    """A per worker cache of `BrowserContext` instances, keyed by the browser
+    they belong to and a canonical hash of the resolved context kwargs.
+
+    Contexts are reset when they are released: pages (and so session storage)
+    are closed, listeners the test registered are removed, routes, cookies and
+    permissions are cleared (permissions of the context kwargs are granted
+    again) and the storage of every origin (local storage, indexed db) is reset
+    to the `storage_state` the context was created with.  Contexts a test changed
+    in ways a reset cannot undo (see `STATEFUL_METHODS`) are closed instead, as
+    are contexts used `max_uses` times.
+
+    Resetting storage requires `BrowserContext.set_storage_state`, check
+    `ContextPool.supported()` before pooling.
+
+    :param browsers: The browser pool, only contexts of pooled browsers are reused.
+    :param max_idle: The idle contexts kept per browser and kwargs.
+    :param max_uses: The tests a context is used for before it is closed.
+    """
+
+    def __init__(
+        self: ContextPool,
+        browsers: BrowserPool | None = None,
+        max_idle: int = 2,
+        max_uses: int = 50,
+    ) -> None:
+        self.browsers = browsers
+        self.max_idle = max_idle
+        self.max_uses = max_uses
+        self._idle: dict[tuple[int, str], list[PooledContext]] = {}
+        self._leased: dict[int, PooledContext] = {}
+
+    def acquire(
+        self: ContextPool,
+        browser: pwsync.Browser,
+        context_kwargs: AnyDict,
+    ) -> pwsync.BrowserContext:
+        """Return an idle (reset) context for the browser and kwargs, creating
+        one if there are none available.
+
+        :param browser: The (pooled) browser the context belongs to.
+        :param context_kwargs: The fully resolved context kwargs.
+        """
+        key = (id(browser), hash_kwargs(context_kwargs))
+        idle = self._idle.setdefault(key, [])
+        while idle:
+            pooled = idle.pop()
+            if not pooled.closed and pooled.context.browser is browser:
+                break
+            self._discard(pooled)
+        else:
+            context = browser.new_context(**context_kwargs)
+            pooled = PooledContext(context=context, key=key, kwargs=context_kwargs)
+            context.on("close", pooled.on_close)
+        self._leased[id(pooled.context)] = pooled
+        return pooled.context
+
+    def recycles(self: ContextPool, browser: pwsync.Browser) -> bool:
+        """Returns if the contexts of a browser are reused, browsers outside of
+        the browser pool are closed with their test.
+
+        :param browser: The browser of the test.
+        """
+        return self.browsers is not None and self.browsers.owns(browser)
+
+    def watch(self: ContextPool, context: pwsync.BrowserContext) -> None:
+        """Start watching a leased context for state a reset cannot undo, called
+        once the plugin itself finished setting the context up.
+
+        :param context: The context returned from `acquire`.
+        """
+        self._leased[id(context)].watch()
+
+    def owns(self: ContextPool, context: pwsync.BrowserContext) -> bool:
+        """Returns if the context is idle in the pool, waiting to be reused.
+
+        :param context: A context of a pooled browser.
+        """
+        return any(
+            pooled.context is context for idle in self._idle.values() for pooled in idle
+        )
+
+    def release(self: ContextPool, context: pwsync.BrowserContext) -> None:
+        """Reset a context and return it to the pool, contexts which cannot be
+        reset (or are no longer needed) are closed instead.
+
+        :param context: The context returned from `acquire`.
+        """
+        pooled = self._leased.pop(id(context))
+        pooled.unwatch()
+        pooled.uses += 1
+        idle = self._idle.setdefault(pooled.key, [])
+        if (
+            pooled.closed
+            or pooled.dirty
+            or pooled.uses >= self.max_uses
+            or len(idle) >= self.max_idle
+        ):
+            self._discard(pooled)
+            return
+        try:
+            self._reset(pooled)
+        except pwsync.Error:
+            self._discard(pooled)
+        else:
+            idle.append(pooled)
+
+    @staticmethod
+    def supported() -> bool:
+        """Returns if the installed playwright can reset the storage of contexts."""
+        return hasattr(pwsync.BrowserContext, "set_storage_state")
+
+    def close(self: ContextPool) -> None:
+        """Close all of the idle contexts."""
+        for idle in self._idle.values():
+            for pooled in idle:
+                self._discard(pooled)
+        self._idle.clear()
+
+    @staticmethod
+    def _reset(pooled: PooledContext) -> None:
+        context = pooled.context
+        for page in context.pages:
+            page.close()
+        context.unroute_all(behavior="ignoreErrors")
+        context.clear_cookies()
+        context.clear_permissions()
+        if permissions := pooled.kwargs.get("permissions"):
+            context.grant_permissions(permissions)
+        context.set_storage_state(
+            pooled.kwargs.get("storage_state") or EMPTY_STORAGE_STATE
+        )
+
+    @staticmethod
+    def _discard(pooled: PooledContext) -> None:
+        if pooled.closed:
+            return
+        with contextlib.suppress(pwsync.Error):
+            pooled.context.close()
+        pooled.closed = True
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import time
+import typing
+
+import pytest
+from playwright import sync_api as pwsync
+
+# The attribute of teardown reports carrying the profile to the controller.
+REPORT_ATTRIBUTE = "pw_actions"
+SLOWEST = 10
+# Objects whose calls are profiled, objects of these types returned by a call
+# (e.g. `page.locator()` or `page.context`) are profiled as well.
+PROFILED = (pwsync.Page, pwsync.Locator, pwsync.BrowserContext)
+
+
+class ActionProfile:
+    """The playwright calls of a test: the count, total and slowest latency of
+    each action (e.g. `Page.click`) and the count and total latency of the calls
+    waiting on each selector.  Kept as plain dicts, so they travel with reports.
+    """
+
+    def __init__(self: ActionProfile) -> None:
+        self.actions: dict[str, list[float]] = {}
+        self.selectors: dict[str, list[float]] = {}
+
+    def record(
+        self: ActionProfile, action: str, selector: str | None, seconds: float
+    ) -> None:
+        """Record a call.
+
+        :param action: The class and method called, e.g. `Locator.click`.
+        :param selector: The selector the call waited on, if any.
+        :param seconds: The latency of the call.
+        """
+        stats = self.actions.setdefault(action, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] = max(stats[2], seconds)
+        if selector is not None:
+            stats = self.selectors.setdefault(selector, [0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+
+    def merge(self: ActionProfile, other: dict[str, dict[str, list[float]]]) -> None:
+        """Add the profile of another test, as serialised by `as_dict`.
+
+        :param other: The serialised profile.
+        """
+        for action, (count, total, slowest) in other["actions"].items():
+            stats = self.actions.setdefault(action, [0, 0.0, 0.0])
+            stats[0] += count
+            stats[1] += total
+            stats[2] = max(stats[2], slowest)
+        for selector, (count, total) in other["selectors"].items():
+            stats = self.selectors.setdefault(selector, [0, 0.0])
+            stats[0] += count
+            stats[1] += total
+
+    def as_dict(self: ActionProfile) -> dict[str, dict[str, list[float]]]:
+        return {"actions": self.actions, "selectors": self.selectors}
+
+
+@functools.lru_cache(maxsize=None)
+def _takes_selector(cls: type, name: str) -> bool:
+    """If the first argument of a method is a selector, e.g. `Page.click`."""
+    try:
+        parameters = list(inspect.signature(getattr(cls, name)).parameters)
+    except (AttributeError, TypeError, ValueError):
+        return False
+    return len(parameters) > 1 and parameters[1] == "selector"
+
+
+def _selector_of(locator: object) -> str | None:
+    return getattr(getattr(locator, "_impl_obj", None), "_selector", None)
+
+
+class ActionProxy:
+    """A thin proxy over a `Page`, `Locator` or `BrowserContext` timing every
+    public method call into a profile.  Passes `isinstance` checks of the proxied
+    type and is accepted wherever playwright expects the proxied object.
+
+    :param target: The proxied object.
+    :param profile: The profile of the test.
+    """
+
+    __slots__ = ("_pwe_profile", "_pwe_selector", "_pwe_target")
+
+    def __init__(self: ActionProxy, target: object, profile: ActionProfile) -> None:
+        self._pwe_target = target
+        self._pwe_profile = profile
+        self._pwe_selector = (
+            _selector_of(target) if isinstance(target, pwsync.Locator) else None
+        )
+
+    @property  # type: ignore[misc]
+    def __class__(self: ActionProxy) -> type:
+        return type(self._pwe_target)
+
+    def __getattr__(self: ActionProxy, name: str) -> typing.Any:  # noqa: ANN401
+        value = getattr(self._pwe_target, name)
+        if name.startswith("_"):
+            return value
+        if isinstance(value, PROFILED):
+            return ActionProxy(value, self._pwe_profile)
+        if not callable(value):
+            return value
+        cls = type(self._pwe_target)
+        action = f"{cls.__name__}.{name}"
+        selector = self._pwe_selector
+        takes_selector = selector is None and _takes_selector(cls, name)
+        profile = self._pwe_profile
+
+        def call(*args: object, **kwargs: object) -> object:
+            started = time.perf_counter()
+            result: object = None
+            try:
+                result = value(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - started
+                waited_on = selector
+                if takes_selector:
+                    waited_on = args[0] if args else kwargs.get("selector")  # type: ignore[assignment]
+                # Building a locator waits on nothing.
+                if isinstance(result, pwsync.Locator):
+                    waited_on = None
+                profile.record(action, waited_on, seconds)
+            if isinstance(result, PROFILED):
+                return ActionProxy(result, profile)
+            return result
+
+        return call
+
+    def __setattr__(self: ActionProxy, name: str, value: object) -> None:
+        if name in ActionProxy.__slots__:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._pwe_target, name, value)
+
+    def __eq__(self: ActionProxy, other: object) -> bool:
+        return self._pwe_target == unwrap(other)
+
+    def __hash__(self: ActionProxy) -> int:
+        return hash(self._pwe_target)
+
+    def __repr__(self: ActionProxy) -> str:
+        return repr(self._pwe_target)
+
+
+def unwrap(obj: typing.Any) -> typing.Any:  # noqa: ANN401
+    """The object proxied by an `ActionProxy`, any other object as is.
+
+    :param obj: The (proxied) object.
+    """
+    return obj._pwe_target if isinstance(obj, ActionProxy) else obj
+
+
+class ActionProfileReport:
+    """Aggregates the action profiles of every test, registered in the controller
+    only, which receives the reports of all xdist workers.  Summarises the
+    slowest actions and the selectors waited on the longest at the end of the
+    run with `--pw-profile-actions`.
+    """
+
+    def __init__(self: ActionProfileReport) -> None:
+        self.profile = ActionProfile()
+
+    @pytest.hookimpl
+    def pytest_runtest_logreport(
+        self: ActionProfileReport, report: pytest.TestReport
+    ) -> None:
+        profile = getattr(report, REPORT_ATTRIBUTE, None)
+        if report.when == "teardown" and profile:
+            self.profile.merge(profile)
+
+    @pytest.hookimpl
+    def pytest_terminal_summary(
+        self: ActionProfileReport, terminalreporter: pytest.TerminalReporter
+    ) -> None:
+        if not self.profile.actions:
+            return
+        terminalreporter.write_sep("-", "playwright actions (ms)")
+        terminalreporter.write_line(
+            f"{'action':<36}{'calls':>8}{'total':>11}{'mean':>9}{'max':>9}"
+        )
+        actions = sorted(
+            self.profile.actions.items(), key=lambda item: item[1][1], reverse=True
+        )
+        for action, (count, total, slowest) in actions[:SLOWEST]:
+            terminalreporter.write_line(
+                f"{action:<36}{count:>8}{total * 1000:>11.0f}"
+                f"{total / count * 1000:>9.1f}{slowest * 1000:>9.1f}"
+            )
+        if not self.profile.selectors:
+            return
+        terminalreporter.write_line("")
+        terminalreporter.write_line("selectors with the highest total wait:")
+        selectors = sorted(
+            self.profile.selectors.items(), key=lambda item: item[1][1], reverse=True
+        )
+        for selector, (count, total) in selectors[:SLOWEST]:
+            terminalreporter.write_line(f"{total * 1000:>11.0f}{count:>8}  {selector}")
+
+
+ActionProfileKey = pytest.StashKey[ActionProfile]()
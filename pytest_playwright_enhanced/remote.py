@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import functools
+import json
+import os
+import socket
+import time
+import urllib.parse
+from dataclasses import dataclass
+
+from playwright import sync_api as pwsync
+
+from .const import BrowserEngine
+from .exceptions import RemoteBrowserError
+from .server import launch_server_options
+from .types import AnyDict
+
+_DEFAULT_PORTS = {"ws": 80, "wss": 443, "http": 80, "https": 443}
+# Launch kwargs which only make sense on the machine running pytest.
+_LOCAL_ONLY_KWARGS = ("executable_path", "env")
+
+
+@dataclass
+class RemoteEndpoint:
+    """A remote browser endpoint and its book keeping.  `ws(s)://` endpoints are
+    playwright servers (`connect`), `http(s)://` endpoints are chromium CDP
+    endpoints (`connect_over_cdp`)."""
+
+    url: str
+    leased: int = 0
+    failures: int = 0
+    healthy: bool = True
+
+    @property
+    def is_cdp(self: RemoteEndpoint) -> bool:
+        return urllib.parse.urlparse(self.url).scheme in {"http", "https"}
+
+    def serves(self: RemoteEndpoint, engine: str) -> bool:
+        return not self.is_cdp or engine == BrowserEngine.CHROMIUM
+
+    def probe(self: RemoteEndpoint, timeout: float) -> bool:
+        """A cheap liveness probe, checks the endpoint accepts tcp connections."""
+        parsed = urllib.parse.urlparse(self.url)
+        port = parsed.port or _DEFAULT_PORTS.get(parsed.scheme, 80)
+        try:
+            with socket.create_connection((parsed.hostname, port), timeout=timeout):
+                self.healthy = True
+        except OSError:
+            self.healthy = False
+        return self.healthy
+
+
+class RemoteBrowserBackend:
+    """Distributes browser connections over one or more remote endpoints, so
+    browsers run on dedicated hosts rather than the machine running pytest.
+
+    Each connection goes to the healthy endpoint with the fewest live browsers
+    from this worker, endpoints are probed for liveness before connecting and
+    failed connections are retried on the next candidate with an exponential
+    backoff.  Workers start at different endpoints to spread the initial load.
+
+    :param urls: The remote endpoints.
+    :param retries: The rounds over all endpoints after the first, `0` never retries.
+    :param backoff: The seconds to wait before the first retry, doubled per retry.
+    :param probe_timeout: The seconds an endpoint has to accept a connection.
+    """
+
+    def __init__(
+        self: RemoteBrowserBackend,
+        urls: list[str],
+        retries: int = 3,
+        backoff: float = 0.5,
+        probe_timeout: float = 5.0,
+    ) -> None:
+        self.endpoints = [RemoteEndpoint(url) for url in urls]
+        self.retries = retries
+        self.backoff = backoff
+        self.probe_timeout = probe_timeout
+        worker = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+        self._offset = int(worker[2:] or 0) if worker.startswith("gw") else 0
+
+    def _candidates(self: RemoteBrowserBackend, engine: str) -> list[RemoteEndpoint]:
+        count = len(self.endpoints)
+        rotated = [self.endpoints[(self._offset + idx) % count] for idx in range(count)]
+        # sorted is stable, so the worker rotation breaks ties between endpoints.
+        return sorted(
+            (endpoint for endpoint in rotated if endpoint.serves(engine)),
+            key=lambda endpoint: (not endpoint.healthy, endpoint.leased),
+        )
+
+    def connect(
+        self: RemoteBrowserBackend,
+        playwright: pwsync.Playwright,
+        engine: str,
+        launch_kwargs: AnyDict,
+    ) -> pwsync.Browser:
+        """Connect to a browser on the least loaded, live remote endpoint.
+
+        :param playwright: The playwright driver to connect with.
+        :param engine: The browser engine name.
+        :param launch_kwargs: The resolved browser launch kwargs, these are
+            forwarded to playwright servers which launch a browser per client.
+        """
+        if not self._candidates(engine):
+            raise RemoteBrowserError(engine, ["no endpoint serves this engine"])
+        errors: list[str] = []
+        for attempt in range(self.retries + 1):
+            for endpoint in self._candidates(engine):
+                if not endpoint.probe(self.probe_timeout):
+                    errors.append(f"{endpoint.url} is unreachable")
+                    continue
+                try:
+                    browser = self._connect(playwright, endpoint, engine, launch_kwargs)
+                except pwsync.Error as err:
+                    endpoint.failures += 1
+                    errors.append(f"{endpoint.url} failed with {err.message}")
+                    continue
+                endpoint.leased += 1
+                browser.on("disconnected", functools.partial(self._release, endpoint))
+                return browser
+            if attempt < self.retries:
+                time.sleep(self.backoff * 2**attempt)
+        raise RemoteBrowserError(engine, errors)
+
+    @staticmethod
+    def _release(endpoint: RemoteEndpoint) -> None:
+        endpoint.leased -= 1
+
+    @staticmethod
+    def _connect(
+        playwright: pwsync.Playwright,
+        endpoint: RemoteEndpoint,
+        engine: str,
+        launch_kwargs: AnyDict,
+    ) -> pwsync.Browser:
+        timeout = launch_kwargs.get("timeout")
+        if endpoint.is_cdp:
+            return playwright.chromium.connect_over_cdp(endpoint.url, timeout=timeout)
+        remote_kwargs = {
+            key: value
+            for key, value in launch_kwargs.items()
+            if key not in _LOCAL_ONLY_KWARGS
+        }
+        headers = {
+            "x-playwright-launch-options": json.dumps(
+                launch_server_options(remote_kwargs)
+            )
+        }
+        browser_type = getattr(playwright, engine)
+        return browser_type.connect(endpoint.url, timeout=timeout, headers=headers)
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import types
+import typing
+from dataclasses import dataclass
+from dataclasses import field
+
+import pytest
+
+from .types import AnyDict
+from .utils import hash_kwargs
+from .utils import parse_browser_kwargs_from_node
+from .utils import parse_context_kwargs_from_node
+from .utils import resolve_browser_launch_defaults
+from .utils import resolve_context_cli_flag_defaults
+
+# The plugin hooks consulted when resolving browser launch kwargs, their
+# results are cached for the session unless an implementation is dynamic.
+CACHED_HOOKS = ("pytest_playwright_configure_proxy", "pytest_playwright_is_debugging")
+_DYNAMIC = "pw_dynamic"
+
+F = typing.TypeVar("F", bound=typing.Callable[..., typing.Any])
+
+
+def dynamic_hook(func: F) -> F:
+    """Mark a hook implementation as dynamic, it is then called for every test
+    rather than once per session.  Only needed for `pytest_playwright_configure_proxy`
+    and `pytest_playwright_is_debugging` implementations whose result changes
+    during the run::
+
+        @pytest.hookimpl
+        @dynamic_hook
+        def pytest_playwright_configure_proxy(config):
+            return next_proxy()
+
+    :param func: The hook implementation.
+    """
+    setattr(func, _DYNAMIC, True)
+    return func
+
+
+@dataclass(frozen=True)
+class LaunchConfig:
+    """A resolved browser launch configuration.  Equality and hashing only
+    consider the engine and the fingerprint of the kwargs, so configurations
+    can key pools and groups; `key` matches the `BrowserPool` keys."""
+
+    engine: str
+    fingerprint: str
+    kwargs: types.MappingProxyType[str, typing.Any] = field(compare=False)
+
+    @classmethod
+    def create(cls: type[LaunchConfig], engine: str, kwargs: AnyDict) -> LaunchConfig:
+        """Freeze resolved launch kwargs.
+
+        :param engine: The browser engine name.
+        :param kwargs: The resolved browser launch kwargs.
+        """
+        return cls(engine, hash_kwargs(kwargs), types.MappingProxyType(dict(kwargs)))
+
+    @property
+    def key(self: LaunchConfig) -> tuple[str, str]:
+        return self.engine, self.fingerprint
+
+    def as_kwargs(self: LaunchConfig) -> AnyDict:
+        """Returns a (mutable) copy of the launch kwargs."""
+        return dict(self.kwargs)
+
+
+BrowserOverridesKey = pytest.StashKey[AnyDict]()
+ContextOverridesKey = pytest.StashKey[AnyDict]()
+LaunchConfigKey = pytest.StashKey[LaunchConfig]()
+
+
+class KwargsResolver:
+    """Resolves browser and context kwargs for tests, memoising the work that
+    does not change between tests.
+
+    The command line defaults (and the results of the proxy and debugging hooks)
+    are resolved once per engine per session, the marker overrides (including
+    any `callback=`) once per test item.  Hook implementations decorated with
+    `dynamic_hook` disable caching of the launch defaults, which implementations
+    are registered is itself checked once per session.
+    """
+
+    def __init__(self: KwargsResolver, config: pytest.Config) -> None:
+        self.config = config
+        self._browser_defaults: dict[str, LaunchConfig] = {}
+        self._context_defaults: AnyDict | None = None
+        self._dynamic: bool | None = None
+
+    def hooks_are_dynamic(self: KwargsResolver) -> bool:
+        """Returns if any implementation of the launch hooks opted out of caching."""
+        if self._dynamic is None:
+            self._dynamic = any(
+                getattr(impl.function, _DYNAMIC, False)
+                for name in CACHED_HOOKS
+                for impl in getattr(self.config.hook, name).get_hookimpls()
+            )
+        return self._dynamic
+
+    def browser_defaults(self: KwargsResolver, engine: str) -> LaunchConfig:
+        """The launch configuration of tests without `browser_kwargs` markers.
+
+        :param engine: The browser engine name.
+        """
+        if self.hooks_are_dynamic():
+            return LaunchConfig.create(
+                engine, resolve_browser_launch_defaults(self.config, engine)
+            )
+        if engine not in self._browser_defaults:
+            self._browser_defaults[engine] = LaunchConfig.create(
+                engine, resolve_browser_launch_defaults(self.config, engine)
+            )
+        return self._browser_defaults[engine]
+
+    def browser_overrides(self: KwargsResolver, item: pytest.Item) -> AnyDict:
+        """The `browser_kwargs` marker overrides of a test, do not mutate.
+
+        :param item: The test item.
+        """
+        if BrowserOverridesKey not in item.stash:
+            item.stash[BrowserOverridesKey] = parse_browser_kwargs_from_node(item, {})
+        return item.stash[BrowserOverridesKey]
+
+    def browser(self: KwargsResolver, item: pytest.Item, engine: str) -> LaunchConfig:
+        """The launch configuration of a test, defaults merged with its overrides.
+
+        :param item: The test item.
+        :param engine: The browser engine name.
+        """
+        cached = item.stash.get(LaunchConfigKey, None)
+        if (
+            cached is not None
+            and cached.engine == engine
+            and not self.hooks_are_dynamic()
+        ):
+            return cached
+        defaults = self.browser_defaults(engine)
+        overrides = self.browser_overrides(item)
+        launch_config = (
+            LaunchConfig.create(engine, {**defaults.kwargs, **overrides})
+            if overrides
+            else defaults
+        )
+        item.stash[LaunchConfigKey] = launch_config
+        return launch_config
+
+    def context_overrides(self: KwargsResolver, item: pytest.Item) -> AnyDict:
+        """The `context_kwargs` marker overrides of a test, do not mutate.
+
+        :param item: The test item.
+        """
+        if ContextOverridesKey not in item.stash:
+            item.stash[ContextOverridesKey] = parse_context_kwargs_from_node(item, {})
+        return item.stash[ContextOverridesKey]
+
+    def context(self: KwargsResolver, item: pytest.Item) -> AnyDict:
+        """The context kwargs of a test, defaults merged with its overrides.
+
+        :param item: The test item.
+        """
+        if self._context_defaults is None:
+            self._context_defaults = resolve_context_cli_flag_defaults(self.config)
+        return {**self._context_defaults, **self.context_overrides(item)}
+
+
+KwargsResolverKey = pytest.StashKey[KwargsResolver]()
+
+
+def get_resolver(config: pytest.Config) -> KwargsResolver:
+    """Returns the session wide `KwargsResolver`, creating it on first use.
+
+    :param config: The pytest config object.
+    """
+    if KwargsResolverKey not in config.stash:
+        config.stash[KwargsResolverKey] = KwargsResolver(config)
+    return config.stash[KwargsResolverKey]
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import typing
+
+import pytest
+from xdist.scheduler import LoadScopeScheduling
+
+from .resolution import get_resolver
+from .utils import hash_kwargs
+
+if typing.TYPE_CHECKING:
+    from .durations import DurationHistory
+
+if typing.TYPE_CHECKING:
+    from execnet.gateway_base import Producer
+    from xdist.workermanage import WorkerController
+
+# How many work units each worker should receive (on average), more units
+# balance load better, fewer keep groups on fewer workers.
+UNITS_PER_WORKER = 4
+
+
+def browser_group(item: pytest.Item) -> str:
+    """Returns the browser affinity group of a test item.  Items in the same
+    group launch the same engine with the same marker overrides and so can
+    share pooled browsers and contexts.
+
+    Only the overrides are fingerprinted, never the resolved launch defaults,
+    so the group does not depend on the command line or launch hooks of the
+    machine (shards partition on groups).
+
+    :param item: The collected test item.
+    """
+    callspec = getattr(item, "callspec", None)
+    engine = callspec.params.get("pw_multi_browser", "") if callspec else ""
+    if not engine:
+        return "|"
+    resolver = get_resolver(item.config)
+    fingerprint = ""
+    if browser_overrides := resolver.browser_overrides(item):
+        fingerprint = hash_kwargs(browser_overrides)[:12]
+    if context_overrides := resolver.context_overrides(item):
+        fingerprint += f"+{hash_kwargs(context_overrides)[:12]}"
+    return f"{engine}|{fingerprint}"
+
+
+def write_browser_groups(items: list[pytest.Item], path: pathlib.Path) -> None:
+    """Persist the browser group of every item for the xdist controller, the
+    controller only ever sees node ids.  The file is written atomically.
+
+    :param items: The collected test items.
+    :param path: The file to write.
+    """
+    groups = {item.nodeid: browser_group(item) for item in items}
+    partial = path.with_suffix(".partial")
+    partial.write_text(json.dumps(groups))
+    partial.replace(path)
+
+
+def read_browser_groups(directory: pathlib.Path) -> dict[str, str]:
+    """Read the browser groups written by any of the workers, all workers
+    collect the same items so the first file is sufficient.
+
+    :param directory: The directory the workers wrote their groups to.
+    """
+    for path in sorted(directory.glob("*.json")):
+        return json.loads(path.read_text())
+    return {}
+
+
+class BrowserAffinityScheduling(LoadScopeScheduling):
+    """An xdist scheduler which keeps tests of the same browser group on as few
+    workers as possible, so pooled browsers and contexts are not thrashed.
+
+    Each group is split into chunks (work units) of similar estimated duration,
+    using the recorded `DurationHistory` when there is one.  Workers are first
+    handed units of the group with the most remaining work per worker already on
+    it, then keep taking units (slowest first) from the group they are on until
+    it is exhausted, only then moving to another group.
+    """
+
+    def __init__(
+        self: BrowserAffinityScheduling,
+        config: pytest.Config,
+        log: Producer | None = None,
+        history: DurationHistory | None = None,
+    ) -> None:
+        super().__init__(config, log)
+        self.history = history
+        self._scopes: dict[str, str] = {}
+        self._weights: dict[str, float] = {}
+        self._node_group: dict[WorkerController, str] = {}
+
+    def schedule(self: BrowserAffinityScheduling) -> None:
+        # Without the groups reported by the workers this is plain
+        # `LoadScopeScheduling`.
+        affinity_dir = getattr(self.config, "affinity_dir", None)
+        if (
+            affinity_dir is not None
+            and self.collection is None
+            and self.registered_collections
+        ):
+            collection = next(iter(self.registered_collections.values()))
+            self._scopes = self._chunk_scopes(collection, pathlib.Path(affinity_dir))
+        super().schedule()
+
+    def _estimate(self: BrowserAffinityScheduling, nodeid: str) -> float:
+        return self.history.estimate(nodeid) if self.history is not None else 1.0
+
+    def _chunk_scopes(
+        self: BrowserAffinityScheduling,
+        collection: list[str],
+        affinity_dir: pathlib.Path,
+    ) -> dict[str, str]:
+        groups = read_browser_groups(affinity_dir)
+        weights = {nodeid: self._estimate(nodeid) for nodeid in collection}
+        target = sum(weights.values()) / (len(self.nodes) * UNITS_PER_WORKER)
+        # Slow tests are chunked (and so run) first within their group.
+        ordered = sorted(collection, key=weights.__getitem__, reverse=True)
+        chunks: dict[str, tuple[int, float]] = {}
+        scopes = {}
+        for nodeid in ordered:
+            group = groups.get(nodeid, "|")
+            index, weight = chunks.get(group, (0, 0.0))
+            if weight >= target:
+                index, weight = index + 1, 0.0
+            chunks[group] = (index, weight + weights[nodeid])
+            scope = f"{group}|{index}"
+            scopes[nodeid] = scope
+            self._weights[scope] = self._weights.get(scope, 0.0) + weights[nodeid]
+        return scopes
+
+    def _split_scope(self: BrowserAffinityScheduling, nodeid: str) -> str:
+        return self._scopes.get(nodeid) or super()._split_scope(nodeid)
+
+    @staticmethod
+    def _group_of(scope: str) -> str:
+        return scope.rsplit("|", 1)[0]
+
+    def _assign_work_unit(
+        self: BrowserAffinityScheduling, node: WorkerController
+    ) -> None:
+        if not self._scopes:
+            super()._assign_work_unit(node)
+            return
+        current = self._node_group.get(node)
+        scope = self._heaviest_scope(current)
+        if scope is None:
+            scope = self._heaviest_scope(self._least_served_group())
+        self._node_group[node] = self._group_of(scope)  # type: ignore[arg-type]
+        # The base class always assigns the unit at the front of the queue.
+        self.workqueue.move_to_end(scope, last=False)  # type: ignore[arg-type]
+        super()._assign_work_unit(node)
+
+    def _heaviest_scope(
+        self: BrowserAffinityScheduling, group: str | None
+    ) -> str | None:
+        scopes = [scope for scope in self.workqueue if self._group_of(scope) == group]
+        return max(
+            scopes, key=lambda scope: self._weights.get(scope, 0.0), default=None
+        )
+
+    def _least_served_group(self: BrowserAffinityScheduling) -> str:
+        remaining: dict[str, float] = {}
+        for scope in self.workqueue:
+            group = self._group_of(scope)
+            remaining[group] = remaining.get(group, 0.0) + self._weights.get(scope, 1.0)
+        workers: dict[str, int] = {}
+        for node, group in self._node_group.items():
+            if node in self.assigned_work:
+                workers[group] = workers.get(group, 0) + 1
+        return max(remaining, key=lambda g: remaining[g] / (workers.get(g, 0) + 1))
+
+
+def affinity_file(config: pytest.Config) -> pathlib.Path | None:
+    """Returns the file this worker should write its browser groups to, or
+    `None` when not running under the browser affinity scheduler."""
+    workerinput = getattr(config, "workerinput", None)
+    if not workerinput or not workerinput.get("affinity_dir"):
+        return None
+    worker = workerinput.get("workerid", str(os.getpid()))
+    return pathlib.Path(workerinput["affinity_dir"]) / f"{worker}.json"
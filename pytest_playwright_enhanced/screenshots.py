@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import time
+import typing
+import warnings
+
+import pytest
+from playwright import sync_api as pwsync
+from slugify import slugify
+
+if typing.TYPE_CHECKING:
+    from .artifacts import ArtifactStore
+
+
+def _can_gather(page: pwsync.Page) -> bool:
+    """If the private async page and dispatcher of the sync API are available,
+    they are not part of the public API and may change between releases."""
+    impl = getattr(page, "_impl_obj", None)
+    return callable(getattr(page, "_sync", None)) and inspect.iscoroutinefunction(
+        getattr(impl, "screenshot", None)
+    )
+
+
+def capture_screenshots(  # noqa: PLR0913
+    pages: typing.Sequence[pwsync.Page],
+    *,
+    timeout: float,
+    full_page: bool = False,
+    image_type: str = "png",
+    quality: int | None = None,
+    scale: str = "device",
+) -> list[bytes | Exception]:
+    """Capture a screenshot of every page concurrently, returning the bytes of
+    each page or the error capturing it failed with.
+
+    The sync API waits on one call at a time, so the screenshots of the
+    underlying async pages are gathered on the dispatcher loop instead.  A hung
+    page then costs at most `timeout` for all pages rather than per page.  Should
+    the async pages not be reachable (or not behave as expected), pages are
+    captured one at a time with the public API, sharing the `timeout` between
+    them.
+
+    :param pages: The open pages of a context.
+    :param timeout: The deadline in milliseconds shared by all pages.
+    :param full_page: Capture the full scrollable page.
+    :param image_type: `png` or `jpeg`.
+    :param quality: The jpeg quality, 0-100.
+    :param scale: `css` captures a pixel per css pixel, smaller on high dpi.
+    """
+    if not pages:
+        return []
+    sequentially = functools.partial(
+        _capture_sequentially,
+        pages,
+        timeout=timeout,
+        full_page=full_page,
+        type=image_type,
+        quality=quality,
+        scale=scale,
+    )
+    if not all(_can_gather(page) for page in pages):
+        return sequentially()
+    options = {
+        "timeout": timeout,
+        "fullPage": full_page,
+        "type": image_type,
+        "scale": scale,
+    }
+    if quality is not None:
+        options["quality"] = quality
+
+    async def gather() -> list[bytes | Exception]:
+        return await asyncio.gather(
+            *(page._impl_obj.screenshot(**options) for page in pages),
+            return_exceptions=True,
+        )
+
+    # Internals whose signature or behaviour changed fall back to the public API.
+    try:
+        captured = pages[0]._sync(gather())
+    except (AttributeError, TypeError):
+        return sequentially()
+    if any(
+        isinstance(result, (AttributeError, TypeError))
+        or not isinstance(result, (bytes, Exception))
+        for result in captured
+    ):
+        return sequentially()
+    return captured
+
+
+def store_screenshots(
+    store: ArtifactStore,
+    item: pytest.Item,
+    pages: typing.Sequence[pwsync.Page],
+    *,
+    full_page: bool,
+) -> None:
+    """Capture the pages of a test with the `--screenshot-*` options and add
+    them to the artifacts of the test, the bytes are written to disk in the
+    background.  Pages which could not be captured are warned about.
+
+    :param store: The artifact store.
+    :param item: The test item.
+    :param pages: The pages opened by the test context.
+    :param full_page: Capture the full scrollable page.
+    """
+    option = item.config.option
+    captured = capture_screenshots(
+        pages,
+        timeout=float(option.screenshot_timeout),
+        full_page=full_page,
+        image_type=option.screenshot_format,
+        quality=option.screenshot_quality,
+        scale=option.screenshot_scale,
+    )
+    for idx, screenshot in enumerate(captured):
+        if isinstance(screenshot, Exception):
+            warnings.warn(
+                pytest.PytestWarning(
+                    f"Failed to capture screenshot {idx} of {item.nodeid}: {screenshot}"
+                ),
+                stacklevel=1,
+            )
+            continue
+        store.add_bytes(
+            item.nodeid,
+            f"{slugify(item.name)}-{idx}.{option.screenshot_format}",
+            screenshot,
+        )
+
+
+def _capture_sequentially(
+    pages: typing.Sequence[pwsync.Page], *, timeout: float, **options: object
+) -> list[bytes | Exception]:
+    deadline = time.monotonic() + timeout / 1000
+    captured: list[bytes | Exception] = []
+    for page in pages:
+        # Every page is attempted, pages after a hung one get a millisecond.
+        remaining = max((deadline - time.monotonic()) * 1000, 1)
+        try:
+            captured.append(page.screenshot(timeout=remaining, **options))
+        except pwsync.Error as e:
+            captured.append(e)
+    return captured
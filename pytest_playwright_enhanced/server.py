@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import pathlib
+import subprocess
+import tempfile
+import threading
+import typing
+
+from .exceptions import BrowserServerError
+from .types import AnyDict
+
+# The driver is private to playwright, without it browsers are launched through
+# the sync api by the workers instead (see `BrowserServer.launch`).
+try:
+    from playwright._impl._driver import compute_driver_executable
+    from playwright._impl._driver import get_driver_env
+except ImportError:  # pragma: no cover
+    compute_driver_executable = get_driver_env = None  # type: ignore[assignment]
+
+# How long a server has to print its websocket endpoint, in seconds.
+DEFAULT_LAUNCH_TIMEOUT = 60.0
+
+# Python launch kwargs are snake_case, the node launchServer options are camelCase.
+_SIGNAL_OPTIONS = {
+    "handle_sighup": "handleSIGHUP",
+    "handle_sigint": "handleSIGINT",
+    "handle_sigterm": "handleSIGTERM",
+}
+
+
+def launch_server_options(launch_kwargs: AnyDict) -> AnyDict:
+    """Convert python browser launch kwargs into node `launchServer` options.
+
+    :param launch_kwargs: The resolved (snake_case) browser launch kwargs.
+    """
+    options = {}
+    for key, value in launch_kwargs.items():
+        if key in _SIGNAL_OPTIONS:
+            options[_SIGNAL_OPTIONS[key]] = value
+            continue
+        head, *tail = key.split("_")
+        options[head + "".join(part.capitalize() for part in tail)] = value
+    return options
+
+
+def _read_line(stream: typing.IO[str], timeout: float) -> str | None:
+    """Read a line from a pipe, `None` if none was written within the timeout.
+    Read on a thread, as selecting on pipes is not portable to windows.
+
+    :param stream: The pipe to read from.
+    :param timeout: The deadline, in seconds.
+    """
+    lines: list[str] = []
+    reader = threading.Thread(
+        target=lambda: lines.append(stream.readline()),
+        name="pwe-server-reader",
+        daemon=True,
+    )
+    reader.start()
+    reader.join(timeout)
+    return lines[0] if lines else None
+
+
+class BrowserServer:
+    """A browser launched in its own process through the playwright driver
+    `launch-server` command.  Clients attach to it with `BrowserType.connect`
+    using the `ws_endpoint`.
+
+    Unlike browsers launched through the sync api, this is not bound to the
+    thread (or driver) that launched it.
+    """
+
+    def __init__(
+        self: BrowserServer,
+        engine: str,
+        ws_endpoint: str,
+        process: subprocess.Popen[str],
+    ) -> None:
+        self.engine = engine
+        self.ws_endpoint = ws_endpoint
+        self._process = process
+
+    @classmethod
+    def launch(
+        cls: type[BrowserServer],
+        engine: str,
+        launch_kwargs: AnyDict,
+        timeout: float = DEFAULT_LAUNCH_TIMEOUT,
+    ) -> BrowserServer:
+        """Launch a browser server, blocking until it is accepting connections.
+        A server which is not accepting connections within `timeout` is killed.
+
+        :param engine: The browser engine name.
+        :param launch_kwargs: The resolved (snake_case) browser launch kwargs.
+        :param timeout: The seconds to wait for the server to start.
+        """
+        if compute_driver_executable is None:
+            reason = "this playwright version does not expose its driver"
+            raise BrowserServerError(engine, reason)
+        executable = compute_driver_executable()
+        driver = (
+            list(executable) if isinstance(executable, tuple) else [str(executable)]
+        )
+        fd, config = tempfile.mkstemp(prefix="pwe-server-", suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(launch_server_options(launch_kwargs), f)
+        # stderr is spooled to a file, a pipe that is never drained would
+        # eventually block a chatty (DEBUG=pw:*) server.
+        stderr = tempfile.TemporaryFile(mode="w+")  # noqa: SIM115
+        try:
+            process = subprocess.Popen(
+                [*driver, "launch-server", "--browser", engine, "--config", config],
+                env=get_driver_env(),
+                stdout=subprocess.PIPE,
+                stderr=stderr,
+                text=True,
+            )
+            line = _read_line(process.stdout, timeout)  # type: ignore[arg-type]
+        finally:
+            pathlib.Path(config).unlink()
+        ws_endpoint = (line or "").strip()
+        if not ws_endpoint.startswith("ws"):
+            process.kill()
+            process.wait()
+            stderr.seek(0)
+            reason = stderr.read().strip()
+            stderr.close()
+            if line is None:
+                reason = f"it did not start within {timeout:g}s (--pw-server-timeout) {reason}"
+            raise BrowserServerError(engine, reason)
+        stderr.close()
+        return cls(engine, ws_endpoint, process)
+
+    def is_running(self: BrowserServer) -> bool:
+        """Returns if the server process is still alive."""
+        return self._process.poll() is None
+
+    def close(self: BrowserServer) -> None:
+        """Terminate the server (and the browser it owns)."""
+        if not self.is_running():
+            return
+        self._process.terminate()
+        try:
+            self._process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+        with contextlib.suppress(OSError):
+            self._process.communicate()
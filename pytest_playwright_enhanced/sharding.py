@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import argparse
+
+import pytest
+
+from .durations import DurationHistory
+from .scheduler import browser_group
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """Parse a `--pw-shard` value of the form `INDEX/TOTAL`, INDEX is 1 based.
+
+    :param value: The raw command line value.
+    """
+    try:
+        index, total = (int(part) for part in value.split("/"))
+    except ValueError:
+        msg = f"expected INDEX/TOTAL, e.g. 1/4, got {value!r}"
+        raise argparse.ArgumentTypeError(msg) from None
+    if total < 1 or not 1 <= index <= total:
+        msg = f"shard index must be between 1 and the total, got {value!r}"
+        raise argparse.ArgumentTypeError(msg)
+    return index, total
+
+
+def shard_items(
+    items: list[pytest.Item],
+    index: int,
+    total: int,
+    history: DurationHistory | None = None,
+) -> tuple[list[pytest.Item], list[pytest.Item]]:
+    """Deterministically split the items into `total` shards of balanced
+    estimated duration, returning the items of shard `index` and the rest.
+
+    Items are laid out by browser group and node id, then cut into contiguous
+    runs of roughly equal duration, so a browser configuration spans at most
+    the shards at its boundaries.  Every shard has to see the same items and
+    the same duration history for the shards to be disjoint.
+
+    :param items: The collected (and selected) items.
+    :param index: The 1 based shard to select.
+    :param total: The number of shards.
+    :param history: Recorded durations, each item weighs the same without it.
+    """
+    weights = {
+        item.nodeid: history.estimate(item.nodeid) if history is not None else 1.0
+        for item in items
+    }
+    ordered = sorted(items, key=lambda item: (browser_group(item), item.nodeid))
+    share = sum(weights.values()) / total
+    selected, deselected = [], []
+    elapsed = 0.0
+    for item in ordered:
+        weight = weights[item.nodeid]
+        # An item belongs to the shard its midpoint falls in.
+        shard = min(int((elapsed + weight / 2) / share), total - 1) if share else 0
+        elapsed += weight
+        (selected if shard == index - 1 else deselected).append(item)
+    # Keep the collection order within the shard.
+    order = {item.nodeid: idx for idx, item in enumerate(items)}
+    selected.sort(key=lambda item: order[item.nodeid])
+    return selected, deselected
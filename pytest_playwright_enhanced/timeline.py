@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import json
+import pathlib
+import threading
+import time
+import typing
+
+import pytest
+
+# The track of the test (main) thread and of the artifact writer threads, within
+# the process track of each worker.
+MAIN_THREAD = 0
+ARTIFACT_THREAD = 1
+
+
+def worker_pid(worker: str) -> int:
+    """The process track of a worker, `gw3` is 4 and the controller (or a run
+    without xdist) is 0.
+
+    :param worker: The xdist worker id, or `main`.
+    """
+    return int(worker[2:]) + 1 if worker.startswith("gw") else 0
+
+
+class Timeline:
+    """Streams Chrome Trace Event Format spans of a worker (fixture phases, test
+    phases and artifact writes) to a JSON lines file next to `path`, merged by
+    the controller into `path` at the end of the session.  Timestamps are wall
+    clock microseconds, so the tracks of every worker line up.
+
+    :param path: The merged timeline.
+    :param worker: The xdist worker id, or `main`.
+    """
+
+    def __init__(self: Timeline, path: pathlib.Path, worker: str) -> None:
+        self.path = path
+        self.worker = worker
+        self.pid = worker_pid(worker)
+        self.part = path.with_name(f".{path.name}.{worker}.jsonl")
+        self._epoch = time.time() - time.perf_counter()
+        self._lock = threading.Lock()
+        self._file: typing.TextIO | None = None
+
+    def _metadata(self: Timeline) -> list[dict[str, typing.Any]]:
+        """Name the process track after the worker and its thread tracks."""
+        return [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": self.pid,
+                "args": {"name": self.worker},
+            },
+            *(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": self.pid,
+                    "tid": tid,
+                    "args": {"name": name},
+                }
+                for tid, name in (
+                    (MAIN_THREAD, "tests"),
+                    (ARTIFACT_THREAD, "artifacts"),
+                )
+            ),
+        ]
+
+    def _write(self: Timeline, event: dict[str, typing.Any]) -> None:
+        with self._lock:
+            if self._file is None:
+                self.part.parent.mkdir(parents=True, exist_ok=True)
+                self._file = self.part.open("w")
+                for metadata in self._metadata():
+                    self._file.write(json.dumps(metadata) + "\n")
+            self._file.write(json.dumps(event) + "\n")
+
+    def span(
+        self: Timeline,
+        name: str,
+        category: str,
+        started: float,
+        ended: float,
+        tid: int = MAIN_THREAD,
+        **args: object,
+    ) -> None:
+        """Record a complete span.
+
+        :param name: The name of the span, e.g. `context`.
+        :param category: The category of the span, e.g. `fixture`.
+        :param started: The `time.perf_counter()` the span started at.
+        :param ended: The `time.perf_counter()` the span ended at.
+        :param tid: The thread track of the span.
+        :param args: Shown alongside the span, e.g. the node id.
+        """
+        self._write(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": round((self._epoch + started) * 1e6),
+                "dur": round((ended - started) * 1e6),
+                "pid": self.pid,
+                "tid": tid,
+                "args": args,
+            }
+        )
+
+    def close(self: Timeline) -> None:
+        """Flush the events of this worker."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _phase(
+        self: Timeline, item: pytest.Item, phase: str
+    ) -> typing.Generator[None, None, None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.span(phase, "test", started, time.perf_counter(), nodeid=item.nodeid)
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_setup(
+        self: Timeline, item: pytest.Item
+    ) -> typing.Generator[None, None, None]:
+        return (yield from self._phase(item, "setup"))
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_call(
+        self: Timeline, item: pytest.Item
+    ) -> typing.Generator[None, None, None]:
+        return (yield from self._phase(item, "call"))
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_teardown(
+        self: Timeline, item: pytest.Item
+    ) -> typing.Generator[None, None, None]:
+        return (yield from self._phase(item, "teardown"))
+
+
+def merge_timelines(path: pathlib.Path) -> None:
+    """Merge the per worker event files into a single trace at `path`, which
+    opens in Perfetto or `chrome://tracing`.
+
+    :param path: The merged timeline.
+    """
+    parts = sorted(path.parent.glob(f".{path.name}.*.jsonl"))
+    with path.open("w") as out:
+        out.write('{"displayTimeUnit": "ms", "traceEvents": [\n')
+        first = True
+        for part in parts:
+            with part.open() as f:
+                for line in f:
+                    out.write(("" if first else ",\n") + line.rstrip("\n"))
+                    first = False
+            part.unlink()
+        out.write("\n]}\n")
+
+
+TimelineKey = pytest.StashKey[Timeline]()
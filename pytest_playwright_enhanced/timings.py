@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import json
+import math
+import pathlib
+import time
+import typing
+
+import pytest
+
+from .timeline import TimelineKey
+
+# The lifecycle phases of a test, in the order they happen.
+PHASES = (
+    "playwright",
+    "browser",
+    "context",
+    "page",
+    "call",
+    "page_teardown",
+    "context_teardown",
+    "browser_teardown",
+    "playwright_teardown",
+)
+# The attribute of teardown reports carrying the timings to the controller.
+REPORT_ATTRIBUTE = "pw_timings"
+SLOWEST = 5
+
+TimingsKey = pytest.StashKey[typing.Dict[str, float]]()
+
+
+def record_timing(item: pytest.Item, phase: str, started: float) -> None:
+    """Add the time since `started` (a `time.perf_counter()`) to a phase of a
+    test, and to the `--pw-timeline`.  Does nothing unless either is enabled.
+
+    :param item: The test item.
+    :param phase: One of `PHASES`.
+    :param started: When the phase began.
+    """
+    timings = item.stash.get(TimingsKey, None)
+    timeline = item.config.stash.get(TimelineKey, None)
+    if timings is None and timeline is None:
+        return
+    ended = time.perf_counter()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + ended - started
+    if timeline is not None:
+        timeline.span(phase, "fixture", started, ended, nodeid=item.nodeid)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """The nearest rank percentile of sorted values.
+
+    :param values: Sorted values.
+    :param fraction: The percentile, e.g. 0.95.
+    """
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)]
+
+
+class TimingsReport:
+    """Collects the lifecycle timings of every test, registered in the controller
+    only, which receives the reports of all xdist workers.  Summarised in the
+    terminal with `--pw-timings` and written as JSON with `--pw-timings-json`.
+    """
+
+    def __init__(
+        self: TimingsReport, *, terminal: bool, path: pathlib.Path | None
+    ) -> None:
+        self.terminal = terminal
+        self.path = path
+        self.tests: dict[str, dict[str, float]] = {}
+
+    def summary(self: TimingsReport) -> dict[str, dict[str, float]]:
+        """Statistics of each phase across tests, in seconds."""
+        summary = {}
+        for phase in PHASES:
+            values = sorted(
+                timings[phase] for timings in self.tests.values() if phase in timings
+            )
+            if values:
+                summary[phase] = {
+                    "tests": len(values),
+                    "total": sum(values),
+                    "mean": sum(values) / len(values),
+                    "p50": percentile(values, 0.5),
+                    "p95": percentile(values, 0.95),
+                    "max": values[-1],
+                }
+        return summary
+
+    @pytest.hookimpl
+    def pytest_runtest_logreport(
+        self: TimingsReport, report: pytest.TestReport
+    ) -> None:
+        timings = getattr(report, REPORT_ATTRIBUTE, None)
+        if report.when == "teardown" and timings:
+            self.tests[report.nodeid] = timings
+
+    @pytest.hookimpl
+    def pytest_sessionfinish(self: TimingsReport) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(
+            json.dumps({"summary": self.summary(), "tests": self.tests}, indent=2)
+        )
+
+    @pytest.hookimpl
+    def pytest_terminal_summary(
+        self: TimingsReport, terminalreporter: pytest.TerminalReporter
+    ) -> None:
+        if not self.terminal or not self.tests:
+            return
+        terminalreporter.write_sep("-", "playwright timings (ms)")
+        terminalreporter.write_line(
+            f"{'phase':<20}{'tests':>7}{'total':>11}{'mean':>9}{'p50':>9}{'p95':>9}{'max':>9}"
+        )
+        for phase, stats in self.summary().items():
+            terminalreporter.write_line(
+                f"{phase:<20}{stats['tests']:>7}{stats['total'] * 1000:>11.0f}"
+                + "".join(
+                    f"{stats[stat] * 1000:>9.1f}"
+                    for stat in ("mean", "p50", "p95", "max")
+                )
+            )
+        overhead = sorted(
+            (
+                (sum(t for p, t in timings.items() if p != "call"), nodeid)
+                for nodeid, timings in self.tests.items()
+            ),
+            reverse=True,
+        )[:SLOWEST]
+        terminalreporter.write_line("")
+        terminalreporter.write_line("slowest setup and teardown:")
+        for seconds, nodeid in overhead:
+            terminalreporter.write_line(f"{seconds * 1000:>9.1f} {nodeid}")
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import collections
+import pathlib
+import shutil
+import tempfile
+import weakref
+import zlib
+
+from playwright import sync_api as pwsync
+
+from .artifacts import ArtifactStore
+from .const import TraceMode
+from .const import TracePreset
+
+# The light preset skips sources and the screencast, the most expensive parts
+# of a trace, and keeps the DOM snapshots that make a trace useful.
+_PRESETS = {
+    TracePreset.FULL: {"snapshots": True, "sources": True},
+    TracePreset.LIGHT: {"snapshots": True, "sources": False, "screenshots": False},
+}
+
+
+class TraceRecorder:
+    """Records playwright traces for tests and keeps only those of failures.
+
+    In `chunked` mode tracing is started once per context and each test records
+    a chunk, which is cheap for contexts reused between tests.  A sample of the
+    tests (by node id, so reruns trace the same tests) can be traced rather than
+    all of them.  With a `ring_size`, the chunks of the most recent passing tests
+    are kept in a temporary directory and written alongside the next failure,
+    as state leaking from earlier tests is a common cause of failures.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self: TraceRecorder,
+        store: ArtifactStore,
+        *,
+        mode: str = TraceMode.FULL,
+        preset: str = TracePreset.FULL,
+        sample_rate: float = 1.0,
+        ring_size: int = 0,
+        screenshots: bool = False,
+    ) -> None:
+        self.store = store
+        self.chunked = mode == TraceMode.CHUNKED
+        self.options = {"screenshots": screenshots, **_PRESETS[preset]}
+        self.sample_rate = sample_rate
+        self._started: weakref.WeakSet[pwsync.BrowserContext] = weakref.WeakSet()
+        self._ring: collections.deque[pathlib.Path] = collections.deque()
+        self.ring_size = ring_size
+        self._ring_dir = tempfile.mkdtemp(prefix="pwe-traces-") if ring_size else None
+        self._recorded = 0
+
+    def sampled(self: TraceRecorder, nodeid: str) -> bool:
+        """Returns if the test should be traced.
+
+        :param nodeid: The test node id.
+        """
+        return zlib.crc32(nodeid.encode()) / 2**32 < self.sample_rate
+
+    def start(self: TraceRecorder, context: pwsync.BrowserContext, title: str) -> None:
+        """Begin tracing a test.
+
+        :param context: The context the test uses.
+        :param title: The title of the trace.
+        """
+        if not self.chunked:
+            context.tracing.start(title=title, **self.options)
+            return
+        if context not in self._started:
+            context.tracing.start(**self.options)
+            self._started.add(context)
+        context.tracing.start_chunk(title=title)
+
+    def stop(
+        self: TraceRecorder,
+        context: pwsync.BrowserContext,
+        nodeid: str,
+        name: str | None,
+    ) -> None:
+        """Finish tracing a test, the trace is stored as `name` for failed tests
+        (along with the ring of earlier traces) and otherwise discarded.
+
+        :param context: The context the test used.
+        :param nodeid: The node id of the test.
+        :param name: The artifact name of the trace, `None` if the test passed.
+        """
+        if name is None and self._ring_dir is not None:
+            self._recorded += 1
+            path = pathlib.Path(self._ring_dir, f"{self._recorded}.zip")
+            self._stop(context, path)
+            self._ring.append(path)
+            if len(self._ring) > self.ring_size:
+                self.store.discard(self._ring.popleft())
+            return
+        if name is None:
+            # Outside of chunked mode the trace is discarded when the context closes.
+            if self.chunked:
+                context.tracing.stop_chunk()
+            return
+        path = self.store.staging_path(name)
+        self._stop(context, path)
+        self.store.add_file(nodeid, name, path)
+        stem = pathlib.Path(name).stem
+        for age, previous in enumerate(reversed(self._ring), start=1):
+            self.store.add_file(nodeid, f"{stem}-before-{age}.zip", previous)
+        self._ring.clear()
+
+    def _stop(
+        self: TraceRecorder, context: pwsync.BrowserContext, path: pathlib.Path
+    ) -> None:
+        if self.chunked:
+            context.tracing.stop_chunk(path=path)
+        else:
+            context.tracing.stop(path=path)
+
+    def close(self: TraceRecorder) -> None:
+        """Remove the ring of traces, pending artifact writes must be flushed first."""
+        if self._ring_dir is not None:
+            shutil.rmtree(self._ring_dir, ignore_errors=True)
@@ -1,7 +1,14 @@
 from __future__ import annotations
 
+import contextlib
+import hashlib
+import json
 import os
+import pathlib
+import re
+import sys
 from typing import Any
+from typing import Iterator
 
 import pytest
 
@@ -9,6 +16,13 @@ from .const import SupportedBrowsers
 from .exceptions import PWEMarkerError
 from .launch_kwargs_strategy import STRATEGY_FACTORY
 
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+_ADDRESS = re.compile(r" at 0x[0-9a-fA-F]+")
+
 
 def register_env_defer(var: str, val: str, config: pytest.Config) -> None:
     """Register an environment variable and a clean up call back
@@ -49,7 +63,7 @@ def parse_browser_kwargs_from_node(
     :param item: The `pytest.Item` for the executing test.
     :param default: A mapping to return if the marker cannot be found on the test.
     """
-    parsed = _check_for_marker(item, "browser_kwargs")
+    parsed = marker_kwargs(item, "browser_kwargs")
     return parsed or default
 
 
@@ -62,13 +76,19 @@ def parse_context_kwargs_from_node(
     :param item: The `pytest.Item` for the executing test.
     :param default: A mapping to return if the marker cannot be found on the test.
     """
-    parsed = _check_for_marker(item, "context_kwargs")
+    parsed = marker_kwargs(item, "context_kwargs")
     return parsed or default
 
 
-def _check_for_marker(item: pytest.Item, marker_name: str) -> dict[str, Any]:
-    """Attempt to parse a browser or context marker to grab the user defied
-    keyword args."""
+def marker_kwargs(item: pytest.Item, marker_name: str) -> dict[str, Any]:
+    """Returns the keyword args of the closest marker of a test, merged with the
+    result of its `callback(item)` keyword if there is one.  Markers of the plugin
+    only take keyword args.
+
+    :param item: The `pytest.Item` for the executing test.
+    :param marker_name: The name of the marker.
+    :raises PWEMarkerError: If the marker was given positional args.
+    """
     marker = item.get_closest_marker(marker_name)
     if marker is None:
         return {}
@@ -116,6 +136,30 @@ def resolve_browser_cli_flag_defaults(
     return STRATEGY_FACTORY[engine](defaults)
 
 
+def resolve_browser_launch_defaults(
+    config: pytest.Config, engine: str
+) -> dict[str, Any]:
+    """Given the pytest config, returns the browser launch kwargs for tests
+    without any `browser_kwargs` marker overrides.  These are the command line
+    defaults combined with the results of the plugin proxy and debugging hooks.
+
+    :param config: The `pytest.Config` object.
+    :param engine: The browser engine to return options for.
+    """
+    defaults = resolve_browser_cli_flag_defaults(config, engine)
+    if (
+        proxy := config.hook.pytest_playwright_configure_proxy(config=config)
+    ) is not None:
+        # Allow user defined hooks to implement a proxy at runtime.
+        defaults["proxy"] = proxy
+
+    # Handle some debugging magic, if an IDE or debug mode is detected, automatically
+    # force the browsers to open headed.
+    if config.hook.pytest_playwright_is_debugging(config=config):
+        defaults["headless"] = False
+    return defaults
+
+
 def resolve_context_cli_flag_defaults(config: pytest.Config) -> dict[Any, Any]:
     """Parses context-specific options from the global command line
     options.
@@ -151,6 +195,25 @@ def test_was_not_skipped_and_passed(item: pytest.Item, key: pytest.StashKey) ->
     return setup_ok and call_ok
 
 
+def pooled_engines(items: list[pytest.Item]) -> tuple[str, ...]:
+    """Returns the distinct browser engines, in collection order, that the
+    items will launch through the browser pool.  Items with `browser_kwargs`
+    markers receive dedicated browsers and are ignored.
+
+    :param items: The collected test items.
+    """
+    engines: dict[str, None] = {}
+    for item in items:
+        if "pw_browser" not in getattr(item, "fixturenames", ()):
+            continue
+        if item.get_closest_marker("browser_kwargs") is not None:
+            continue
+        callspec = getattr(item, "callspec", None)
+        if callspec is not None and "pw_multi_browser" in callspec.params:
+            engines[callspec.params["pw_multi_browser"]] = None
+    return tuple(engines)
+
+
 def get_artifacts_dir_from_node(pytestconfig: pytest.Config) -> str:
     """Fetches the artifacts directory in an xdist compatible way."""
     if hasattr(pytestconfig, "workerinput"):
@@ -158,9 +221,99 @@ def get_artifacts_dir_from_node(pytestconfig: pytest.Config) -> str:
     return pytestconfig.artifacts_dir
 
 
+def get_browser_servers_from_node(
+    pytestconfig: pytest.Config,
+) -> dict[tuple[str, str], str]:
+    """Fetches the browser servers shared by the controller in an xdist
+    compatible way.  Returns a mapping of (engine, launch kwargs hash) to
+    the websocket endpoint of the server."""
+    if hasattr(pytestconfig, "workerinput"):
+        servers = pytestconfig.workerinput.get("browser_servers", [])
+    else:
+        servers = getattr(pytestconfig, "browser_servers", [])
+    return {(engine, key): ws_endpoint for engine, key, ws_endpoint in servers}
+
+
 def check_engine(engine: str) -> None:
     """Enforces the engine is valid.  Engine can be derived from multiple
     different sources."""
     if engine not in SupportedBrowsers:
         err = f"{engine} is not a valid browser engine, choose one of {SupportedBrowsers}."
         raise pytest.UsageError(err)
+
+
+def _stable_repr(value: Any) -> str:  # noqa: ANN401
+    """A representation of a value which is the same in every process: callables
+    (e.g. marker `callback`s) are named by their qualified name and memory
+    addresses are stripped from any other `repr`."""
+    if callable(value):
+        module = getattr(value, "__module__", None)
+        name = getattr(value, "__qualname__", None) or type(value).__qualname__
+        return f"{module}.{name}"
+    return _ADDRESS.sub("", repr(value))
+
+
+def reset_fixture_request(item: pytest.Item) -> bool:
+    """Re-create the fixture request of a test which already ran, so running it
+    again sets up its function scoped fixtures afresh.  Returns if the request
+    could be reset.
+
+    pytest has no public API for this, `Function._initrequest` (which plugins such
+    as pytest-rerunfailures rely on too) is used when it exists.
+
+    :param item: The test item.
+    """
+    initrequest = getattr(item, "_initrequest", None)
+    if not isinstance(item, pytest.Function) or initrequest is None:
+        return False
+    initrequest()
+    return True
+
+
+# The options of plugins which re-run tests through the runtest protocol, which
+# `--record-on-retry` takes over for browser tests.
+_RERUN_OPTIONS = (("--reruns", "reruns"), ("--flake-finder", "flake_finder_enable"))
+
+
+def conflicting_rerun_options(config: pytest.Config) -> list[str]:
+    """Returns the enabled options of other plugins re-running tests, which
+    would never take effect on browser tests with `--record-on-retry`.
+
+    :param config: The pytest config object.
+    """
+    return [flag for flag, dest in _RERUN_OPTIONS if getattr(config.option, dest, None)]
+
+
+def hash_kwargs(kwargs: dict[str, Any]) -> str:
+    """Returns a canonical hash of a kwargs mapping, two mappings with
+    the same keys and values hash identically regardless of their order.
+    The hash is stable across processes, so xdist workers and CI machines agree.
+
+    :param kwargs: The (launch or context) kwargs to hash.
+
+    Values which are not json serializable fall back to a stable `repr`."""
+    canonical = json.dumps(kwargs, sort_keys=True, default=_stable_repr)
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+@contextlib.contextmanager
+def file_lock(path: pathlib.Path) -> Iterator[None]:
+    """Hold an exclusive lock on `path` (created if missing), serialising access
+    to files shared between xdist workers.
+
+    :param path: The lock file.
+    """
+    with path.open("a+b") as lock:
+        if sys.platform == "win32":
+            lock.seek(0)
+            msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if sys.platform == "win32":
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(lock, fcntl.LOCK_UN)
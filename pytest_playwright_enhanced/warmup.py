@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import concurrent.futures
+import typing
+
+from .server import DEFAULT_LAUNCH_TIMEOUT
+from .server import BrowserServer
+
+if typing.TYPE_CHECKING:
+    from .resolution import LaunchConfig
+
+
+class BrowserWarmup:
+    """Launches browser servers on background threads while collection and
+    scheduling finish, so the first test of each worker does not sit idle
+    through a browser launch.
+
+    Servers are keyed identically to the `BrowserPool`, the pool takes the
+    server matching a launch configuration and connects to it instead of
+    launching a browser of its own.
+    """
+
+    def __init__(self: BrowserWarmup, timeout: float = DEFAULT_LAUNCH_TIMEOUT) -> None:
+        self.timeout = timeout
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            thread_name_prefix="pwe-warmup"
+        )
+        self._servers: dict[
+            tuple[str, str], concurrent.futures.Future[BrowserServer]
+        ] = {}
+
+    def start(self: BrowserWarmup, launch: LaunchConfig) -> None:
+        """Begin launching a browser server in the background, a launch that is
+        already in flight for the same configuration is not repeated.
+
+        :param launch: The resolved launch configuration.
+        """
+        if launch.key not in self._servers:
+            self._servers[launch.key] = self._executor.submit(
+                BrowserServer.launch, launch.engine, launch.as_kwargs(), self.timeout
+            )
+
+    def take(self: BrowserWarmup, launch: LaunchConfig) -> BrowserServer | None:
+        """Hand over the warmed up server for the configuration, waiting for it
+        if it is still launching.  Returns `None` if there is no server or it
+        failed to launch, the caller should then launch a browser itself.
+
+        :param launch: The resolved launch configuration.
+        """
+        future = self._servers.pop(launch.key, None)
+        if future is None or future.exception() is not None:
+            return None
+        return future.result()
+
+    def close(self: BrowserWarmup) -> None:
+        """Terminate any servers that were never taken."""
+        self._executor.shutdown(wait=True)
+        for future in self._servers.values():
+            if future.exception() is None:
+                future.result().close()
+        self._servers.clear()
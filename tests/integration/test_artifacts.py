@@ -314,3 +314,104 @@ def test_when_failing_without_flag_no_screenshots(
 
 
 # Todo: Add a test that encompasses all 3 artifacts, for multiple spawned pages in each
+
+
+def test_chunked_tracing_with_context_reuse_keeps_the_ring(
+    pytester: pytest.Pytester,
+    launch_browser_flags: str,
+) -> None:
+    pytester.makepyfile("""
+        import pytest
+
+        @pytest.mark.parametrize("_", range(3))
+        def test_passes(pw_page, _):
+            pw_page.set_content("<p>ok</p>")
+
+        def test_fails(pw_page):
+            assert False
+""")
+    result = pytester.runpytest(
+        launch_browser_flags,
+        "--trace-on-fail",
+        "--trace-mode",
+        "chunked",
+        "--trace-preset",
+        "light",
+        "--trace-ring-size",
+        "2",
+        "--context-reuse",
+    )
+    result.assert_outcomes(passed=3, failed=1)
+    assert artifact_files(pytester, "zip") == {
+        "test-fails-chromium-trace.zip",
+        "test-fails-chromium-trace-before-1.zip",
+        "test-fails-chromium-trace-before-2.zip",
+    }
+
+
+def test_record_on_retry_reruns_failures_once(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile("""
+        import pytest
+        from pytest_playwright_enhanced.plugin import RecordingKey
+
+        RUNS = []
+
+        @pytest.fixture
+        def pw_context(request):
+            RUNS.append((request.node.name, request.node.stash.get(RecordingKey, False)))
+
+        def test_fails(pw_context):
+            assert False
+
+        def test_passes(pw_context):
+            ...
+
+        def test_runs():
+            assert RUNS == [
+                ("test_fails", False),
+                ("test_fails", True),
+                ("test_passes", False),
+            ]
+""")
+    result = pytester.runpytest("--record-on-retry")
+    result.assert_outcomes(passed=2, failed=1)
+    result.stdout.fnmatch_lines(
+        ["*record on retry*", "Re-ran with recording enabled, it failed."]
+    )
+
+
+def test_record_on_retry_only_keeps_rerun_artifacts(
+    pytester: pytest.Pytester,
+    launch_browser_flags: str,
+) -> None:
+    pytester.makepyfile("""
+        def test_passes(pw_page):
+            ...
+
+        def test_fails(pw_page):
+            assert False
+""")
+    result = pytester.runpytest(launch_browser_flags, "--record-on-retry")
+    result.assert_outcomes(passed=1, failed=1)
+    assert artifact_files(pytester, "webm") == {"test-fails-chromium-0.webm"}
+    assert artifact_files(pytester, "png") == {"test-fails-chromium-0.png"}
+    assert artifact_files(pytester, "zip") == {"test-fails-chromium-trace.zip"}
+
+
+def test_record_on_retry_keeps_artifacts_of_a_passing_rerun(
+    pytester: pytest.Pytester,
+    launch_browser_flags: str,
+) -> None:
+    pytester.makepyfile("""
+        RUNS = []
+
+        def test_flaky(pw_page):
+            RUNS.append(1)
+            assert len(RUNS) > 1
+""")
+    result = pytester.runpytest(launch_browser_flags, "--record-on-retry")
+    result.assert_outcomes(failed=1)
+    result.stdout.fnmatch_lines(["Re-ran with recording enabled, it passed."])
+    assert artifact_files(pytester, "webm") == {"test-flaky-chromium-0.webm"}
+    assert artifact_files(pytester, "png") == {"test-flaky-chromium-0.png"}
+    assert artifact_files(pytester, "zip") == {"test-flaky-chromium-trace.zip"}
@@ -1,5 +1,7 @@
 import pytest
 
+from pytest_playwright_enhanced.server import BrowserServer
+
 pytestmark = pytest.mark.browsers
 
 
@@ -243,3 +245,155 @@ def test_custom_plugin_overwrites_proxy(pytester: pytest.Pytester) -> None:
             assert pw_browser_kwargs['proxy']['password'] == 'no'
 """)
     pytester.runpytest().assert_outcomes(passed=1)
+
+
+def test_browser_reuse_default(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile("""
+        def test_browser_reuse_off(pytestconfig, pw_browser_pool):
+            assert pytestconfig.option.browser_reuse == "no"
+            assert pw_browser_pool is None
+""")
+    pytester.runpytest().assert_outcomes(passed=1)
+
+
+def test_browser_reuse_worker_shares_browsers(
+    pytester: pytest.Pytester, launch_browser_flags: str
+) -> None:
+    pytester.makepyfile("""
+        import pytest
+
+        seen = set()
+
+        @pytest.mark.parametrize("_", range(3))
+        def test_shared(pw_browser, _):
+            seen.add(id(pw_browser))
+            assert len(seen) == 1
+
+        @pytest.mark.browser_kwargs(slow_mo=1)
+        def test_dedicated(pw_browser):
+            assert id(pw_browser) not in seen
+""")
+    result = pytester.runpytest(launch_browser_flags, "--browser-reuse", "worker")
+    result.assert_outcomes(passed=4)
+
+
+def test_prelaunch_browsers_implies_browser_reuse(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile("""
+        from pytest_playwright_enhanced.plugin import WarmupKey
+
+        def test_prelaunch(pytestconfig, pw_browser_pool):
+            assert pytestconfig.option.browser_reuse == "worker"
+            assert WarmupKey in pytestconfig.stash
+""")
+    pytester.runpytest("--prelaunch-browsers").assert_outcomes(passed=1)
+
+
+def test_prelaunched_browsers_are_used(
+    pytester: pytest.Pytester, launch_browser_flags: str
+) -> None:
+    pytester.makepyfile("""
+        def test_prelaunched(pw_browser, pw_multi_browser):
+            assert pw_browser.is_connected()
+""")
+    result = pytester.runpytest(
+        launch_browser_flags,
+        "--prelaunch-browsers",
+        "--browser",
+        "chromium",
+        "--browser",
+        "firefox",
+    )
+    result.assert_outcomes(passed=2)
+
+
+def test_controller_browser_servers_are_shared_with_workers(
+    pytester: pytest.Pytester, launch_browser_flags: str
+) -> None:
+    pytester.makepyfile("""
+        import pytest
+
+        @pytest.mark.parametrize("_", range(4))
+        def test_connected(pw_browser, _):
+            assert pw_browser.is_connected()
+            assert pw_browser.browser_type.name == "chromium"
+""")
+    result = pytester.runpytest(
+        launch_browser_flags, "-n", "2", "--browser-reuse", "controller"
+    )
+    result.assert_outcomes(passed=4)
+
+
+def test_selenium_grid_is_passed_to_playwright(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile("""
+        import os
+
+        def test_selenium_grid():
+            assert os.environ["SELENIUM_REMOTE_URL"] == "http://grid:4444"
+""")
+    pytester.runpytest("--selenium-grid", "http://grid:4444").assert_outcomes(passed=1)
+
+
+def test_remote_browser_connects_to_server(
+    pytester: pytest.Pytester, launch_browser_flags: str
+) -> None:
+    server = BrowserServer.launch("chromium", {"headless": True})
+    try:
+        pytester.makepyfile("""
+            def test_remote(pw_browser, pw_browser_pool):
+                assert pw_browser_pool is not None
+                assert pw_browser.is_connected()
+    """)
+        result = pytester.runpytest(
+            launch_browser_flags, "--remote-browser", server.ws_endpoint
+        )
+        result.assert_outcomes(passed=1)
+    finally:
+        server.close()
+
+
+def test_unreachable_remote_browser_fails(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile("""
+        def test_remote(pw_browser):
+            ...
+    """)
+    result = pytester.runpytest(
+        "--remote-browser", "ws://127.0.0.1:1/", "--remote-browser-retries", "1"
+    )
+    result.assert_outcomes(errors=1)
+    result.stdout.fnmatch_lines(["*ws://127.0.0.1:1/ is unreachable*"])
+
+
+def test_negative_remote_browser_retries_is_a_usage_error(
+    pytester: pytest.Pytester,
+) -> None:
+    result = pytester.runpytest("--remote-browser-retries", "-1")
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+    result.stderr.fnmatch_lines(["*--remote-browser-retries must not be negative*"])
+
+
+def test_browser_affinity_scheduling(
+    pytester: pytest.Pytester, launch_browser_flags: str
+) -> None:
+    pytester.makepyfile("""
+        import pytest
+
+        @pytest.mark.parametrize("_", range(4))
+        def test_chromium(pw_page, _):
+            ...
+
+        @pytest.mark.parametrize("_", range(4))
+        @pytest.mark.browser_kwargs(slow_mo=1)
+        def test_slow(pw_page, _):
+            ...
+""")
+    result = pytester.runpytest(
+        launch_browser_flags, "-n", "2", "--pw-dist", "browser", "-v"
+    )
+    result.assert_outcomes(passed=8)
+    # Each worker starts on its own browser group.
+    first = {}
+    for line in result.outlines:
+        if "PASSED" in line:
+            worker, *_, nodeid = line.split()
+            first.setdefault(worker, nodeid.split("[")[0])
+    assert len(set(first.values())) == 2  # noqa: PLR2004
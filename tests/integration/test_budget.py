@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import pytest
+
+
+def test_artifacts_over_budget_are_summarised(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile("""
+        import pytest
+
+        from pytest_playwright_enhanced.plugin import ArtifactStoreKey
+
+        @pytest.mark.parametrize("idx", range(4))
+        def test_a(pytestconfig, request, idx):
+            store = pytestconfig.stash[ArtifactStoreKey]
+            store.add_bytes(request.node.nodeid, f"{idx}.png", b"x" * 1024)
+            store.add_bytes(request.node.nodeid, f"{idx}.webm", b"x" * 1024)
+""")
+    result = pytester.runpytest("-n", "2", "--artifacts-max-bytes", "3K")
+    result.assert_outcomes(passed=4)
+    result.stdout.fnmatch_lines(
+        [
+            "*playwright artifacts over budget*",
+            "skipped 1 screenshot artifact(s), 0.0 MiB, exceeding the run budget",
+            "skipped 4 video artifact(s), 0.0 MiB, exceeding the run budget",
+        ]
+    )
+    manifest = pytester.path / "playwright-enhanced-results" / "manifest.jsonl"
+    assert len(manifest.read_text().splitlines()) == 8  # noqa: PLR2004
@@ -67,3 +67,36 @@ def test_context_kwargs_dynamic_callback_is_merged(pytester: pytest.Pytester) ->
             assert pw_context_kwargs['item'] == request.node.name
 """)
     pytester.runpytest().assert_outcomes(passed=1)
+
+
+def test_context_reuse_implies_browser_reuse(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile("""
+        def test_context_reuse(pytestconfig, pw_context_pool, pw_browser_pool):
+            assert pytestconfig.option.browser_reuse == "worker"
+            assert pw_context_pool is not None
+            assert pw_browser_pool is not None
+""")
+    pytester.runpytest("--context-reuse").assert_outcomes(passed=1)
+
+
+def test_context_reuse_resets_state(
+    pytester: pytest.Pytester, launch_browser_flags: str
+) -> None:
+    pytester.makepyfile("""
+        seen = []
+
+        def test_dirty(pw_context, pw_page):
+            # Holding on to the context, its id can not be reused by another object.
+            seen.append(pw_context)
+            pw_page.goto("https://www.google.com")
+            pw_page.evaluate("localStorage.setItem('dirty', '1')")
+            pw_context.new_page()
+
+        def test_clean(pw_context, pw_page):
+            assert any(context is pw_context for context in seen)
+            assert len(pw_context.pages) == 1
+            pw_page.goto("https://www.google.com")
+            assert pw_page.evaluate("localStorage.getItem('dirty')") is None
+""")
+    result = pytester.runpytest(launch_browser_flags, "--context-reuse")
+    result.assert_outcomes(passed=2)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from pytest_playwright_enhanced.durations import CACHE_KEY
+
+
+def recorded(pytester: pytest.Pytester) -> dict[str, float]:
+    path = pytester.path / ".pytest_cache" / "v" / CACHE_KEY
+    return json.loads(path.read_text())
+
+
+def test_durations_are_recorded_and_order_tests(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile("""
+        import time
+
+        def test_fast():
+            ...
+
+        def test_slow():
+            time.sleep(0.2)
+""")
+    pytester.runpytest().assert_outcomes(passed=2)
+    durations = recorded(pytester)
+    assert durations["test_durations_are_recorded_and_order_tests.py::test_slow"] > 0.2  # noqa: PLR2004
+    result = pytester.runpytest("--duration-order", "-v")
+    result.assert_outcomes(passed=2)
+    result.stdout.re_match_lines([".*::test_slow PASSED", ".*::test_fast PASSED"])
+
+
+def test_durations_are_recorded_by_the_controller(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile("""
+        import pytest
+
+        @pytest.mark.parametrize("_", range(4))
+        def test_a(_):
+            ...
+""")
+    pytester.runpytest("-n", "2").assert_outcomes(passed=4)
+    assert len(recorded(pytester)) == 4  # noqa: PLR2004
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+
+def test_perf_metrics_are_logged_and_budgets_enforced(
+    pytester: pytest.Pytester, launch_browser_flags: str
+) -> None:
+    pytester.makepyfile("""
+        import pytest
+
+        PAGE = "data:text/html,<h1>perf</h1>"
+
+        def test_metrics(pw_perf, pw_page):
+            pw_page.goto(PAGE)
+            metrics = pw_perf.collect(pw_page)
+            assert metrics["ttfb_ms"] is not None
+            assert metrics["transfer_kb"] >= 0
+
+        @pytest.mark.pw_perf_budget(ttfb_ms=-1)
+        def test_over_budget(pw_page):
+            pw_page.goto(PAGE)
+
+        def test_unmeasured(pw_page):
+            pw_page.goto(PAGE)
+""")
+    result = pytester.runpytest(launch_browser_flags)
+    result.assert_outcomes(passed=2, failed=1)
+    result.stdout.fnmatch_lines(
+        ["*Performance budget exceeded:*", "*ttfb_ms * > -1 on data:*"]
+    )
+    records = [
+        json.loads(line)
+        for line in (pytester.path / "playwright-enhanced-results" / "perf.jsonl")
+        .read_text()
+        .splitlines()
+    ]
+    assert sorted(record["nodeid"].split("::")[-1] for record in records) == [
+        "test_metrics",
+        "test_over_budget",
+    ]
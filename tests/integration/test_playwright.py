@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import pytest
 
 pytestmark = pytest.mark.playwright
@@ -15,3 +17,40 @@ def test_sync_playwright_is_available(pytester: pytest.Pytester) -> None:
     result = pytester.runpytest()
     result.assert_outcomes(passed=1)
     assert not result.ret
+
+
+def test_driver_is_per_test_by_default(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        """
+        seen = set()
+
+        def test_one(pw_playwright, pw_driver):
+            assert pw_driver is None
+            seen.add(id(pw_playwright))
+
+        def test_two(pw_playwright):
+            assert id(pw_playwright) not in seen
+""",
+    )
+    pytester.runpytest().assert_outcomes(passed=2)
+
+
+@pytest.mark.parametrize(
+    "flags", [("--driver-scope", "session"), ("--browser-reuse", "worker")]
+)
+def test_session_driver_is_shared(
+    pytester: pytest.Pytester, flags: tuple[str, str]
+) -> None:
+    pytester.makepyfile(
+        """
+        seen = set()
+
+        def test_one(pw_playwright, pw_driver):
+            assert pw_driver.playwright is pw_playwright
+            seen.add(id(pw_playwright))
+
+        def test_two(pw_playwright):
+            assert id(pw_playwright) in seen
+""",
+    )
+    pytester.runpytest(*flags).assert_outcomes(passed=2)
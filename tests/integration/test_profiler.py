@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import pytest
+
+
+def test_actions_are_summarised(
+    pytester: pytest.Pytester, launch_browser_flags: str
+) -> None:
+    pytester.makepyfile("""
+        from playwright.sync_api import Page
+
+        def test_actions(pw_page):
+            assert isinstance(pw_page, Page)
+            pw_page.set_content("<input id='name'><button>go</button>")
+            pw_page.fill("#name", "value")
+            pw_page.locator("button").click()
+    """)
+    result = pytester.runpytest(launch_browser_flags, "--pw-profile-actions")
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(
+        [
+            "*playwright actions (ms)*",
+            "action*calls*total*mean*max",
+            "Page.fill *1*",
+            "selectors with the highest total wait:",
+            "* button",
+        ]
+    )
+
+
+def test_actions_are_not_profiled_by_default(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile("""
+        def test_plain():
+            ...
+    """)
+    result = pytester.runpytest("--pw-profile-actions")
+    result.assert_outcomes(passed=1)
+    result.stdout.no_fnmatch_line("*playwright actions*")
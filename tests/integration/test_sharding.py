@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+
+def test_shards_cover_the_suite(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile("""
+        import pytest
+
+        @pytest.mark.parametrize("_", range(5))
+        def test_a(_):
+            ...
+""")
+    pytester.runpytest("--pw-shard", "1/2").assert_outcomes(passed=2, deselected=3)
+    pytester.runpytest("--pw-shard", "2/2").assert_outcomes(passed=3, deselected=2)
+
+
+def test_invalid_shard_is_a_usage_error(pytester: pytest.Pytester) -> None:
+    result = pytester.runpytest("--pw-shard", "3/2")
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+    result.stderr.fnmatch_lines(["*shard index must be between 1 and the total*"])
+
+
+def test_shards_agree_across_processes(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile("""
+        import pytest
+
+        def fast(item):
+            return {"locale": "en-GB"}
+
+        def slow(item):
+            return {"locale": "de-DE"}
+
+        @pytest.mark.parametrize("_", range(4))
+        @pytest.mark.context_kwargs(callback=fast)
+        def test_a(_):
+            ...
+
+        @pytest.mark.parametrize("_", range(4))
+        @pytest.mark.context_kwargs(callback=slow)
+        def test_b(_):
+            ...
+""")
+    pytester.makefile(".json", durations=json.dumps({"test_agree.py::test_a[0]": 9}))
+
+    def shard(*args: str) -> list[str]:
+        result = pytester.runpytest_subprocess("--collect-only", "-q", *args)
+        return [line for line in result.outlines if "::" in line]
+
+    for args in ((), ("--pw-shard-durations", "durations.json")):
+        first = shard("--pw-shard", "1/2", *args)
+        assert first == shard("--pw-shard", "1/2", *args)
+        assert set(first).isdisjoint(shard("--pw-shard", "2/2", *args))
+
+
+def test_shards_are_balanced_by_the_shared_durations(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_weights="""
+        import pytest
+
+        @pytest.mark.parametrize("_", range(4))
+        def test_a(_):
+            ...
+"""
+    )
+    pytester.makefile(
+        ".json",
+        durations=json.dumps(
+            {f"test_weights.py::test_a[{i}]": 30 if i == 0 else 1 for i in range(4)}
+        ),
+    )
+    pytester.runpytest(
+        "--pw-shard", "1/2", "--pw-shard-durations", "durations.json"
+    ).assert_outcomes(passed=1, deselected=3)
+    pytester.runpytest("--pw-shard", "1/2").assert_outcomes(passed=2, deselected=2)
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+SOURCE = """
+    import time
+
+    import pytest
+
+    from pytest_playwright_enhanced.timings import record_timing
+
+    @pytest.fixture
+    def fake_context(request):
+        started = time.perf_counter()
+        record_timing(request.node, "context", started)
+        yield
+
+    @pytest.mark.parametrize("_", range(4))
+    def test_a(fake_context, _):
+        ...
+"""
+
+
+def test_timeline_has_a_track_per_worker(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(SOURCE)
+    result = pytester.runpytest("-n", "2", "--pw-timeline", "out/timeline.json")
+    result.assert_outcomes(passed=4)
+    assert sorted(p.name for p in (pytester.path / "out").iterdir()) == [
+        "timeline.json"
+    ]
+    events = json.loads((pytester.path / "out" / "timeline.json").read_text())[
+        "traceEvents"
+    ]
+    assert {
+        event["args"]["name"] for event in events if event["name"] == "process_name"
+    } == {"gw0", "gw1"}
+    spans = [event for event in events if event["ph"] == "X"]
+    for name in ("setup", "call", "teardown", "context"):
+        assert len([span for span in spans if span["name"] == name]) == 4  # noqa: PLR2004
+
+
+def test_timeline_without_xdist(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(SOURCE)
+    result = pytester.runpytest("--pw-timeline", "timeline.json")
+    result.assert_outcomes(passed=4)
+    events = json.loads((pytester.path / "timeline.json").read_text())["traceEvents"]
+    assert {event["pid"] for event in events} == {0}
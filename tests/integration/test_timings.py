@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+SOURCE = """
+    import time
+
+    import pytest
+
+    from pytest_playwright_enhanced.timings import record_timing
+
+    @pytest.fixture
+    def fake_context(request):
+        started = time.perf_counter()
+        time.sleep(0.01)
+        record_timing(request.node, "context", started)
+        yield
+        started = time.perf_counter()
+        record_timing(request.node, "context_teardown", started)
+
+    @pytest.mark.parametrize("_", range(4))
+    def test_a(fake_context, _):
+        ...
+"""
+
+
+def test_timings_are_summarised_across_workers(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(SOURCE)
+    result = pytester.runpytest(
+        "-n", "2", "--pw-timings", "--pw-timings-json", "out/timings.json"
+    )
+    result.assert_outcomes(passed=4)
+    result.stdout.fnmatch_lines(
+        [
+            "*playwright timings (ms)*",
+            "phase*tests*total*mean*p50*p95*max",
+            "context *4*",
+            "call *4*",
+            "context_teardown *4*",
+            "slowest setup and teardown:",
+        ]
+    )
+    report = json.loads((pytester.path / "out" / "timings.json").read_text())
+    assert len(report["tests"]) == 4  # noqa: PLR2004
+    assert report["summary"]["context"]["tests"] == 4  # noqa: PLR2004
+    assert report["summary"]["context"]["p50"] >= 0.01  # noqa: PLR2004
+
+
+def test_timings_are_off_by_default(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(SOURCE)
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=4)
+    result.stdout.no_fnmatch_line("*playwright timings*")
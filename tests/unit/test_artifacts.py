@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import argparse
+import json
+import pathlib
+import threading
+
+import pytest
+
+from pytest_playwright_enhanced.artifacts import ArtifactStore
+from pytest_playwright_enhanced.artifacts import ArtifactWriter
+from pytest_playwright_enhanced.artifacts import merge_manifests
+from pytest_playwright_enhanced.artifacts import parse_size
+from pytest_playwright_enhanced.artifacts import retire_artifacts_dir
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_writes_moves_and_deletes(tmp_path: pathlib.Path, workers: int) -> None:
+    writer = ArtifactWriter(max_workers=workers)
+    video = tmp_path / "random.webm"
+    video.write_bytes(b"video")
+    unwanted = tmp_path / "other.webm"
+    unwanted.write_bytes(b"video")
+    writer.write_bytes(tmp_path / "shot.png", b"png")
+    writer.move(video, tmp_path / "test-0.webm")
+    writer.delete(unwanted)
+    assert writer.close() == []
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "shot.png",
+        "test-0.webm",
+    ]
+    assert (tmp_path / "test-0.webm").read_bytes() == b"video"
+
+
+def test_errors_are_collected(tmp_path: pathlib.Path) -> None:
+    writer = ArtifactWriter()
+    writer.write_bytes(tmp_path / "missing" / "shot.png", b"png")
+    errors = writer.close()
+    assert len(errors) == 1
+    assert "shot.png" in errors[0]
+
+
+def test_pending_writes_are_bounded() -> None:
+    writer = ArtifactWriter(max_workers=1, max_pending=1)
+    release = threading.Event()
+    writer.submit(release.wait)
+    submitted = threading.Event()
+
+    def submit() -> None:
+        writer.submit(lambda: None)
+        submitted.set()
+
+    thread = threading.Thread(target=submit)
+    thread.start()
+    assert not submitted.wait(0.2)
+    release.set()
+    assert submitted.wait(5)
+    thread.join()
+    assert writer.close() == []
+
+
+def read_manifest(path: pathlib.Path) -> list[dict[str, object]]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_flat_store_keeps_names(tmp_path: pathlib.Path) -> None:
+    store = ArtifactStore(tmp_path, ArtifactWriter(0))
+    store.add_bytes("test_a.py::test_a", "test-a-0.png", b"png")
+    video = tmp_path / "random.webm"
+    video.write_bytes(b"video")
+    store.add_file("test_a.py::test_a", "test-a-0.webm", video)
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "manifest-main.jsonl",
+        "test-a-0.png",
+        "test-a-0.webm",
+    ]
+    assert read_manifest(tmp_path / "manifest-main.jsonl") == [
+        {
+            "nodeid": "test_a.py::test_a",
+            "name": "test-a-0.png",
+            "path": "test-a-0.png",
+            "bytes": 3,
+        },
+        {
+            "nodeid": "test_a.py::test_a",
+            "name": "test-a-0.webm",
+            "path": "test-a-0.webm",
+            "bytes": 5,
+        },
+    ]
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_content_store_writes_duplicates_once(
+    tmp_path: pathlib.Path, workers: int
+) -> None:
+    writer = ArtifactWriter(workers)
+    store = ArtifactStore(tmp_path, writer, content_addressed=True)
+    store.add_bytes("test_a.py::test_a", "test-a-0.png", b"error page")
+    store.add_bytes("test_a.py::test_b", "test-b-0.png", b"error page")
+    for name in ("test-a-0.webm", "test-b-0.webm"):
+        staged = store.staging_path(name)
+        staged.write_bytes(b"video")
+        store.add_file("test_a.py::test_a", name, staged)
+    assert writer.close() == []
+    entries = read_manifest(tmp_path / "manifest-main.jsonl")
+    assert sorted(entry["name"] for entry in entries) == [  # type: ignore[type-var]
+        "test-a-0.png",
+        "test-a-0.webm",
+        "test-b-0.png",
+        "test-b-0.webm",
+    ]
+    for entry in entries:
+        suffix = pathlib.Path(entry["name"]).suffix  # type: ignore[arg-type]
+        assert entry["path"] == f"{entry['sha256']}{suffix}"
+    assert sorted(path.suffix for path in tmp_path.glob("*.*") if path.is_file()) == [
+        ".jsonl",
+        ".png",
+        ".webm",
+    ]
+    assert not list((tmp_path / ".staging").iterdir())
+
+
+def test_worker_manifests_are_merged(tmp_path: pathlib.Path) -> None:
+    assert merge_manifests(tmp_path) is None
+    for worker in ("gw0", "gw1"):
+        store = ArtifactStore(tmp_path, ArtifactWriter(0), worker=worker)
+        store.add_bytes(f"test_{worker}.py::test", f"{worker}.png", b"png")
+    merged = merge_manifests(tmp_path)
+    assert merged == tmp_path / "manifest.jsonl"
+    assert [entry["nodeid"] for entry in read_manifest(merged)] == [
+        "test_gw0.py::test",
+        "test_gw1.py::test",
+    ]
+    assert not list(tmp_path.glob("manifest-*.jsonl"))
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [("100", 100), ("2K", 2048), ("500MB", 500 * 1024**2), ("1 GiB", 1024**3)],
+)
+def test_parse_size(value: str, expected: int) -> None:
+    assert parse_size(value) == expected
+
+
+def test_parse_size_rejects_garbage() -> None:
+    with pytest.raises(argparse.ArgumentTypeError, match="expected a size"):
+        parse_size("lots")
+
+
+def make_run(path: pathlib.Path, size: int) -> None:
+    path.mkdir()
+    (path / "trace.zip").write_bytes(b"x" * size)
+
+
+def test_previous_artifacts_are_deleted_in_the_background(
+    tmp_path: pathlib.Path,
+) -> None:
+    artifacts = tmp_path / "results"
+    make_run(artifacts, 10)
+    # Left behind by an interrupted cleanup.
+    make_run(tmp_path / ".results.trash-old", 10)
+    retire_artifacts_dir(artifacts).join()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_previous_runs_are_retained(tmp_path: pathlib.Path) -> None:
+    artifacts = tmp_path / "results"
+    for stamp in ("20260101T000000000000", "20260102T000000000000"):
+        make_run(tmp_path / f"results.{stamp}", 10)
+    make_run(artifacts, 10)
+    retire_artifacts_dir(artifacts, keep_runs=2).join()
+    runs = sorted(path.name for path in tmp_path.iterdir())
+    assert len(runs) == 2  # noqa: PLR2004
+    assert runs[0] == "results.20260102T000000000000"
+
+
+def test_retained_runs_fit_the_size_budget(tmp_path: pathlib.Path) -> None:
+    artifacts = tmp_path / "results"
+    make_run(tmp_path / "results.20260101T000000000000", 10)
+    make_run(tmp_path / "results.20260102T000000000000", 100)
+    make_run(artifacts, 10)
+    retire_artifacts_dir(artifacts, keep_runs=5, max_bytes=50).join()
+    # The run over budget and every older run are evicted.
+    (retained,) = tmp_path.iterdir()
+    assert retained.name not in {
+        "results.20260101T000000000000",
+        "results.20260102T000000000000",
+    }
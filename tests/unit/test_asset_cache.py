@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import os
+import pathlib
+import types
+
+import pytest
+
+from pytest_playwright_enhanced.asset_cache import AssetCache
+from pytest_playwright_enhanced.asset_cache import max_age
+
+HEADERS = {"cache-control": "public, max-age=600", "content-type": "text/javascript"}
+
+
+class FakeRoute:
+    def __init__(
+        self: FakeRoute, url: str, resource_type: str = "script", method: str = "GET"
+    ) -> None:
+        self.request = types.SimpleNamespace(
+            url=url, resource_type=resource_type, method=method
+        )
+        self.calls: list[str] = []
+        self.fulfilled: dict[str, object] = {}
+
+    def fallback(self: FakeRoute) -> None:
+        self.calls.append("fallback")
+
+    def fetch(self: FakeRoute) -> types.SimpleNamespace:
+        self.calls.append("fetch")
+        return types.SimpleNamespace(
+            status=200, headers=HEADERS, body=lambda: b"bundle"
+        )
+
+    def fulfill(self: FakeRoute, **kwargs: object) -> None:
+        self.calls.append("fulfill")
+        self.fulfilled = kwargs
+
+
+@pytest.mark.parametrize(
+    ("headers", "expected"),
+    [
+        ({"cache-control": "public, max-age=600"}, 600),
+        ({"cache-control": "max-age=600, private"}, 0),
+        ({"cache-control": "no-store"}, 0),
+        ({"cache-control": "max-age=600", "set-cookie": "a=b"}, 0),
+        ({"cache-control": "max-age=600", "vary": "Accept-Encoding"}, 600),
+        ({"cache-control": "max-age=600", "vary": "Accept-Encoding, Origin"}, 0),
+        ({"cache-control": "max-age=600", "vary": "*"}, 0),
+        ({}, 0),
+    ],
+)
+def test_max_age(headers: dict[str, str], expected: int) -> None:
+    assert max_age(headers) == expected
+
+
+def test_responses_are_shared_and_deduplicated(tmp_path: pathlib.Path) -> None:
+    gw0, gw1 = AssetCache(tmp_path, 1024), AssetCache(tmp_path, 1024)
+    headers = {**HEADERS, "content-encoding": "gzip"}
+    gw0.put("https://cdn/app.js", 200, headers, b"bundle", ttl=600)
+    gw0.put("https://cdn/app.js?v=2", 200, headers, b"bundle", ttl=600)
+    cached = gw1.get("https://cdn/app.js")
+    assert cached is not None
+    entry, body = cached
+    assert body == b"bundle"
+    assert entry["headers"] == HEADERS
+    assert len(list((tmp_path / "blobs").iterdir())) == 1
+    assert gw1.get("https://cdn/other.js") is None
+
+
+def test_expired_responses_miss(tmp_path: pathlib.Path) -> None:
+    cache = AssetCache(tmp_path, 1024)
+    cache.put("https://cdn/app.js", 200, HEADERS, b"bundle", ttl=-1)
+    assert cache.get("https://cdn/app.js") is None
+
+
+def test_least_recently_used_are_evicted(tmp_path: pathlib.Path) -> None:
+    cache = AssetCache(tmp_path, 100)
+    for idx in range(5):
+        cache.put(f"https://cdn/{idx}.js", 200, HEADERS, bytes([idx]) * 20, ttl=600)
+        # Distinct mtimes regardless of the file system timestamp resolution.
+        os.utime(cache._entry(f"https://cdn/{idx}.js"), (idx, idx))
+    cache.get("https://cdn/0.js")
+    # Over budget, evicted down to half of it.
+    cache.put("https://cdn/5.js", 200, HEADERS, b"5" * 20, ttl=600)
+    assert [
+        idx for idx in range(6) if cache.get(f"https://cdn/{idx}.js") is not None
+    ] == [0, 5]
+
+
+def test_route_handler(tmp_path: pathlib.Path) -> None:
+    cache = AssetCache(tmp_path, 1024)
+    document = FakeRoute("https://app/", resource_type="document")
+    cache.handle(document)  # type: ignore[arg-type]
+    assert document.calls == ["fallback"]
+    miss = FakeRoute("https://cdn/app.js")
+    cache.handle(miss)  # type: ignore[arg-type]
+    assert miss.calls == ["fetch", "fulfill"]
+    hit = FakeRoute("https://cdn/app.js")
+    cache.handle(hit)  # type: ignore[arg-type]
+    assert hit.calls == ["fulfill"]
+    assert hit.fulfilled == {"status": 200, "headers": HEADERS, "body": b"bundle"}
+
+
+def test_shared_bodies_are_kept_until_their_last_entry_is_evicted(
+    tmp_path: pathlib.Path,
+) -> None:
+    cache = AssetCache(tmp_path, 100)
+    for idx, body in enumerate((b"a" * 20, b"b" * 51, b"a" * 20)):
+        cache.put(f"https://cdn/{idx}.js", 200, HEADERS, body, ttl=600)
+        os.utime(cache._entry(f"https://cdn/{idx}.js"), (idx, idx))
+    # Evicting the first entry keeps its body, shared with the third.
+    cache.put("https://cdn/3.js", 200, HEADERS, b"c" * 30, ttl=600)
+    assert [
+        idx for idx in range(4) if cache.get(f"https://cdn/{idx}.js") is not None
+    ] == [2, 3]
+    assert len(list((tmp_path / "blobs").iterdir())) == 2  # noqa: PLR2004
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import argparse
+import re
+import types
+
+import pytest
+
+from pytest_playwright_enhanced.blocking import ResourceBlocker
+from pytest_playwright_enhanced.blocking import parse_block_resources
+
+
+def request(url: str, resource_type: str = "script") -> types.SimpleNamespace:
+    return types.SimpleNamespace(url=url, resource_type=resource_type)
+
+
+class FakeRoute:
+    def __init__(self: FakeRoute, url: str, resource_type: str = "script") -> None:
+        self.request = request(url, resource_type)
+        self.outcome = ""
+
+    def abort(self: FakeRoute, error_code: str) -> None:
+        self.outcome = error_code
+
+    def fallback(self: FakeRoute) -> None:
+        self.outcome = "fallback"
+
+
+def test_parse_block_resources() -> None:
+    assert parse_block_resources("images,fonts") == ("images", "fonts")
+    with pytest.raises(argparse.ArgumentTypeError, match="unknown resource profile"):
+        parse_block_resources("images,ads")
+
+
+def test_profiles_block_resource_types_and_analytics() -> None:
+    blocker = ResourceBlocker.from_profiles(("images", "analytics"))
+    assert blocker.blocks(request("https://app.example/logo.svg", "image"))  # type: ignore[arg-type]
+    assert blocker.blocks(
+        request("https://www.google-analytics.com/analytics.js")  # type: ignore[arg-type]
+    )
+    assert not blocker.blocks(request("https://app.example/app.js"))  # type: ignore[arg-type]
+    assert not ResourceBlocker.from_profiles(())
+
+
+def test_globs_and_regular_expressions() -> None:
+    blocker = ResourceBlocker(
+        patterns=("https://cdn.example/*", re.compile(r"\.mp4(\?|$)"))
+    )
+    assert blocker.blocks(request("https://cdn.example/hero.png"))  # type: ignore[arg-type]
+    assert not blocker.blocks(request("https://app.example/?next=https://cdn.example/"))  # type: ignore[arg-type]
+    assert blocker.blocks(request("https://app.example/intro.mp4?t=1"))  # type: ignore[arg-type]
+
+
+def test_unblocked_requests_fall_back() -> None:
+    blocker = ResourceBlocker(resource_types=("font",))
+    blocked, allowed = FakeRoute("https://a/f.woff", "font"), FakeRoute("https://a/")
+    blocker.handle(blocked)  # type: ignore[arg-type]
+    blocker.handle(allowed)  # type: ignore[arg-type]
+    assert (blocked.outcome, allowed.outcome) == ("blockedbyclient", "fallback")
+
+
+def test_marker_extends_the_profiles(pytester: pytest.Pytester) -> None:
+    (plain, marked) = pytester.getitems("""
+        import pytest
+
+        def test_plain():
+            ...
+
+        @pytest.mark.pw_block(patterns=["*.png"], resources=["fonts", "websocket"])
+        def test_marked():
+            ...
+    """)
+    blocker = ResourceBlocker.from_profiles(("media",))
+    assert blocker.extend(plain) is blocker
+    extended = blocker.extend(marked)
+    assert extended.resource_types == {"media", "font", "websocket"}
+    assert extended.blocks(request("https://a/b.png"))  # type: ignore[arg-type]
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import argparse
+import json
+import pathlib
+
+import pytest
+
+from pytest_playwright_enhanced.artifacts import ArtifactStore
+from pytest_playwright_enhanced.artifacts import ArtifactWriter
+from pytest_playwright_enhanced.budget import ArtifactBudget
+from pytest_playwright_enhanced.budget import parse_kind_size
+from pytest_playwright_enhanced.budget import skipped_artifacts
+
+
+def test_videos_then_traces_are_dropped_first(tmp_path: pathlib.Path) -> None:
+    budget = ArtifactBudget(tmp_path, max_bytes=100)
+    assert budget.admit("a", "a-0.webm", 50) is None
+    assert budget.admit("b", "b-0.webm", 20) == "run budget"
+    assert budget.admit("b", "b-trace.zip", 30) is None
+    assert budget.admit("c", "c-trace.zip", 15) == "run budget"
+    assert budget.admit("c", "c-0.png", 15) is None
+    assert budget.admit("d", "d-0.png", 15) == "run budget"
+
+
+def test_run_totals_are_shared(tmp_path: pathlib.Path) -> None:
+    gw0 = ArtifactBudget(tmp_path, max_bytes=100)
+    gw1 = ArtifactBudget(tmp_path, max_bytes=100)
+    assert gw0.admit("a", "a-0.png", 60) is None
+    assert gw1.admit("b", "b-0.png", 60) == "run budget"
+
+
+def test_test_and_kind_budgets(tmp_path: pathlib.Path) -> None:
+    budget = ArtifactBudget(tmp_path, max_test_bytes=100, max_kind_bytes={"trace": 80})
+    assert budget.admit("a", "a-trace.zip", 60) is None
+    assert budget.admit("b", "b-trace.zip", 60) == "trace budget"
+    assert budget.admit("a", "a-0.webm", 60) == "test budget"
+    assert budget.admit("a", "a-0.png", 40) is None
+
+
+def test_parse_kind_size() -> None:
+    assert parse_kind_size("video=2K") == ("video", 2048)
+    with pytest.raises(argparse.ArgumentTypeError, match="KIND=SIZE"):
+        parse_kind_size("audio=2K")
+
+
+def test_skipped_artifacts_are_recorded(tmp_path: pathlib.Path) -> None:
+    budget = ArtifactBudget(tmp_path / ".staging", max_bytes=10)
+    store = ArtifactStore(tmp_path, ArtifactWriter(0), budget=budget)
+    store.add_bytes("test_a.py::test_a", "test-a-0.png", b"png")
+    video = tmp_path / "random.webm"
+    video.write_bytes(b"video" * 10)
+    store.add_file("test_a.py::test_a", "test-a-0.webm", video)
+    assert not video.exists()
+    manifest = tmp_path / "manifest-main.jsonl"
+    assert json.loads(manifest.read_text().splitlines()[-1]) == {
+        "nodeid": "test_a.py::test_a",
+        "name": "test-a-0.webm",
+        "bytes": 50,
+        "skipped": "run budget",
+    }
+    assert skipped_artifacts(manifest) == {("video", "run budget"): [1, 50]}
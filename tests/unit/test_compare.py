@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import json
+import math
+import pathlib
+
+import pytest
+
+from pytest_playwright_enhanced import compare
+from pytest_playwright_enhanced.compare import Comparison
+from pytest_playwright_enhanced.compare import Stats
+from pytest_playwright_enhanced.compare import iter_records
+from pytest_playwright_enhanced.compare import load_samples
+from pytest_playwright_enhanced.compare import main
+
+NODE = "test_a.py::test_a[chromium]"
+
+
+def write_timings(path: pathlib.Path, tests: dict[str, dict[str, float]]) -> None:
+    summary = {"context": {"tests": len(tests), "p95": 0.5}}
+    path.write_text(json.dumps({"summary": summary, "tests": tests}, indent=2))
+
+
+def write_perf(path: pathlib.Path, records: list[dict[str, object]]) -> None:
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+
+def test_timings_report_is_decoded_across_chunks(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(compare, "_CHUNK", 7)
+    path = tmp_path / "timings.json"
+    write_timings(
+        path,
+        {
+            NODE: {"context": 0.123456789, "call": 1.5},
+            "test_b.py::test_b": {"context": 12345.0},
+        },
+    )
+    assert list(iter_records(path)) == [
+        {"nodeid": NODE, "context": 0.123456789, "call": 1.5},
+        {"nodeid": "test_b.py::test_b", "context": 12345.0},
+    ]
+
+
+def test_truncated_report_raises(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "timings.json"
+    path.write_text('{"tests": {"test_a.py::test_a": {"call": 1.0}')
+    with pytest.raises(ValueError):  # noqa: PT011
+        list(iter_records(path))
+
+
+def test_perf_records_are_keyed_by_engine_and_page(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "perf.jsonl"
+    write_perf(
+        path,
+        [
+            {"nodeid": NODE, "engine": "chromium", "page": 0, "url": "a", "lcp_ms": 1},
+            {"nodeid": NODE, "engine": "chromium", "page": 0, "url": "a", "lcp_ms": 3},
+            {"nodeid": NODE, "engine": "chromium", "page": 1, "cls": None},
+        ],
+    )
+    assert load_samples(path, None) == {
+        (NODE, "chromium", 0): {"lcp_ms": [1.0, 3.0]},
+        (NODE, "chromium", 1): {},
+    }
+    assert load_samples(path, frozenset(("cls",))) == {
+        (NODE, "chromium", 0): {},
+        (NODE, "chromium", 1): {},
+    }
+
+
+def test_stats() -> None:
+    stats = Stats.of([5.0, 1.0, 2.0, 3.0, 100.0])
+    assert stats == Stats(runs=5, median=3.0, p95=100.0, mad=2.0)
+
+
+def test_a_noisy_baseline_absorbs_a_large_delta() -> None:
+    key = (NODE, None, None)
+    noisy = Stats.of([100.0, 150.0, 200.0, 250.0, 300.0])
+    steady = Stats.of([200.0, 201.0, 199.0, 200.0, 202.0])
+    current = Stats.of([260.0])
+    assert not Comparison(key, "call", noisy, current, 10.0).regressed
+    assert Comparison(key, "call", steady, current, 10.0).outlier
+    assert Comparison(key, "call", steady, current, 10.0).regressed
+    # Too few baseline runs to tell, the threshold alone decides.
+    single = Comparison(key, "call", Stats.of([200.0]), current, 10.0)
+    assert single.outlier is None
+    assert single.regressed
+    zero = Comparison(key, "cls", Stats.of([0.0]), Stats.of([0.2]), 10.0)
+    assert zero.delta == math.inf
+
+
+def test_main_exits_non_zero_on_regressions(
+    tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    baseline = tmp_path / "baseline.json"
+    current = tmp_path / "current.json"
+    write_timings(baseline, {NODE: {"call": 1.0, "context": 0.5}, "gone": {"call": 1}})
+    write_timings(current, {NODE: {"call": 1.3, "context": 0.2}})
+    assert main([str(baseline), str(current)]) == 1
+    out = capsys.readouterr().out
+    assert "compared 2 metrics of 1 tests, 1 only in the baseline" in out
+    assert "regressions (1):" in out
+    assert "improvements (1):" in out
+    assert main([str(baseline), str(current), "--metric-threshold", "call=50"]) == 0
+    assert main([str(baseline), str(current), "--metrics", "context"]) == 0
+
+
+def test_main_rejects_unreadable_results(tmp_path: pathlib.Path) -> None:
+    with pytest.raises(SystemExit) as e:
+        main([str(tmp_path / "missing.json"), str(tmp_path / "missing.json")])
+    assert e.value.code == 2  # noqa: PLR2004
+
+
+def test_main_pools_the_samples_of_several_files(
+    tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    for run, call in enumerate((1.0, 1.1, 0.9)):
+        write_timings(tmp_path / f"nightly-{run}.json", {NODE: {"call": call}})
+    current = tmp_path / "current.json"
+    write_timings(current, {NODE: {"call": 2.0}})
+    pattern = str(tmp_path / "nightly-*.json")
+    assert main(["--baseline", pattern, "--current", str(current)]) == 1
+    out = capsys.readouterr().out
+    assert "compared 1 metrics of 1 tests" in out
+    assert f"{NODE} (outlier)" in out
+    assert main([pattern, str(current), "--metrics", "context"]) == 0
+
+
+def test_main_requires_both_sides(tmp_path: pathlib.Path) -> None:
+    baseline = tmp_path / "baseline.json"
+    write_timings(baseline, {NODE: {"call": 1.0}})
+    with pytest.raises(SystemExit):
+        main(["--baseline", str(baseline)])
+    with pytest.raises(SystemExit):
+        main(["--baseline", str(tmp_path / "none-*.json"), "--current", str(baseline)])
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import types
+import typing
+
+from pytest_playwright_enhanced.pool import BrowserPool
+from pytest_playwright_enhanced.pool import ContextPool
+
+
+class FakeContext:
+    def __init__(self: FakeContext, browser: FakeBrowser) -> None:
+        self.browser = browser
+        self.pages: list[typing.Any] = []
+        self.calls: list[str] = []
+        self.closed = False
+        self.handlers: list[typing.Callable[..., None]] = []
+
+    def on(self: FakeContext, _: str, handler: typing.Callable[..., None]) -> None:
+        self.handlers.append(handler)
+
+    def remove_listener(
+        self: FakeContext, _: str, handler: typing.Callable[..., None]
+    ) -> None:
+        self.handlers.remove(handler)
+
+    def close(self: FakeContext) -> None:
+        self.closed = True
+        for handler in self.handlers:
+            handler(self)
+
+    def __getattr__(self: FakeContext, name: str) -> typing.Callable[..., None]:
+        return lambda *_, **__: self.calls.append(name)
+
+
+class FakeBrowser:
+    def __init__(self: FakeBrowser) -> None:
+        self.opened: list[FakeContext] = []
+
+    @property
+    def contexts(self: FakeBrowser) -> list[FakeContext]:
+        return [context for context in self.opened if not context.closed]
+
+    def is_connected(self: FakeBrowser) -> bool:
+        return True
+
+    def new_context(self: FakeBrowser, **_: object) -> FakeContext:
+        context = FakeContext(self)
+        self.opened.append(context)
+        return context
+
+
+def test_released_context_is_reset_and_reused() -> None:
+    pool, browser = ContextPool(), FakeBrowser()
+    context = pool.acquire(browser, {"base_url": "foo"})
+    page = types.SimpleNamespace(closed=False)
+    page.close = lambda: setattr(page, "closed", True)
+    context.pages.append(page)
+    pool.release(context)
+    assert page.closed
+    assert {"unroute_all", "clear_cookies", "set_storage_state"} <= set(context.calls)
+    assert pool.acquire(browser, {"base_url": "foo"}) is context
+
+
+def test_storage_is_reset_to_the_initial_state() -> None:
+    pool, browser = ContextPool(), FakeBrowser()
+    state = {"cookies": [{"name": "a"}], "origins": []}
+    context = pool.acquire(browser, {"storage_state": state})
+    states: list[object] = []
+    context.set_storage_state = states.append
+    pool.release(context)
+    assert states == [state]
+
+
+def test_stateful_contexts_are_not_reused() -> None:
+    pool, browser = ContextPool(), FakeBrowser()
+    context = pool.acquire(browser, {})
+    pool.watch(context)
+    context.set_extra_http_headers({"foo": "bar"})
+    pool.release(context)
+    assert context.closed
+    assert "set_extra_http_headers" in context.calls
+    assert pool.acquire(browser, {}) is not context
+
+
+def test_listeners_of_a_test_are_removed() -> None:
+    pool, browser = ContextPool(), FakeBrowser()
+    context = pool.acquire(browser, {})
+    pool.watch(context)
+    context.on("page", lambda _: None)
+    assert len(context.handlers) == 2  # noqa: PLR2004
+    pool.release(context)
+    assert len(context.handlers) == 1
+    assert "on" not in vars(context)
+    assert pool.acquire(browser, {}) is context
+
+
+def test_permissions_are_cleared_and_granted_again() -> None:
+    pool, browser = ContextPool(), FakeBrowser()
+    context = pool.acquire(browser, {"permissions": ["geolocation"]})
+    pool.watch(context)
+    context.grant_permissions(["camera"])
+    pool.release(context)
+    assert context.calls[-3:-1] == ["clear_permissions", "grant_permissions"]
+    assert pool.acquire(browser, {"permissions": ["geolocation"]}) is context
+
+
+def test_setup_before_watch_keeps_contexts_reusable() -> None:
+    pool, browser = ContextPool(), FakeBrowser()
+    context = pool.acquire(browser, {})
+    context.route("**/*", lambda route: route.continue_())
+    pool.watch(context)
+    pool.release(context)
+    assert not context.closed
+    assert "route" not in vars(context)
+    assert pool.acquire(browser, {}) is context
+
+
+def test_different_kwargs_do_not_share_contexts() -> None:
+    pool, browser = ContextPool(), FakeBrowser()
+    context = pool.acquire(browser, {"base_url": "foo"})
+    pool.release(context)
+    assert pool.acquire(browser, {"base_url": "bar"}) is not context
+
+
+def test_closed_contexts_are_not_reused() -> None:
+    pool, browser = ContextPool(), FakeBrowser()
+    context = pool.acquire(browser, {})
+    context.close()
+    pool.release(context)
+    assert pool.acquire(browser, {}) is not context
+
+
+def test_contexts_are_retired_after_max_uses() -> None:
+    pool, browser = ContextPool(max_uses=2), FakeBrowser()
+    context = pool.acquire(browser, {})
+    pool.release(context)
+    assert pool.acquire(browser, {}) is context
+    pool.release(context)
+    assert context.closed
+    assert pool.acquire(browser, {}) is not context
+
+
+def test_idle_contexts_are_bounded() -> None:
+    pool, browser = ContextPool(max_idle=1), FakeBrowser()
+    one, two = pool.acquire(browser, {}), pool.acquire(browser, {})
+    pool.release(one)
+    pool.release(two)
+    assert two.closed
+    pool.close()
+    assert one.closed
+
+
+def test_browser_release_keeps_idle_contexts() -> None:
+    browsers = BrowserPool(types.SimpleNamespace())  # type: ignore[arg-type]
+    pool, browser = ContextPool(), FakeBrowser()
+    used = []
+    for _ in range(3):
+        # pw_context tears down before pw_browser.
+        context = pool.acquire(browser, {})
+        leaked = browser.new_context()
+        used.append(context)
+        pool.release(context)
+        browsers.release(browser, pool)  # type: ignore[arg-type]
+        assert leaked.closed
+    assert used[0] is used[1] is used[2]
+    assert not used[0].closed
+
+
+def test_only_contexts_of_pooled_browsers_are_recycled() -> None:
+    browsers = BrowserPool(types.SimpleNamespace())  # type: ignore[arg-type]
+    pooled, other = FakeBrowser(), FakeBrowser()
+    browsers._browsers["chromium", ""] = pooled  # type: ignore[assignment]
+    assert ContextPool(browsers).recycles(pooled)  # type: ignore[arg-type]
+    assert not ContextPool(browsers).recycles(other)  # type: ignore[arg-type]
+    assert not ContextPool().recycles(pooled)  # type: ignore[arg-type]
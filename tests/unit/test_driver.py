@@ -0,0 +1,33 @@
+import time
+import types
+
+from pytest_playwright_enhanced.driver import PlaywrightDriver
+
+
+def test_driver_is_started_lazily() -> None:
+    driver = PlaywrightDriver()
+    assert not driver.is_healthy()
+    playwright = driver.playwright
+    assert driver.is_healthy()
+    assert driver.playwright is playwright
+    driver.stop()
+    assert not driver.is_healthy()
+
+
+def test_dead_driver_is_restarted() -> None:
+    driver = PlaywrightDriver()
+    playwright = driver.playwright
+    playwright._impl_obj._connection._transport._proc.kill()
+    deadline = time.monotonic() + 5
+    while driver.is_healthy() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert driver.playwright is not playwright
+    assert driver.restarts == 1
+    assert driver.is_healthy()
+    driver.stop()
+
+
+def test_unknown_playwright_internals_are_assumed_healthy() -> None:
+    driver = PlaywrightDriver()
+    driver._playwright = types.SimpleNamespace()  # type: ignore[assignment]
+    assert driver.is_healthy()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import pytest
+
+from pytest_playwright_enhanced.durations import DEFAULT_DURATION
+from pytest_playwright_enhanced.durations import DurationHistory
+from pytest_playwright_enhanced.durations import engine_of
+
+
+def report(
+    nodeid: str, when: str, duration: float, outcome: str = "passed"
+) -> pytest.TestReport:
+    return pytest.TestReport(
+        nodeid, ("", 0, ""), {}, outcome, None, when, duration=duration
+    )
+
+
+def run(history: DurationHistory, nodeid: str, *durations: float) -> None:
+    for when, duration in zip(("setup", "call", "teardown"), durations):
+        history.record(report(nodeid, when, duration))
+
+
+@pytest.mark.parametrize(
+    ("nodeid", "engine"),
+    [
+        ("test_a.py::test_b[firefox]", "firefox"),
+        ("test_a.py::test_b[1-webkit]", "webkit"),
+        ("test_a.py::test_b[1]", None),
+        ("test_a.py::test_b", None),
+    ],
+)
+def test_engine_of(nodeid: str, engine: str | None) -> None:
+    assert engine_of(nodeid) == engine
+
+
+def test_all_phases_are_recorded_and_smoothed() -> None:
+    history = DurationHistory()
+    run(history, "test_a.py::test_b", 1.0, 2.0, 1.0)
+    assert history.durations == {"test_a.py::test_b": 4.0}
+    run(history, "test_a.py::test_b", 0.0, 2.0, 0.0)
+    assert history.durations == {"test_a.py::test_b": 3.0}
+
+
+def test_skipped_tests_are_not_recorded() -> None:
+    history = DurationHistory()
+    history.record(report("test_a.py::test_b", "setup", 1.0, "skipped"))
+    history.record(report("test_a.py::test_b", "teardown", 1.0))
+    assert history.durations == {}
+
+
+def test_unknown_tests_are_estimated_from_their_engine() -> None:
+    history = DurationHistory(
+        {"t.py::a[firefox]": 4.0, "t.py::b[firefox]": 6.0, "t.py::a[chromium]": 1.0}
+    )
+    assert history.estimate("t.py::a[chromium]") == 1.0
+    assert history.estimate("t.py::c[firefox]") == 5.0  # noqa: PLR2004
+    assert history.estimate("t.py::c[webkit]") == pytest.approx(11 / 3)
+    assert DurationHistory().estimate("t.py::c") == DEFAULT_DURATION
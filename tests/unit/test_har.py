@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import pathlib
+import typing
+
+import pytest
+
+from pytest_playwright_enhanced.const import HarMode
+from pytest_playwright_enhanced.har import HarCache
+
+SOURCE = """
+import pytest
+
+def test_plain():
+    ...
+
+@pytest.mark.pw_har
+def test_auto():
+    ...
+
+@pytest.mark.pw_har(mode="replay", name="shared", not_found="fallback")
+def test_shared():
+    ...
+
+@pytest.mark.pw_har(mode="bogus")
+def test_bogus():
+    ...
+"""
+
+
+class FakeContext:
+    def __init__(self: FakeContext) -> None:
+        self.routes: list[tuple[pathlib.Path, dict[str, typing.Any]]] = []
+
+    def route_from_har(self: FakeContext, har: pathlib.Path, **kwargs: object) -> None:
+        self.routes.append((har, kwargs))
+
+
+@pytest.fixture
+def items(pytester: pytest.Pytester) -> dict[str, pytest.Item]:
+    return {item.name: item for item in pytester.getitems(SOURCE)}
+
+
+def test_har_is_off_without_marker_or_flag(
+    tmp_path: pathlib.Path, items: dict[str, pytest.Item]
+) -> None:
+    assert HarCache(tmp_path, HarMode.OFF).plan(items["test_plain"], None) is None
+    plan = HarCache(tmp_path, HarMode.RECORD).plan(items["test_plain"], None)
+    assert plan is not None
+    assert plan.recording is not None
+
+
+def test_auto_records_a_miss_and_replays_a_hit(
+    tmp_path: pathlib.Path, items: dict[str, pytest.Item]
+) -> None:
+    cache = HarCache(tmp_path, HarMode.OFF)
+    item = items["test_auto"]
+    plan = cache.plan(item, "https://staging.example")
+    assert plan is not None
+    assert plan.recording is not None
+    context = FakeContext()
+    cache.attach(context, plan)  # type: ignore[arg-type]
+    assert context.routes == [
+        (plan.recording, {"url": None, "update": True, "update_content": "embed"})
+    ]
+    plan.recording.write_text("{}")
+    cache.finish(plan, passed=True)
+    assert plan.path.is_file()
+    replay = cache.plan(item, "https://staging.example")
+    assert replay is not None
+    assert replay.recording is None
+    assert replay.path == plan.path
+    # Another backend is recorded afresh.
+    other = cache.plan(item, "https://prod.example")
+    assert other is not None
+    assert other.recording is not None
+    assert other.path != plan.path
+
+
+def test_recordings_of_failed_tests_are_discarded(
+    tmp_path: pathlib.Path, items: dict[str, pytest.Item]
+) -> None:
+    cache = HarCache(tmp_path, HarMode.OFF)
+    plan = cache.plan(items["test_auto"], None)
+    assert plan is not None
+    assert plan.recording is not None
+    plan.recording.write_text("{}")
+    cache.finish(plan, passed=False)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_replay_requires_a_recording(
+    tmp_path: pathlib.Path, items: dict[str, pytest.Item]
+) -> None:
+    cache = HarCache(tmp_path, HarMode.OFF)
+    with pytest.raises(pytest.fail.Exception, match="No HAR recorded"):
+        cache.plan(items["test_shared"], None)
+    cache.path(items["test_shared"], "shared", None).write_text("{}")
+    plan = cache.plan(items["test_shared"], None)
+    assert plan is not None
+    assert plan.path.name.startswith("shared-")
+    context = FakeContext()
+    cache.attach(context, plan)  # type: ignore[arg-type]
+    assert context.routes == [(plan.path, {"url": None, "not_found": "fallback"})]
+
+
+def test_unsupported_mode(
+    tmp_path: pathlib.Path, items: dict[str, pytest.Item]
+) -> None:
+    with pytest.raises(pytest.UsageError, match="Unsupported pw_har mode 'bogus'"):
+        HarCache(tmp_path, HarMode.OFF).plan(items["test_bogus"], None)
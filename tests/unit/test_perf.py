@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+import pathlib
+import types
+
+import pytest
+
+from pytest_playwright_enhanced.perf import INIT_SCRIPT
+from pytest_playwright_enhanced.perf import PERF_LOG
+from pytest_playwright_enhanced.perf import PerfLog
+from pytest_playwright_enhanced.perf import PerfMonitor
+from pytest_playwright_enhanced.perf import PerfMonitorKey
+from pytest_playwright_enhanced.perf import merge_perf_logs
+from pytest_playwright_enhanced.perf import over_budget
+from pytest_playwright_enhanced.perf import perf_budget
+
+SOURCE = """
+import pytest
+
+def test_plain():
+    ...
+
+@pytest.mark.pw_perf_budget(lcp_ms=2500, cls=0.1)
+def test_budget():
+    ...
+
+@pytest.mark.pw_perf_budget(fcp_ms=1000)
+def test_bogus():
+    ...
+"""
+
+
+@pytest.fixture
+def items(pytester: pytest.Pytester) -> dict[str, pytest.Item]:
+    return {item.name: item for item in pytester.getitems(SOURCE)}
+
+
+def test_perf_budget(items: dict[str, pytest.Item]) -> None:
+    assert perf_budget(items["test_plain"]) == {}
+    assert perf_budget(items["test_budget"]) == {"lcp_ms": 2500.0, "cls": 0.1}
+    with pytest.raises(pytest.UsageError, match="fcp_ms"):
+        perf_budget(items["test_bogus"])
+
+
+def test_monitor_is_installed_on_the_context(items: dict[str, pytest.Item]) -> None:
+    scripts: list[str] = []
+    context = types.SimpleNamespace(add_init_script=scripts.append)
+    monitor = PerfMonitor.install(context, items["test_budget"])  # type: ignore[arg-type]
+    assert scripts == [INIT_SCRIPT]
+    assert items["test_budget"].stash[PerfMonitorKey] is monitor
+    assert monitor.budget == {"lcp_ms": 2500.0, "cls": 0.1}
+
+
+def test_over_budget_skips_unreported_metrics() -> None:
+    metrics = {"url": "https://a.example/", "lcp_ms": 3100.0, "cls": None}
+    assert over_budget(metrics, {"lcp_ms": 2500, "cls": 0.1}) == [
+        "lcp_ms 3100 > 2500 on https://a.example/"
+    ]
+    assert over_budget(metrics, {"lcp_ms": 4000}) == []
+
+
+def test_worker_logs_are_merged(tmp_path: pathlib.Path) -> None:
+    assert merge_perf_logs(tmp_path) is None
+    PerfLog(tmp_path, "gw0").write("test_a.py::test_a", [{"url": "a"}, {"url": "b"}])
+    PerfLog(tmp_path, "gw1").write("test_b.py::test_b", [{"url": "c"}])
+    assert merge_perf_logs(tmp_path) == tmp_path / PERF_LOG
+    records = [
+        json.loads(line) for line in (tmp_path / PERF_LOG).read_text().splitlines()
+    ]
+    assert records == [
+        {"nodeid": "test_a.py::test_a", "page": 0, "url": "a"},
+        {"nodeid": "test_a.py::test_a", "page": 1, "url": "b"},
+        {"nodeid": "test_b.py::test_b", "page": 0, "url": "c"},
+    ]
+    assert [path.name for path in tmp_path.iterdir()] == [PERF_LOG]
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import types
+
+from pytest_playwright_enhanced.pool import BrowserPool
+from pytest_playwright_enhanced.resolution import LaunchConfig
+
+
+class FakeBrowser:
+    def __init__(self: FakeBrowser) -> None:
+        self.connected = True
+        self.opened: list[FakeContext] = []
+
+    @property
+    def contexts(self: FakeBrowser) -> list[FakeContext]:
+        return list(self.opened)
+
+    def is_connected(self: FakeBrowser) -> bool:
+        return self.connected
+
+    def close(self: FakeBrowser) -> None:
+        self.connected = False
+
+
+class FakeContext:
+    def __init__(self: FakeContext, browser: FakeBrowser) -> None:
+        self.browser = browser
+
+    def close(self: FakeContext) -> None:
+        self.browser.opened.remove(self)
+
+
+def fake_pool() -> BrowserPool:
+    launcher = types.SimpleNamespace(launch=lambda **_: FakeBrowser())
+    playwright = types.SimpleNamespace(
+        chromium=launcher, firefox=launcher, webkit=launcher
+    )
+    return BrowserPool(types.SimpleNamespace(playwright=playwright))
+
+
+def test_same_kwargs_share_a_browser() -> None:
+    pool = fake_pool()
+    one = pool.acquire(
+        LaunchConfig.create("chromium", {"headless": True, "timeout": 10})
+    )
+    two = pool.acquire(
+        LaunchConfig.create("chromium", {"timeout": 10, "headless": True})
+    )
+    assert one is two
+    assert len(pool) == 1
+
+
+def test_different_kwargs_or_engines_do_not_share() -> None:
+    pool = fake_pool()
+    one = pool.acquire(LaunchConfig.create("chromium", {"timeout": 10}))
+    two = pool.acquire(LaunchConfig.create("chromium", {"timeout": 20}))
+    three = pool.acquire(LaunchConfig.create("firefox", {"timeout": 10}))
+    assert one is not two
+    assert one is not three
+    assert two is not three
+
+
+def test_disconnected_browser_is_relaunched() -> None:
+    pool = fake_pool()
+    one = pool.acquire(LaunchConfig.create("chromium", {}))
+    one.close()
+    assert pool.acquire(LaunchConfig.create("chromium", {})) is not one
+
+
+def test_release_closes_leaked_contexts() -> None:
+    pool = fake_pool()
+    browser = pool.acquire(LaunchConfig.create("chromium", {}))
+    browser.opened.extend([FakeContext(browser), FakeContext(browser)])
+    pool.release(browser)
+    assert not browser.contexts
+    assert browser.is_connected()
+
+
+def test_close_closes_all_browsers() -> None:
+    pool = fake_pool()
+    browsers = [
+        pool.acquire(LaunchConfig.create(engine, {}))
+        for engine in ("chromium", "webkit")
+    ]
+    pool.close()
+    assert not any(b.is_connected() for b in browsers)
+    assert len(pool) == 0
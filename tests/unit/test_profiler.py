@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import types
+
+import pytest
+from playwright import sync_api as pwsync
+
+from pytest_playwright_enhanced.profiler import ActionProfile
+from pytest_playwright_enhanced.profiler import ActionProfileReport
+from pytest_playwright_enhanced.profiler import ActionProxy
+from pytest_playwright_enhanced.profiler import unwrap
+
+
+class FakeLocator(pwsync.Locator):
+    def __init__(self: FakeLocator, selector: str) -> None:
+        self._impl_obj = types.SimpleNamespace(_selector=selector)
+
+    def click(self: FakeLocator) -> None: ...
+
+    def locator(self: FakeLocator, selector: str) -> FakeLocator:
+        return FakeLocator(f"{self._impl_obj._selector} >> {selector}")
+
+
+class FakePage(pwsync.Page):
+    def __init__(self: FakePage) -> None:
+        self._impl_obj = types.SimpleNamespace()
+
+    def goto(self: FakePage, url: str) -> None: ...
+
+    def fill(self: FakePage, selector: str, value: str) -> None: ...
+
+    def locator(self: FakePage, selector: str) -> FakeLocator:
+        return FakeLocator(selector)
+
+    def boom(self: FakePage) -> None:
+        raise pwsync.Error("boom")
+
+
+def test_calls_are_profiled_by_action_and_selector() -> None:
+    profile = ActionProfile()
+    page = ActionProxy(FakePage(), profile)
+    assert isinstance(page, pwsync.Page)
+    page.goto("https://a.example")
+    page.fill("#name", "value")
+    page.fill(selector="#name", value="value")
+    button = page.locator("form").locator("button")
+    assert isinstance(button, pwsync.Locator)
+    button.click()
+    with pytest.raises(pwsync.Error):
+        page.boom()
+    assert {action: stats[0] for action, stats in profile.actions.items()} == {
+        "FakePage.goto": 1,
+        "FakePage.fill": 2,
+        "FakePage.locator": 1,
+        "FakeLocator.locator": 1,
+        "FakeLocator.click": 1,
+        "FakePage.boom": 1,
+    }
+    assert {selector: stats[0] for selector, stats in profile.selectors.items()} == {
+        "#name": 2,
+        "form >> button": 1,
+    }
+
+
+def test_unwrap() -> None:
+    target = FakePage()
+    page = ActionProxy(target, ActionProfile())
+    assert unwrap(page) is target
+    assert unwrap(target) is target
+    assert page == target
+
+
+def test_profiles_are_merged_across_tests() -> None:
+    report = ActionProfileReport()
+    for seconds in (0.1, 0.3):
+        profile = ActionProfile()
+        profile.record("Page.click", "#a", seconds)
+        report.pytest_runtest_logreport(
+            types.SimpleNamespace(when="teardown", pw_actions=profile.as_dict())  # type: ignore[arg-type]
+        )
+    report.pytest_runtest_logreport(
+        types.SimpleNamespace(when="call", pw_actions=profile.as_dict())  # type: ignore[arg-type]
+    )
+    count, total, slowest = report.profile.actions["Page.click"]
+    assert count == 2  # noqa: PLR2004
+    assert total == pytest.approx(0.4)
+    assert slowest == pytest.approx(0.3)
+    assert report.profile.selectors["#a"] == [2, pytest.approx(0.4)]
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import typing
+
+import pytest
+from playwright.sync_api import Error
+
+from pytest_playwright_enhanced.exceptions import RemoteBrowserError
+from pytest_playwright_enhanced.remote import RemoteBrowserBackend
+from pytest_playwright_enhanced.remote import RemoteEndpoint
+
+
+class FakeBrowser:
+    def __init__(self: FakeBrowser, url: str) -> None:
+        self.url = url
+        self.handlers: list[typing.Callable[[], None]] = []
+
+    def on(self: FakeBrowser, _: str, handler: typing.Callable[[], None]) -> None:
+        self.handlers.append(handler)
+
+    def close(self: FakeBrowser) -> None:
+        for handler in self.handlers:
+            handler()
+
+
+class FakeBrowserType:
+    def __init__(self: FakeBrowserType, broken: set[str]) -> None:
+        self.broken = broken
+
+    def connect(self: FakeBrowserType, url: str, **_: object) -> FakeBrowser:
+        if url in self.broken:
+            raise Error("refused")
+        return FakeBrowser(url)
+
+    connect_over_cdp = connect
+
+
+class FakePlaywright:
+    def __init__(self: FakePlaywright, broken: tuple[str, ...] = ()) -> None:
+        self.chromium = self.firefox = self.webkit = FakeBrowserType(set(broken))
+
+
+@pytest.fixture
+def reachable(monkeypatch: pytest.MonkeyPatch) -> set[str]:
+    urls: set[str] = set()
+
+    def probe(self: RemoteEndpoint, _: float) -> bool:
+        self.healthy = self.url in urls
+        return self.healthy
+
+    monkeypatch.setattr(RemoteEndpoint, "probe", probe)
+    # Endpoint rotation depends on the worker running the test.
+    monkeypatch.delenv("PYTEST_XDIST_WORKER", raising=False)
+    return urls
+
+
+def test_connections_are_spread_over_endpoints(reachable: set[str]) -> None:
+    reachable.update({"ws://a:1", "ws://b:1"})
+    backend = RemoteBrowserBackend(["ws://a:1", "ws://b:1"])
+    browsers = [backend.connect(FakePlaywright(), "chromium", {}) for _ in range(4)]
+    assert sorted(b.url for b in browsers) == ["ws://a:1"] * 2 + ["ws://b:1"] * 2
+
+
+def test_disconnected_browsers_release_their_endpoint(reachable: set[str]) -> None:
+    reachable.update({"ws://a:1", "ws://b:1"})
+    backend = RemoteBrowserBackend(["ws://a:1", "ws://b:1"])
+    first = backend.connect(FakePlaywright(), "chromium", {})
+    first.close()
+    assert backend.connect(FakePlaywright(), "chromium", {}).url == first.url
+
+
+def test_unreachable_and_failing_endpoints_are_skipped(reachable: set[str]) -> None:
+    reachable.update({"ws://b:1", "ws://c:1"})
+    backend = RemoteBrowserBackend(["ws://a:1", "ws://b:1", "ws://c:1"])
+    browser = backend.connect(FakePlaywright(broken=("ws://b:1",)), "firefox", {})
+    assert browser.url == "ws://c:1"
+    assert backend.endpoints[1].failures == 1
+
+
+def test_exhausted_retries_raise(reachable: set[str]) -> None:
+    backend = RemoteBrowserBackend(["ws://a:1"], retries=2, backoff=0)
+    with pytest.raises(RemoteBrowserError, match="ws://a:1 is unreachable") as err:
+        backend.connect(FakePlaywright(), "chromium", {})
+    assert not reachable
+    assert str(err.value).count("is unreachable") == 3
+
+
+def test_no_retries_still_connects_once(reachable: set[str]) -> None:
+    reachable.add("ws://a:1")
+    backend = RemoteBrowserBackend(["ws://a:1"], retries=0, backoff=0)
+    assert backend.connect(FakePlaywright(), "chromium", {}).url == "ws://a:1"
+
+
+def test_cdp_endpoints_only_serve_chromium(reachable: set[str]) -> None:
+    reachable.add("http://a:9222")
+    backend = RemoteBrowserBackend(["http://a:9222"])
+    assert backend.connect(FakePlaywright(), "chromium", {}).url == "http://a:9222"
+    with pytest.raises(RemoteBrowserError, match="no endpoint serves this engine"):
+        backend.connect(FakePlaywright(), "webkit", {})
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import pytest
+
+from pytest_playwright_enhanced.resolution import LaunchConfig
+from pytest_playwright_enhanced.resolution import get_resolver
+
+CONFTEST = """
+    import pytest
+    from pytest_playwright_enhanced import dynamic_hook
+
+    CALLS = []
+
+    @pytest.hookimpl
+    {decorator}
+    def pytest_playwright_configure_proxy(config):
+        CALLS.append(config)
+        return {{"server": f"http://proxy:{{len(CALLS)}}"}}
+"""
+
+SOURCE = """
+    import pytest
+
+    def cb(item):
+        item.config.callbacks = getattr(item.config, "callbacks", 0) + 1
+        return {"slow_mo": 5}
+
+    def test_a(pw_page):
+        ...
+
+    @pytest.mark.browser_kwargs(callback=cb)
+    def test_b(pw_page):
+        ...
+"""
+
+
+def test_launch_config_is_hashable_by_fingerprint() -> None:
+    first = LaunchConfig.create("chromium", {"headless": True, "proxy": {"a": 1}})
+    second = LaunchConfig.create("chromium", {"proxy": {"a": 1}, "headless": True})
+    assert first == second
+    assert len({first, second}) == 1
+    assert first != LaunchConfig.create(
+        "firefox", {"headless": True, "proxy": {"a": 1}}
+    )
+    kwargs = first.as_kwargs()
+    kwargs["headless"] = False
+    assert first.kwargs["headless"]
+
+
+def test_defaults_are_resolved_once(pytester: pytest.Pytester) -> None:
+    pytester.makeconftest(CONFTEST.format(decorator=""))
+    plain, marked = pytester.getitems(SOURCE)
+    resolver = get_resolver(plain.config)
+    for _ in range(2):
+        assert resolver.browser(plain, "chromium") is resolver.browser_defaults(
+            "chromium"
+        )
+        launch = resolver.browser(marked, "chromium")
+    assert launch.kwargs["slow_mo"] == 5  # noqa: PLR2004
+    assert launch.kwargs["proxy"] == {"server": "http://proxy:1"}
+    assert launch.key != resolver.browser_defaults("chromium").key
+    assert marked.config.callbacks == 1
+
+
+def test_dynamic_hooks_are_not_cached(pytester: pytest.Pytester) -> None:
+    pytester.makeconftest(CONFTEST.format(decorator="@dynamic_hook"))
+    plain, _ = pytester.getitems(SOURCE)
+    resolver = get_resolver(plain.config)
+    assert resolver.hooks_are_dynamic()
+    first = resolver.browser(plain, "chromium")
+    assert resolver.browser(plain, "chromium") != first
+
+
+def test_dynamic_hooks_are_looked_up_once(
+    pytester: pytest.Pytester, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    plain, _ = pytester.getitems(SOURCE)
+    resolver = get_resolver(plain.config)
+    assert not resolver.hooks_are_dynamic()
+    hook = plain.config.hook.pytest_playwright_configure_proxy
+    monkeypatch.setattr(type(hook), "get_hookimpls", pytest.fail)
+    for _ in range(2):
+        resolver.browser(plain, "chromium")
+    assert not resolver.hooks_are_dynamic()
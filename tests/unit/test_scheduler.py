@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import json
+import pathlib
+import types
+
+import pytest
+
+from pytest_playwright_enhanced.durations import DurationHistory
+from pytest_playwright_enhanced.scheduler import BrowserAffinityScheduling
+from pytest_playwright_enhanced.scheduler import browser_group
+from pytest_playwright_enhanced.scheduler import read_browser_groups
+from pytest_playwright_enhanced.scheduler import write_browser_groups
+
+
+class FakeNode:
+    def __init__(self: FakeNode, name: str) -> None:
+        self.gateway = types.SimpleNamespace(id=name)
+        self.sent: list[int] = []
+        self.shutting_down = False
+
+    def send_runtest_some(self: FakeNode, indexes: list[int]) -> None:
+        self.sent.extend(indexes)
+
+    def shutdown(self: FakeNode) -> None:
+        self.shutting_down = True
+
+
+def make_scheduler(
+    pytester: pytest.Pytester,
+    groups: dict[str, str],
+    workers: int,
+    *,
+    affinity: bool = True,
+) -> tuple[BrowserAffinityScheduling, list[FakeNode]]:
+    config = pytester.parseconfig("--tx", f"{workers}*popen", "--pw-dist", "browser")
+    if affinity:
+        affinity_dir = pytester.mkdir("affinity")
+        (affinity_dir / "gw0.json").write_text(json.dumps(groups))
+        config.affinity_dir = str(affinity_dir)
+    scheduler = BrowserAffinityScheduling(config)
+    nodes = [FakeNode(f"gw{idx}") for idx in range(workers)]
+    for node in nodes:
+        scheduler.add_node(node)  # type: ignore[arg-type]
+        scheduler.add_node_collection(node, list(groups))  # type: ignore[arg-type]
+    scheduler.schedule()
+    return scheduler, nodes
+
+
+def test_browser_groups_round_trip(pytester: pytest.Pytester) -> None:
+    items = pytester.getitems(
+        """
+        import pytest
+
+        @pytest.mark.browser_kwargs(slow_mo=10)
+        def test_marked(pw_page):
+            ...
+
+        def test_plain(pw_page):
+            ...
+        """
+    )
+    path = pytester.path / "gw0.json"
+    write_browser_groups(items, path)
+    groups = read_browser_groups(pytester.path)
+    marked, plain = (groups[item.nodeid] for item in items)
+    assert plain == "chromium|"
+    assert marked.startswith("chromium|")
+    assert marked != plain
+
+
+MARKED = """
+    import pytest
+
+    @pytest.mark.browser_kwargs(slow_mo=10)
+    @pytest.mark.context_kwargs(locale="de-DE")
+    def test_marked(pw_page):
+        ...
+"""
+
+
+def test_browser_groups_ignore_the_launch_defaults(pytester: pytest.Pytester) -> None:
+    (item,) = pytester.getitems(MARKED)
+    expected = browser_group(item)
+    pytester.makeconftest(
+        """
+        import pytest
+
+        @pytest.hookimpl
+        def pytest_playwright_configure_proxy(config):
+            return {"server": "http://proxy:1"}
+        """
+    )
+    module = pytester.getmodulecol(
+        MARKED, configargs=("--headed", "--browser-timeout", "5")
+    )
+    (item,) = pytester.genitems([module])
+    assert browser_group(item) == expected
+    assert expected.startswith("chromium|")
+
+
+def test_read_browser_groups_without_workers(tmp_path: pathlib.Path) -> None:
+    assert read_browser_groups(tmp_path) == {}
+
+
+def test_groups_are_kept_on_few_workers(pytester: pytest.Pytester) -> None:
+    groups = {f"test_a.py::test_{idx}[chromium]": "chromium|" for idx in range(8)}
+    groups.update({f"test_a.py::test_{idx}[firefox]": "firefox|" for idx in range(8)})
+    _, nodes = make_scheduler(pytester, groups, workers=2)
+    collection = list(groups)
+    for node in nodes:
+        engines = {groups[collection[idx]] for idx in node.sent}
+        assert len(engines) == 1
+
+
+def test_load_scope_without_affinity_dir(pytester: pytest.Pytester) -> None:
+    groups = {f"test_{mod}.py::test_{idx}": "|" for mod in "ab" for idx in range(4)}
+    scheduler, nodes = make_scheduler(pytester, groups, workers=2, affinity=False)
+    collection = list(groups)
+    assert not scheduler._scopes
+    for node in nodes:
+        modules = {collection[idx].split("::")[0] for idx in node.sent}
+        assert len(modules) == 1
+
+
+def test_large_groups_are_still_balanced(pytester: pytest.Pytester) -> None:
+    groups = {f"test_a.py::test_{idx}[chromium]": "chromium|" for idx in range(16)}
+    groups.update({"test_a.py::test_0[webkit]": "webkit|"})
+    scheduler, nodes = make_scheduler(pytester, groups, workers=4)
+    assert all(node.sent for node in nodes)
+    assert sum(len(node.sent) for node in nodes) + sum(
+        len(unit) for unit in scheduler.workqueue.values()
+    ) == len(groups)
+
+
+def test_units_are_weighted_by_duration(pytester: pytest.Pytester) -> None:
+    groups = {f"test_a.py::test_{idx}[chromium]": "chromium|" for idx in range(8)}
+    slow = "test_a.py::test_7[chromium]"
+    history = DurationHistory({**dict.fromkeys(groups, 1.0), slow: 60.0})
+    config = pytester.parseconfig("--tx", "2*popen", "--pw-dist", "browser")
+    config.affinity_dir = str(pytester.mkdir("affinity"))
+    scheduler = BrowserAffinityScheduling(config, history=history)
+    nodes = [FakeNode(f"gw{idx}") for idx in range(2)]
+    for node in nodes:
+        scheduler.add_node(node)  # type: ignore[arg-type]
+        scheduler.add_node_collection(node, list(groups))  # type: ignore[arg-type]
+    scheduler.schedule()
+    # The slow test is a unit of its own and is handed out first.
+    assert nodes[0].sent == [list(groups).index(slow)]
+    assert len(nodes[1].sent) == len(groups) - 1
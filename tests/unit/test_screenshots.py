@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import typing
+
+import pytest
+from playwright import sync_api as pwsync
+
+from pytest_playwright_enhanced.screenshots import capture_screenshots
+
+
+class FakeImpl:
+    def __init__(self: FakeImpl, delay: float, error: Exception | None) -> None:
+        self.delay = delay
+        self.error = error
+        self.options: dict[str, object] = {}
+
+    async def screenshot(self: FakeImpl, **options: object) -> bytes:
+        self.options = options
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return b"png"
+
+
+class FakePage:
+    def __init__(
+        self: FakePage, delay: float = 0.2, error: Exception | None = None
+    ) -> None:
+        self._impl_obj = FakeImpl(delay, error)
+
+    def _sync(
+        self: FakePage, coro: typing.Coroutine[object, object, list[bytes]]
+    ) -> list[bytes]:
+        return asyncio.run(coro)
+
+
+def test_pages_are_captured_concurrently() -> None:
+    pages = [FakePage() for _ in range(4)]
+    started = time.perf_counter()
+    captured = capture_screenshots(pages, timeout=1000)  # type: ignore[arg-type]
+    assert time.perf_counter() - started < 0.6  # noqa: PLR2004
+    assert captured == [b"png"] * 4
+
+
+def test_failed_pages_do_not_fail_the_others() -> None:
+    error = TimeoutError("hung")
+    captured = capture_screenshots(
+        [FakePage(), FakePage(error=error)],  # type: ignore[list-item]
+        timeout=1000,
+    )
+    assert captured == [b"png", error]
+
+
+def test_options_are_passed_to_every_page() -> None:
+    page = FakePage(delay=0)
+    capture_screenshots(
+        [page],  # type: ignore[list-item]
+        timeout=500,
+        full_page=True,
+        image_type="jpeg",
+        quality=60,
+        scale="css",
+    )
+    assert page._impl_obj.options == {
+        "timeout": 500,
+        "fullPage": True,
+        "type": "jpeg",
+        "scale": "css",
+        "quality": 60,
+    }
+
+
+def test_no_pages() -> None:
+    assert capture_screenshots([], timeout=1000) == []
+
+
+class PublicPage:
+    def __init__(
+        self: PublicPage, delay: float, error: Exception | None = None
+    ) -> None:
+        self.delay = delay
+        self.error = error
+        self.options: dict[str, object] = {}
+
+    def screenshot(self: PublicPage, **options: float) -> bytes:
+        self.options = options
+        time.sleep(min(self.delay, options["timeout"] / 1000))
+        if self.error is not None or self.delay * 1000 > options["timeout"]:
+            raise self.error or pwsync.TimeoutError("hung")
+        return b"png"
+
+
+def test_pages_fall_back_to_the_public_api() -> None:
+    pages = [PublicPage(0), PublicPage(5), PublicPage(0)]
+    started = time.perf_counter()
+    captured = capture_screenshots(
+        pages,  # type: ignore[arg-type]
+        timeout=300,
+        image_type="jpeg",
+        quality=60,
+    )
+    assert time.perf_counter() - started < 1
+    assert captured[0] == captured[2] == b"png"
+    assert isinstance(captured[1], pwsync.TimeoutError)
+    assert pages[0].options == {
+        "timeout": pytest.approx(300, abs=50),
+        "full_page": False,
+        "type": "jpeg",
+        "quality": 60,
+        "scale": "device",
+    }
+
+
+class ChangedImpl:
+    async def screenshot(self: ChangedImpl, _: dict[str, object]) -> bytes:
+        return b"png"
+
+
+class ChangedPage(FakePage):
+    """A page whose private async screenshot changed signature."""
+
+    def __init__(self: ChangedPage) -> None:
+        self._impl_obj = ChangedImpl()  # type: ignore[assignment]
+
+    def screenshot(self: ChangedPage, **_: object) -> bytes:
+        return b"public"
+
+
+def test_changed_internals_fall_back_to_the_public_api() -> None:
+    captured = capture_screenshots(
+        [ChangedPage(), ChangedPage()],  # type: ignore[list-item]
+        timeout=1000,
+    )
+    assert captured == [b"public", b"public"]
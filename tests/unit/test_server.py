@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import sys
+import time
+import typing
+
+import pytest
+
+from pytest_playwright_enhanced import server as server_module
+from pytest_playwright_enhanced import warmup
+from pytest_playwright_enhanced.exceptions import BrowserServerError
+from pytest_playwright_enhanced.resolution import LaunchConfig
+from pytest_playwright_enhanced.server import BrowserServer
+from pytest_playwright_enhanced.server import launch_server_options
+from pytest_playwright_enhanced.warmup import BrowserWarmup
+
+
+def test_launch_server_options_are_camel_cased() -> None:
+    options = launch_server_options(
+        {
+            "headless": True,
+            "executable_path": "/tmp/foo",
+            "chromium_sandbox": False,
+            "handle_sighup": True,
+            "handle_sigint": True,
+            "handle_sigterm": True,
+            "proxy": {"server": "foo"},
+        }
+    )
+    assert options == {
+        "headless": True,
+        "executablePath": "/tmp/foo",
+        "chromiumSandbox": False,
+        "handleSIGHUP": True,
+        "handleSIGINT": True,
+        "handleSIGTERM": True,
+        "proxy": {"server": "foo"},
+    }
+
+
+class FakeServer:
+    launched: typing.ClassVar[list[FakeServer]] = []
+
+    def __init__(self: FakeServer, engine: str) -> None:
+        self.engine = engine
+        self.closed = False
+
+    @classmethod
+    def launch(cls: type[FakeServer], engine: str, *_: object) -> FakeServer:
+        if engine == "webkit":
+            raise RuntimeError("boom")
+        server = cls(engine)
+        cls.launched.append(server)
+        return server
+
+    def close(self: FakeServer) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def fake_warmup(monkeypatch: pytest.MonkeyPatch) -> BrowserWarmup:
+    FakeServer.launched = []
+    monkeypatch.setattr(warmup, "BrowserServer", FakeServer)
+    return BrowserWarmup()
+
+
+def test_warm_servers_are_handed_over_once(fake_warmup: BrowserWarmup) -> None:
+    fake_warmup.start(LaunchConfig.create("chromium", {"headless": True}))
+    fake_warmup.start(LaunchConfig.create("chromium", {"headless": True}))
+    server = fake_warmup.take(LaunchConfig.create("chromium", {"headless": True}))
+    assert server is FakeServer.launched[0]
+    assert len(FakeServer.launched) == 1
+    assert fake_warmup.take(LaunchConfig.create("chromium", {"headless": True})) is None
+
+
+def test_failed_or_unknown_servers_are_not_handed_over(
+    fake_warmup: BrowserWarmup,
+) -> None:
+    fake_warmup.start(LaunchConfig.create("webkit", {}))
+    assert fake_warmup.take(LaunchConfig.create("webkit", {})) is None
+    assert fake_warmup.take(LaunchConfig.create("firefox", {})) is None
+
+
+def test_untaken_servers_are_closed(fake_warmup: BrowserWarmup) -> None:
+    fake_warmup.start(LaunchConfig.create("chromium", {}))
+    fake_warmup.start(LaunchConfig.create("firefox", {}))
+    fake_warmup.start(LaunchConfig.create("webkit", {}))
+    fake_warmup.close()
+    assert all(server.closed for server in FakeServer.launched)
+
+
+def fake_driver(monkeypatch: pytest.MonkeyPatch, script: str) -> None:
+    monkeypatch.setattr(
+        server_module,
+        "compute_driver_executable",
+        lambda: (sys.executable, "-c", script),
+    )
+    monkeypatch.setattr(server_module, "get_driver_env", lambda: None)
+
+
+def test_server_endpoint_is_read(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_driver(
+        monkeypatch, "import time; print('ws://foo', flush=True); time.sleep(30)"
+    )
+    server = BrowserServer.launch("chromium", {}, timeout=30)
+    assert server.ws_endpoint == "ws://foo"
+    assert server.is_running()
+    server.close()
+    assert not server.is_running()
+
+
+def test_hung_servers_are_killed(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_driver(monkeypatch, "import time; time.sleep(30)")
+    started = time.perf_counter()
+    with pytest.raises(BrowserServerError, match=r"did not start within 0.5s"):
+        BrowserServer.launch("chromium", {}, timeout=0.5)
+    assert time.perf_counter() - started < 10  # noqa: PLR2004
+
+
+def test_servers_exiting_early_report_stderr(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_driver(monkeypatch, "import sys; sys.exit('no browser')")
+    with pytest.raises(BrowserServerError, match="because no browser"):
+        BrowserServer.launch("chromium", {}, timeout=30)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import argparse
+
+import pytest
+
+from pytest_playwright_enhanced.durations import DurationHistory
+from pytest_playwright_enhanced.sharding import parse_shard
+from pytest_playwright_enhanced.sharding import shard_items
+
+SOURCE = """
+    import pytest
+
+    @pytest.mark.parametrize("_", range(6))
+    def test_a(pw_page, _):
+        ...
+
+    @pytest.mark.parametrize("_", range(6))
+    @pytest.mark.browser_kwargs(slow_mo=10)
+    def test_b(pw_page, _):
+        ...
+"""
+
+
+def test_parse_shard() -> None:
+    assert parse_shard("2/8") == (2, 8)
+
+
+@pytest.mark.parametrize("value", ["2", "a/b", "0/2", "3/2", "1/0"])
+def test_parse_shard_rejects_invalid_values(value: str) -> None:
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_shard(value)
+
+
+def test_shards_are_disjoint_and_keep_groups_together(
+    pytester: pytest.Pytester,
+) -> None:
+    items = pytester.getitems(SOURCE)
+    first, rest = shard_items(items, 1, 2)
+    second, _ = shard_items(items, 2, 2)
+    assert sorted(first + second, key=items.index) == items
+    assert rest == second
+    assert {item.originalname for item in first} == {"test_a"}
+    assert {item.originalname for item in second} == {"test_b"}
+
+
+def test_shards_are_balanced_by_duration(pytester: pytest.Pytester) -> None:
+    items = pytester.getitems(SOURCE)
+    history = DurationHistory({item.nodeid: 1.0 for item in items})
+    history.durations[items[0].nodeid] = 11.0
+    shards = [shard_items(items, index, 2, history)[0] for index in (1, 2)]
+    assert shards[0] == [items[0]]
+    assert len(shards[1]) == len(items) - 1
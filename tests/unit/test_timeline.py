@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import json
+import pathlib
+
+from pytest_playwright_enhanced.timeline import ARTIFACT_THREAD
+from pytest_playwright_enhanced.timeline import Timeline
+from pytest_playwright_enhanced.timeline import merge_timelines
+from pytest_playwright_enhanced.timeline import worker_pid
+
+
+def test_worker_pid() -> None:
+    assert worker_pid("main") == 0
+    assert worker_pid("gw0") == 1
+    assert worker_pid("gw11") == 12  # noqa: PLR2004
+
+
+def test_workers_are_merged_into_a_single_trace(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "timeline.json"
+    for worker in ("gw0", "gw1"):
+        timeline = Timeline(path, worker)
+        timeline.span("context", "fixture", 1.0, 1.5, nodeid="test_a.py::test_a")
+        timeline.span("video", "artifact", 1.5, 2.0, tid=ARTIFACT_THREAD)
+        timeline.close()
+    merge_timelines(path)
+    trace = json.loads(path.read_text())
+    assert trace["displayTimeUnit"] == "ms"
+    events = trace["traceEvents"]
+    assert {
+        (event["pid"], event["args"]["name"])
+        for event in events
+        if event["name"] == "process_name"
+    } == {(1, "gw0"), (2, "gw1")}
+    spans = [event for event in events if event["ph"] == "X"]
+    assert len(spans) == 4  # noqa: PLR2004
+    context = next(span for span in spans if span["name"] == "context")
+    assert context["dur"] == 500_000  # noqa: PLR2004
+    assert context["args"] == {"nodeid": "test_a.py::test_a"}
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_nothing_is_written_without_events(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "timeline.json"
+    Timeline(path, "main").close()
+    merge_timelines(path)
+    assert json.loads(path.read_text())["traceEvents"] == []
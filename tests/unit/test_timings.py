@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import types
+
+from pytest_playwright_enhanced.timings import TimingsReport
+from pytest_playwright_enhanced.timings import percentile
+
+
+def test_percentile() -> None:
+    values = [float(value) for value in range(1, 21)]
+    assert percentile(values, 0.5) == 10  # noqa: PLR2004
+    assert percentile(values, 0.95) == 19  # noqa: PLR2004
+    assert percentile([3.0], 0.95) == 3  # noqa: PLR2004
+
+
+def test_only_teardown_reports_carry_timings() -> None:
+    report = TimingsReport(terminal=True, path=None)
+    for when in ("setup", "call", "teardown"):
+        report.pytest_runtest_logreport(
+            types.SimpleNamespace(  # type: ignore[arg-type]
+                nodeid="test_a.py::test_a",
+                when=when,
+                pw_timings={"context": 0.2, "call": 1.0}
+                if when == "teardown"
+                else None,
+            )
+        )
+    report.pytest_runtest_logreport(
+        types.SimpleNamespace(nodeid="test_a.py::test_b", when="teardown")  # type: ignore[arg-type]
+    )
+    summary = report.summary()
+    assert list(summary) == ["context", "call"]
+    assert summary["context"] == {
+        "tests": 1,
+        "total": 0.2,
+        "mean": 0.2,
+        "p50": 0.2,
+        "p95": 0.2,
+        "max": 0.2,
+    }
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import pathlib
+import typing
+
+from pytest_playwright_enhanced.artifacts import ArtifactStore
+from pytest_playwright_enhanced.artifacts import ArtifactWriter
+from pytest_playwright_enhanced.const import TraceMode
+from pytest_playwright_enhanced.const import TracePreset
+from pytest_playwright_enhanced.tracing import TraceRecorder
+
+
+class FakeTracing:
+    def __init__(self: FakeTracing) -> None:
+        self.calls: list[tuple[str, dict[str, typing.Any]]] = []
+
+    def start(self: FakeTracing, **kwargs: object) -> None:
+        self.calls.append(("start", kwargs))
+
+    def start_chunk(self: FakeTracing, **kwargs: object) -> None:
+        self.calls.append(("start_chunk", kwargs))
+
+    def stop_chunk(self: FakeTracing, path: pathlib.Path | None = None) -> None:
+        self.calls.append(("stop_chunk", {"path": path}))
+        if path is not None:
+            path.write_bytes(b"zip")
+
+    def stop(self: FakeTracing, path: pathlib.Path | None = None) -> None:
+        self.calls.append(("stop", {"path": path}))
+        if path is not None:
+            path.write_bytes(b"zip")
+
+
+class FakeContext:
+    def __init__(self: FakeContext) -> None:
+        self.tracing = FakeTracing()
+
+
+def store(root: pathlib.Path | None = None) -> ArtifactStore:
+    return ArtifactStore(root or pathlib.Path(), ArtifactWriter(0))
+
+
+def test_chunked_tracing_starts_once_per_context(tmp_path: pathlib.Path) -> None:
+    recorder = TraceRecorder(store(tmp_path), mode=TraceMode.CHUNKED)
+    context = FakeContext()
+    for name in ("a", "b"):
+        recorder.start(context, name)  # type: ignore[arg-type]
+        recorder.stop(context, name, None)  # type: ignore[arg-type]
+    recorder.start(context, "c")  # type: ignore[arg-type]
+    recorder.stop(context, "c", "c-trace.zip")  # type: ignore[arg-type]
+    assert [call for call, _ in context.tracing.calls] == [
+        "start",
+        "start_chunk",
+        "stop_chunk",
+        "start_chunk",
+        "stop_chunk",
+        "start_chunk",
+        "stop_chunk",
+    ]
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "c-trace.zip",
+        "manifest-main.jsonl",
+    ]
+
+
+def test_light_preset_skips_sources_and_screenshots() -> None:
+    recorder = TraceRecorder(store(), preset=TracePreset.LIGHT, screenshots=True)
+    context = FakeContext()
+    recorder.start(context, "a")  # type: ignore[arg-type]
+    assert context.tracing.calls == [
+        (
+            "start",
+            {"title": "a", "screenshots": False, "snapshots": True, "sources": False},
+        )
+    ]
+
+
+def test_ring_is_written_with_failures(tmp_path: pathlib.Path) -> None:
+    recorder = TraceRecorder(store(tmp_path), mode=TraceMode.CHUNKED, ring_size=2)
+    context = FakeContext()
+    for name in ("a", "b", "c"):
+        recorder.start(context, name)  # type: ignore[arg-type]
+        recorder.stop(context, name, None)  # type: ignore[arg-type]
+    recorder.start(context, "d")  # type: ignore[arg-type]
+    recorder.stop(context, "d", "d-trace.zip")  # type: ignore[arg-type]
+    recorder.close()
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "d-trace-before-1.zip",
+        "d-trace-before-2.zip",
+        "d-trace.zip",
+        "manifest-main.jsonl",
+    ]
+
+
+def test_sampling_is_deterministic() -> None:
+    recorder = TraceRecorder(store(), sample_rate=0.5)
+    nodeids = [f"test_a.py::test_{idx}" for idx in range(200)]
+    sampled = [nodeid for nodeid in nodeids if recorder.sampled(nodeid)]
+    assert sampled == [nodeid for nodeid in nodeids if recorder.sampled(nodeid)]
+    assert 50 < len(sampled) < 150  # noqa: PLR2004
+    assert not TraceRecorder(store(), sample_rate=0).sampled(nodeids[0])
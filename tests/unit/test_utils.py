@@ -1,6 +1,16 @@
+import types
+
 import pytest
 
+from pytest_playwright_enhanced.exceptions import PWEMarkerError
+from pytest_playwright_enhanced.utils import _stable_repr
 from pytest_playwright_enhanced.utils import check_engine
+from pytest_playwright_enhanced.utils import conflicting_rerun_options
+from pytest_playwright_enhanced.utils import get_browser_servers_from_node
+from pytest_playwright_enhanced.utils import hash_kwargs
+from pytest_playwright_enhanced.utils import marker_kwargs
+from pytest_playwright_enhanced.utils import pooled_engines
+from pytest_playwright_enhanced.utils import reset_fixture_request
 from pytest_playwright_enhanced.utils import safe_to_run_plugin
 
 
@@ -38,3 +48,91 @@ def test_valid_engine() -> None:
     assert check_engine("webkit") is None
     with pytest.raises(pytest.UsageError):
         check_engine("foo")
+
+
+def test_hash_kwargs_is_order_independent() -> None:
+    assert hash_kwargs({"a": 1, "b": {"c": 2}}) == hash_kwargs({"b": {"c": 2}, "a": 1})
+    assert hash_kwargs({"a": 1}) != hash_kwargs({"a": 2})
+
+
+def test_hash_kwargs_handles_unserializable_values() -> None:
+    assert hash_kwargs({"path": object}) == hash_kwargs({"path": object})
+
+
+def test_hash_kwargs_names_callables_rather_than_their_address() -> None:
+    def callback(_: object) -> None: ...
+
+    assert "0x" not in _stable_repr(callback)
+    assert _stable_repr(callback).endswith("<locals>.callback")
+    assert _stable_repr(object()) == "<object object>"
+
+
+def test_pooled_engines(pytester: pytest.Pytester) -> None:
+    items = pytester.getitems("""
+        import pytest
+
+        def test_no_browser(pw_multi_browser):
+            ...
+
+        def test_browser(pw_page):
+            ...
+
+        @pytest.mark.browser_kwargs(slow_mo=10)
+        def test_dedicated(pw_browser):
+            ...
+    """)
+    assert pooled_engines(items) == ("chromium",)
+
+
+def test_browser_servers_from_controller(pytester: pytest.Pytester) -> None:
+    config = pytester.parseconfig()
+    assert get_browser_servers_from_node(config) == {}
+    config.browser_servers = [["chromium", "abc", "ws://localhost:1/foo"]]
+    assert get_browser_servers_from_node(config) == {
+        ("chromium", "abc"): "ws://localhost:1/foo"
+    }
+
+
+def test_reset_fixture_request(pytester: pytest.Pytester) -> None:
+    (item,) = pytester.getitems("""
+        def test_a(tmp_path):
+            ...
+    """)
+    request = item._request
+    item.funcargs["tmp_path"] = "stale"
+    assert reset_fixture_request(item)
+    assert item.funcargs == {}
+    assert item._request is not request
+    assert not reset_fixture_request(item.parent)
+
+
+def test_conflicting_rerun_options() -> None:
+    config = types.SimpleNamespace(option=types.SimpleNamespace(reruns=2))
+    assert conflicting_rerun_options(config) == ["--reruns"]  # type: ignore[arg-type]
+    config.option = types.SimpleNamespace(reruns=0)
+    assert conflicting_rerun_options(config) == []  # type: ignore[arg-type]
+
+
+def test_marker_kwargs(pytester: pytest.Pytester) -> None:
+    items = pytester.getitems(
+        """
+        import pytest
+
+        def test_plain():
+            ...
+
+        @pytest.mark.context_kwargs(locale="en-GB", callback=lambda item: {"name": item.name})
+        def test_callback():
+            ...
+
+        @pytest.mark.context_kwargs("en-GB")
+        def test_args():
+            ...
+        """
+    )
+    plain, callback, args = items
+    assert marker_kwargs(plain, "context_kwargs") == {}
+    assert marker_kwargs(callback, "context_kwargs")["name"] == "test_callback"
+    assert marker_kwargs(callback, "context_kwargs")["locale"] == "en-GB"
+    with pytest.raises(PWEMarkerError):
+        marker_kwargs(args, "context_kwargs")